@@ -50,29 +50,15 @@ import numpy as np
 #to create a Pandas dataframe from the raw data
 import pandas as pd 
 pd.set_option('display.max_columns',None) #displays all columns
-pd.set_option('display.max_rows',None) #displays all rows
-
-#to get the latitude and longitude data for each city
-get_ipython().system('conda install -c conda-forge geopy --yes')
-from geopy.geocoders import Nominatim
-
-#to make it easier to share data between code and URL easier
-import requests 
-from pandas.io.json import json_normalize
-
-#to retrieve data from URL 
-get_ipython().system('pip install beautifulsoup4')
-from bs4 import BeautifulSoup
+pd.set_option('display.max_rows',100) #displays up to 100 rows, printing every row of a large frame is slow
 
 #import data visualization libraries
-import matplotlib.cm as cm
-import matplotlib.colors as colors
-import matplotlib as mpl
 import matplotlib.pyplot as plt
 
-
-get_ipython().system('conda install -c conda-forge folium=0.5.0 --yes')
-import folium
+#geocoding (geopy), the postal code table (lxml) and maps (folium) are handled by the
+#neighborhoods package, which imports them when they are first needed; install geopy,
+#lxml and folium beforehand rather than from the notebook.
+#the whole analysis also runs headless: python -m neighborhoods analyze --help
 
 print("All the necessary libraries have been imported")
 
@@ -83,49 +69,38 @@ print("All the necessary libraries have been imported")
 
 
 #extract table from Wikipedia page
-source = requests.get('https://en.wikipedia.org/wiki/List_of_postal_codes_of_Canada:_M').text
-soup = BeautifulSoup(source)
-table  = soup.find('table',{'class':'wikitable sortable'})
+from neighborhoods.postal import fetch_postal_page, parse_postal_table, clean_postal_table, merge_coordinates
 
-#format pandas dataframe
-col_names = ['PostalCode','Borough','Neighborhood']
-df = pd.DataFrame(columns = col_names)
+source = fetch_postal_page()
 
 
 # In[3]:
 
 
 #Collecting all the data for Postal Codes, Boroughs and Neighborhoods
-
-for a in table.find_all('tr'):
-    row = []
-    for b in a.find_all('td'):
-        row.append(b.text.strip())
-    if len(row)==3:
-        df.loc[len(df)] = row  
+#the whole table is parsed in one pass and the dataframe is built once
+df = parse_postal_table(source)
 
 
 # In[4]:
 
 
-#eliminate Boroughs that are Not Assigned
-df = df[df['Borough'] != 'Not assigned']
-
-#Display neighborhoods with same post codes in one row
-df = df.groupby(['PostalCode','Borough'],sort = False).agg(', '.join)
-df.reset_index(inplace = True)
-
+#eliminate Boroughs that are Not Assigned,
+#display neighborhoods with same post codes in one row and
 #Neighborhood = Borough, for those boroughs without an assigned Neighborhood
-df.loc[df['Neighborhood'] == 'Not assigned','Neighborhood'] = df['Borough']
+df = clean_postal_table(df)
 
 
 # In[5]:
 
 
 #read in the geospatial coordinates
-df_geo = pd.read_csv('Geospatial_Coordinates.csv')
-df_geo.rename(columns = {'Postal Code': 'PostalCode'}, inplace = True)
-df_geo = pd.merge(df,df_geo,on = 'PostalCode')
+#the CSV is parsed once and kept in the columnar store for the following runs
+from neighborhoods.postal import read_coordinates
+from neighborhoods.store import Store
+
+store = Store()
+df_geo = merge_coordinates(df, read_coordinates(store=store))
 df_geo.head()
 
 
@@ -145,35 +120,24 @@ print('The dataframe has {} boroughs and {} neighborhoods.'.format(
 
 
 #get the geospatial data for Toronto
+#borough and city centres come from the postal code coordinates, Nominatim is only asked for other places
+from neighborhoods.geocode import Gazetteer, Geocoder
+
 address = 'Toronto, ON'
 
-geolocator = Nominatim(user_agent="foursquare_agent")
-location = geolocator.geocode(address)
-latitude = location.latitude
-longitude = location.longitude
-print('The geograpical coordinate of New York City are {}, {}.'.format(latitude, longitude))
+geocode = Geocoder(Gazetteer.from_df_geo(df_geo))
+latitude, longitude = geocode(address)
+print('The geograpical coordinate of Toronto are {}, {}.'.format(latitude, longitude))
 
 
 # In[8]:
 
 
-# create map of New York using latitude and longitude values
-map_toronto = folium.Map(location=[43.6534817, -79.3839347], zoom_start=10)
-
-# add markers to map
-for lat, lng, borough, neighborhood in zip(df_geo['Latitude'], df_geo['Longitude'], df_geo['Borough'], df_geo['Neighborhood']):
-    label = '{}, {}'.format(neighborhood, borough)
-    label = folium.Popup(label, parse_html=True)
-    folium.CircleMarker(
-        [lat, lng],
-        radius=5,
-        popup=label,
-        color='blue',
-        fill=True,
-        fill_color='#3186cc',
-        fill_opacity=0.7,
-        parse_html=False).add_to(map_toronto)  
-    
+# create map of Toronto using latitude and longitude values
+#all the markers are added as one layer
+from neighborhoods.maps import add_centre_marker, neighborhoods_map, venue_map
+
+map_toronto = neighborhoods_map(df_geo, centre=(latitude, longitude), zoom_start=10)
 map_toronto
 
 
@@ -223,124 +187,47 @@ Etobicoke_data.head()
 # In[12]:
 
 
-CLIENT_ID = 'PGGUSXZ4ZLRK2RQDRUI0QN3UZFQ1YNKTUELSWYZNMJIUFKVO' # your Foursquare ID
-CLIENT_SECRET = 'L2VOBN33JLX1W0CXGR2HCEWA3I0KFN0XBE01EP5QCHW0AGFC' # your Foursquare Secret
-VERSION = '20180604' # Foursquare API version
-
-
-# ##### _Define a function that uses Foursquare API to retrieve (LIMIT) venues for a given radius around any coordinates._
-
-# In[13]:
-
-
-def get_venues(lat,lng):
-    #set variables
-    radius= 5000
-    LIMIT=100
-    #Foursquare API
-    url = 'https://api.foursquare.com/v2/venues/explore?&client_id={}&client_secret={}&v={}&ll={},{}&radius={}&limit={}'.format(
-            CLIENT_ID, 
-            CLIENT_SECRET, 
-            VERSION, 
-            lat, 
-            lng, 
-            radius, 
-            LIMIT)
-    # get all the data
-    results = requests.get(url).json()
-    venue_data=results["response"]['groups'][0]['items']
-    venue_list=[]
-    for row in venue_data:
-        try:
-            venue_id=row['venue']['id']
-            venue_name=row['venue']['name']
-            venue_category=row['venue']['categories'][0]['name']
-            venue_list.append([venue_id,venue_name,venue_category])
-        except KeyError:
-            pass
-    column_names=['ID','Name','Category']
-    venues = pd.DataFrame(venue_list,columns=column_names)
-    return venues
-
-
-# ### 3.7. Analyzing the Boroughs 
-
-# #### 3.7.1. Scarborough
-
-# ##### _Getting the coordinates of the borough_
-
-# In[14]:
-
-
-address = 'Scarborough, ON'
-
-geolocator = Nominatim(user_agent="foursquare_agent")
-location = geolocator.geocode(address)
-latitude = location.latitude
-longitude = location.longitude
-print(latitude, longitude)
+import os
 
+CLIENT_ID = os.environ.get('FOURSQUARE_CLIENT_ID', '') # your Foursquare ID
+CLIENT_SECRET = os.environ.get('FOURSQUARE_CLIENT_SECRET', '') # your Foursquare Secret
+VERSION = '20180604' # Foursquare API version
 
-# ##### _Searching for restaurants in the Scarborough._
 
-# In[15]:
+# ##### _A shared Foursquare client, with pooled connections for concurrent requests and an on-disk response cache._
 
+# In[ ]:
 
-LIMIT = 100
-search_query = 'Restaurant'
-radius = 5000 #in meters
-print(search_query + ' .... OK!')
 
+from neighborhoods.cache import ResponseCache
+from neighborhoods.foursquare import FoursquareClient
 
-# In[16]:
+#responses are cached on disk, so re-running the analysis costs no API calls
+client = FoursquareClient(CLIENT_ID, CLIENT_SECRET, VERSION, cache=ResponseCache())
 
 
-#URL to access Foursquare API
-url = 'https://api.foursquare.com/v2/venues/search?client_id={}&client_secret={}&ll={},{}&v={}&query={}&radius={}&limit={}'.format(CLIENT_ID, CLIENT_SECRET, latitude, longitude, VERSION, search_query, radius, LIMIT)
-url
+# ### 3.7. Analyzing the Boroughs 
 
+# ##### _Every shortlisted borough goes through the same steps: getting the coordinates of the borough, searching for restaurants within a given radius, refining the dataset and finding the restaurants around each of its neighborhoods. The boroughs are analyzed in parallel._
 
-# #####  _Creating a database of restaurants in Scarborough within a given radius._ 
+# In[14]:
 
-# In[17]:
 
+from neighborhoods.pipeline import analyze_boroughs
 
-# Scarborough Venues Dataframe
-results = requests.get(url).json()
-venues = results['response']['venues']
+results = analyze_boroughs(df_geo, boroughs=['Scarborough', 'Etobicoke'], client=client, geocode=geocode)
+results['centres']
 
-# tranform venues into a dataframe
-Scarborough_venues = pd.json_normalize(venues)
-Scarborough_venues.head()
 
+# #### 3.7.1. Scarborough
 
-# ##### _Refining the dataset._
+# ##### _Restaurants in Scarborough within a given radius, refined._
 
 # In[18]:
 
 
-# keep only columns that include venue name, and anything that is associated with location
-filtered_columns = ['name', 'categories'] + [col for col in Scarborough_venues.columns if col.startswith('location.')] + ['id']
-Scarborough_filtered = Scarborough_venues.loc[:, filtered_columns]
-
-# function that extracts the category of the venue
-def get_category_type(row):
-    try:
-        categories_list = row['categories']
-    except:
-        categories_list = row['venue.categories']
-        
-    if len(categories_list) == 0:
-        return None
-    else:
-        return categories_list[0]['name']
-
-# filter the category for each row
-Scarborough_filtered['categories'] = Scarborough_filtered.apply(get_category_type, axis=1)
-
-# clean column names by keeping only last term
-Scarborough_filtered.columns = [column.split('.')[-1] for column in Scarborough_filtered.columns]
-
+search = results['search']
+Scarborough_filtered = search[search['Borough'] == 'Scarborough'].drop(columns='Borough').reset_index(drop=True)
 Scarborough_filtered.head()
 
 
@@ -349,100 +236,18 @@ Scarborough_filtered.head()
 # In[19]:
 
 
-#find frequencies of restaurants of top cuisines
-column_names=['Borough', 'Neighborhood', 'ID','Name']
-venues=pd.DataFrame(columns=column_names)
-i=1
-for row in Scarborough_data.values.tolist():
-    PostalCode,Borough, Neighborhood, Latitude, Longitude=row
-    locations = get_venues(Latitude,Longitude)
-    resturants=locations[locations['Category']=='Restaurant'] 
-    print('(',i,'/',len(Scarborough_data),')','Resturants in '+Neighborhood+', '+Borough+':'+str(len(resturants)))
-    print(row)
-    for resturant_info in resturants.values.tolist():
-        id, name , category=resturant_info
-        venues = venues.append({'Borough': Borough,
-                                'Neighborhood': Neighborhood, 
-                                'ID': id,
-                                'Name' : name
-                                }, ignore_index=True)
-    i=i+1
+restaurants = results['restaurants']
+print(restaurants[restaurants['Borough'] == 'Scarborough'].groupby('Neighborhood', sort=False)['ID'].count())
 
 
 # #### 3.7.2. Etobicoke
 
-# ##### _Getting the coordinates of the borough_
-
-# In[20]:
-
-
-address = 'Etobicoke, ON'
-geolocator = Nominatim(user_agent="foursquare_agent")
-location = geolocator.geocode(address)
-latitude = location.latitude
-longitude = location.longitude
-print(latitude, longitude)
-
-
-# ##### _Searching for restaurants in the Etobicoke._
-
-# In[21]:
-
-
-LIMIT = 100
-search_query = 'Restaurant'
-radius = 5000 #in meters
-print(search_query + ' .... OK!')
-
-
-# In[22]:
-
-
-#URL to access Foursquare API
-url = 'https://api.foursquare.com/v2/venues/search?client_id={}&client_secret={}&ll={},{}&v={}&query={}&radius={}&limit={}'.format(CLIENT_ID, CLIENT_SECRET, latitude, longitude, VERSION, search_query, radius, LIMIT)
-url
-
-
-# ##### _Creating a database of restaurants in Etobicoke within a given radius._
-
-# In[23]:
-
-
-# Etobicoke Venues Dataframe
-results = requests.get(url).json()
-venues = results['response']['venues']
-# tranform venues into a dataframe
-Etobicoke_venues = pd.json_normalize(venues)
-Etobicoke_venues.head()
-
-
-# ##### _Refining the dataset._
+# ##### _Restaurants in Etobicoke within a given radius, refined._
 
 # In[24]:
 
 
-# keep only columns that include venue name, and anything that is associated with location
-filtered_columns = ['name', 'categories'] + [col for col in Etobicoke_venues.columns if col.startswith('location.')] + ['id']
-Etobicoke_filtered = Etobicoke_venues.loc[:, filtered_columns]
-
-# function that extracts the category of the venue
-def get_category_type(row):
-    try:
-        categories_list = row['categories']
-    except:
-        categories_list = row['venue.categories']
-        
-    if len(categories_list) == 0:
-        return None
-    else:
-        return categories_list[0]['name']
-
-# filter the category for each row
-Etobicoke_filtered['categories'] = Etobicoke_filtered.apply(get_category_type, axis=1)
-
-# clean column names by keeping only last term
-Etobicoke_filtered.columns = [column.split('.')[-1] for column in Etobicoke_filtered.columns]
-
+Etobicoke_filtered = search[search['Borough'] == 'Etobicoke'].drop(columns='Borough').reset_index(drop=True)
 Etobicoke_filtered.head()
 
 
@@ -451,24 +256,7 @@ Etobicoke_filtered.head()
 # In[25]:
 
 
-#find frequencies of restaurants of top cuisines
-column_names=['Borough', 'Neighborhood', 'ID','Name']
-venues=pd.DataFrame(columns=column_names)
-i=1
-for row in Etobicoke_data.values.tolist():
-    PostalCode,Borough, Neighborhood, Latitude, Longitude=row
-    locations = get_venues(Latitude,Longitude)
-    resturants=locations[locations['Category']=='Restaurant'] 
-    print('(',i,'/',len(Etobicoke_data),')','Resturants in '+Neighborhood+', '+Borough+':'+str(len(resturants)))
-    print(row)
-    for resturant_info in resturants.values.tolist():
-        id, name , category=resturant_info
-        venues = venues.append({'Borough': Borough,
-                                'Neighborhood': Neighborhood, 
-                                'ID': id,
-                                'Name' : name
-                                }, ignore_index=True)
-    i=i+1
+print(restaurants[restaurants['Borough'] == 'Etobicoke'].groupby('Neighborhood', sort=False)['ID'].count())
 
 
 # ### 3.8. Data Visualization: Graphs and Maps
@@ -508,30 +296,12 @@ plt.show()
 # In[28]:
 
 
-Scarborough_map = folium.Map(location=[43.773077,-79.257774], zoom_start=10) # generate map centred around the Scarborough
+# the restaurants are added as one layer of blue circle markers
+Scarborough_map = venue_map(Scarborough_filtered.lat, Scarborough_filtered.lng, Scarborough_filtered.categories,
+                            mode='geojson', centre=(43.773077,-79.257774), zoom_start=10) # generate map centred around the Scarborough
 
 # add a red circle marker to represent Scarborough
-folium.features.CircleMarker(
-    [43.773077,-79.257774],
-    radius=10,
-    color='red',
-    popup='Scarborough',
-    fill = True,
-    fill_color = 'red',
-    fill_opacity = 0.6
-).add_to(Scarborough_map)
-
-# add the restaurants as blue circle markers
-for lat, lng, label in zip(Scarborough_filtered.lat, Scarborough_filtered.lng, Scarborough_filtered.categories):
-    folium.features.CircleMarker(
-        [lat, lng],
-        radius=5,
-        color='blue',
-        popup=label,
-        fill = True,
-        fill_color='blue',
-        fill_opacity=0.6
-    ).add_to(Scarborough_map)
+add_centre_marker(Scarborough_map, 43.773077,-79.257774, 'Scarborough')
 
 # display map
 Scarborough_map
@@ -542,31 +312,12 @@ Scarborough_map
 # In[29]:
 
 
-
-Etobicoke_map = folium.Map(location=[43.6435559,-79.5656326], zoom_start=13) # generate map centred around the Conrad Hotel
+# the restaurants are added as one layer of blue circle markers
+Etobicoke_map = venue_map(Etobicoke_filtered.lat, Etobicoke_filtered.lng, Etobicoke_filtered.categories,
+                          mode='geojson', centre=(43.6435559,-79.5656326), zoom_start=13) # generate map centred around the Conrad Hotel
 
 # add a red circle marker to represent Etobicoke
-folium.features.CircleMarker(
-    [43.6435559,-79.5656326],
-    radius=10,
-    color='red',
-    popup='Etobicoke',
-    fill = True,
-    fill_color = 'red',
-    fill_opacity = 0.6
-).add_to(Etobicoke_map)
-
-# add the restaurants as blue circle markers
-for lat, lng, label in zip(Etobicoke_filtered.lat, Etobicoke_filtered.lng, Etobicoke_filtered.categories):
-    folium.features.CircleMarker(
-        [lat, lng],
-        radius=5,
-        color='blue',
-        popup=label,
-        fill = True,
-        fill_color='blue',
-        fill_opacity=0.6
-    ).add_to(Etobicoke_map)
+add_centre_marker(Etobicoke_map, 43.6435559,-79.5656326, 'Etobicoke')
 
 # display map
 Etobicoke_map
@@ -0,0 +1,5 @@
+"""Timing scripts for the analysis stages; run them with ``python -m benchmarks.<name>``.
+
+``benchmarks.suite`` times every stage against the synthetic data of
+``benchmarks.synthetic`` and the local services of ``benchmarks.stubs``.
+"""
@@ -0,0 +1,85 @@
+"""Compare per-centroid exploring with the adaptive ``neighborhoods.coverage`` planner.
+
+    python -m benchmarks.bench_coverage --neighborhoods 100 --venues 50000
+
+Both run against an in-process stand-in for the explore endpoint that serves
+a synthetic venue density field (a few dense downtown clusters over a sparse
+background) and, like Foursquare, returns at most ``limit`` venues nearest to
+the query point.  Reports the number of requests and the share of venues near
+the neighborhoods that were found.
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from neighborhoods.coverage import MARGIN, explore_coverage
+from neighborhoods.foursquare import LIMIT, RADIUS, fetch_venues
+from neighborhoods.spatial import SpatialIndex
+
+from .synthetic import VenueField
+
+
+class DensityClient:
+    """Answers ``explore`` from a ``synthetic.VenueField``, counting requests."""
+
+    max_workers = 8
+
+    def __init__(self, field):
+        self.field = field
+        self.requests = 0
+
+    def explore(self, lat, lng, radius=RADIUS, limit=LIMIT):
+        self.requests += 1
+        return self.field.explore(lat, lng, radius, limit)
+
+    def close(self):
+        pass
+
+
+def synthetic_field(neighborhoods, venues, seed=0):
+    """Neighborhood centroids and venue coordinates around Toronto."""
+    rng = np.random.default_rng(seed)
+    df_geo = pd.DataFrame({'PostalCode': ['M%03d' % i for i in range(neighborhoods)],
+                           'Borough': 'Borough',
+                           'Neighborhood': ['Neighborhood %d' % i for i in range(neighborhoods)],
+                           'Latitude': 43.6 + rng.random(neighborhoods) * 0.25,
+                           'Longitude': -79.6 + rng.random(neighborhoods) * 0.45})
+    dense = venues // 2
+    centres = rng.integers(0, neighborhoods, size=5)
+    cluster = rng.integers(0, 5, size=dense)
+    lat = np.concatenate([df_geo['Latitude'].to_numpy()[centres][cluster]
+                          + rng.normal(0, 0.01, dense),
+                          43.58 + rng.random(venues - dense) * 0.29])
+    lng = np.concatenate([df_geo['Longitude'].to_numpy()[centres][cluster]
+                          + rng.normal(0, 0.01, dense),
+                          -79.62 + rng.random(venues - dense) * 0.49])
+    return df_geo, lat, lng
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--neighborhoods', type=int, default=100)
+    parser.add_argument('--venues', type=int, default=50000)
+    args = parser.parse_args(argv)
+
+    df_geo, lat, lng = synthetic_field(args.neighborhoods, args.venues)
+    field = VenueField(lat, lng, np.zeros(len(lat), dtype=int))
+    #venues that full coverage of the area should find
+    near = SpatialIndex.from_frame(df_geo).nearest(lat, lng)[0] <= MARGIN
+    expected = {'v%d' % i for i in np.flatnonzero(near)}
+
+    for name, run in [('per centroid', lambda client: fetch_venues(df_geo, client)),
+                      ('coverage', lambda client: explore_coverage(df_geo, client)['venues'])]:
+        client = DensityClient(field)
+        start = time.perf_counter()
+        found = set(run(client)['ID'])
+        seconds = time.perf_counter() - start
+        print('{:<14} {:6d} requests {:8.3f}s  found {:6.1%} of {} venues'.format(
+            name, client.requests, seconds, len(found & expected) / len(expected),
+            len(expected)))
+
+
+if __name__ == '__main__':
+    main()
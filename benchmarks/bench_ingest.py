@@ -0,0 +1,67 @@
+"""Compare the notebook's row-by-row table ingestion with ``neighborhoods.postal``.
+
+    python -m benchmarks.bench_ingest --rows 100000 --legacy-rows 5000
+
+The notebook loop is quadratic, so by default it only runs on the first
+``--legacy-rows`` rows of the synthetic table and its time is reported for
+that size.
+"""
+import argparse
+import time
+
+import pandas as pd
+
+from neighborhoods.postal import COLUMNS, NOT_ASSIGNED, read_neighborhoods
+
+from .synthetic import postal_table
+
+
+def legacy_ingest(source):
+    """The notebook's cells In[2]-In[4], unchanged apart from the parser name."""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(source, 'lxml')
+    table = soup.find('table', {'class': 'wikitable sortable'})
+    df = pd.DataFrame(columns=COLUMNS)
+    for a in table.find_all('tr'):
+        row = []
+        for b in a.find_all('td'):
+            row.append(b.text.strip())
+        if len(row) == 3:
+            df.loc[len(df)] = row
+    df = df[df['Borough'] != NOT_ASSIGNED]
+    df = df.groupby(['PostalCode', 'Borough'], sort=False).agg(', '.join)
+    df.reset_index(inplace=True)
+    df.loc[df['Neighborhood'] == NOT_ASSIGNED, 'Neighborhood'] = df['Borough']
+    return df
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--legacy-rows', type=int, default=5000)
+    args = parser.parse_args(argv)
+
+    source = postal_table(args.rows)
+    df, seconds = timed(read_neighborhoods, source)
+    print('read_neighborhoods: {:,} rows in {:.3f}s -> {:,} postal codes'.format(
+        args.rows, seconds, len(df)))
+
+    if args.legacy_rows:
+        rows = min(args.rows, args.legacy_rows)
+        small = postal_table(rows)
+        legacy, legacy_seconds = timed(legacy_ingest, small)
+        df, seconds = timed(read_neighborhoods, small)
+        pd.testing.assert_frame_equal(df, legacy, check_dtype=False)
+        print('notebook loop:      {:,} rows in {:.3f}s (read_neighborhoods {:.3f}s, {:.0f}x)'.format(
+            rows, legacy_seconds, seconds, legacy_seconds / seconds))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""Compare the notebook's per-marker map loop with the batched ``neighborhoods.maps`` layers.
+
+    python -m benchmarks.bench_maps --venues 20000
+
+Reports the time to build and render each map to HTML, and the HTML size.
+"""
+import argparse
+import time
+
+import folium
+import numpy as np
+
+from neighborhoods.maps import venue_map
+
+
+def legacy_map(latitudes, longitudes, labels):
+    """The notebook's cell In[28], without the centre marker."""
+    map_ = folium.Map(location=[43.773077, -79.257774], zoom_start=10)
+    for lat, lng, label in zip(latitudes, longitudes, labels):
+        folium.features.CircleMarker(
+            [lat, lng],
+            radius=5,
+            color='blue',
+            popup=label,
+            fill=True,
+            fill_color='blue',
+            fill_opacity=0.6
+        ).add_to(map_)
+    return map_
+
+
+def render(build, *args, **kwargs):
+    start = time.perf_counter()
+    page = build(*args, **kwargs).get_root().render()
+    return time.perf_counter() - start, len(page.encode('utf-8'))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--venues', type=int, default=20000)
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(0)
+    latitudes = 43.6 + rng.random(args.venues) * 0.25
+    longitudes = -79.6 + rng.random(args.venues) * 0.45
+    labels = ['Restaurant %d' % i for i in range(args.venues)]
+
+    runs = [('per-marker loop', legacy_map, {}),
+            ('cluster', venue_map, {'mode': 'cluster'}),
+            ('geojson', venue_map, {'mode': 'geojson'}),
+            ('cluster + grid', venue_map, {'mode': 'cluster', 'cell_size': 0.01})]
+    for name, build, kwargs in runs:
+        seconds, size = render(build, latitudes, longitudes, labels, **kwargs)
+        print('{:<16} {:8.3f}s {:10.1f} MB'.format(name, seconds, size / 1e6))
+
+
+if __name__ == '__main__':
+    main()
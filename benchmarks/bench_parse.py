@@ -0,0 +1,65 @@
+"""Compare the notebook's ``json_normalize`` + ``apply`` refinement with ``filter_venues``.
+
+    python -m benchmarks.bench_parse --venues 200000
+
+Reports wall time and peak traced memory of both paths on a synthetic
+``response.venues`` dump and checks they produce the same frame.
+"""
+import argparse
+import time
+import tracemalloc
+
+import pandas as pd
+
+from neighborhoods.venues import filter_venues
+
+from .synthetic import search_venues
+
+
+def legacy_filter(venues):
+    """The notebook's cells In[17]-In[18]."""
+    def get_category_type(row):
+        try:
+            categories_list = row['categories']
+        except KeyError:
+            categories_list = row['venue.categories']
+        if len(categories_list) == 0:
+            return None
+        else:
+            return categories_list[0]['name']
+
+    frame = pd.json_normalize(venues)
+    filtered_columns = (['name', 'categories']
+                        + [col for col in frame.columns if col.startswith('location.')] + ['id'])
+    filtered = frame.loc[:, filtered_columns]
+    filtered['categories'] = filtered.apply(get_category_type, axis=1)
+    filtered.columns = [column.split('.')[-1] for column in filtered.columns]
+    return filtered
+
+
+def measure(func, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(*args)
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, seconds, peak
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--venues', type=int, default=200000)
+    args = parser.parse_args(argv)
+
+    venues = search_venues(args.venues)
+    legacy, legacy_seconds, legacy_peak = measure(legacy_filter, venues)
+    fast, seconds, peak = measure(filter_venues, venues)
+    pd.testing.assert_frame_equal(fast, legacy, check_dtype=False)
+    print('json_normalize + apply: {:.3f}s, peak {:.1f} MB'.format(legacy_seconds, legacy_peak / 1e6))
+    print('filter_venues:          {:.3f}s, peak {:.1f} MB ({:.1f}x faster)'.format(
+        seconds, peak / 1e6, legacy_seconds / seconds))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,170 @@
+"""Local HTTP stand-ins for Wikipedia, Nominatim and Foursquare.
+
+Each stub is a threaded ``http.server`` on a free localhost port that waits
+``latency`` seconds before answering, so network-bound stages can be timed
+without credentials or internet access::
+
+    with FoursquareStub(VenueField.random(100000), latency=0.05) as stub:
+        client = FoursquareClient('id', 'secret', base_url=stub.url)
+"""
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from .synthetic import EAST, NORTH, SOUTH, WEST
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        stub = self.server.stub
+        with stub.lock:
+            stub.requests += 1
+        if stub.latency:
+            time.sleep(stub.latency)
+        url = urlparse(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        status, content_type, body, *headers = stub.handle(url.path, query, self.headers)
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers[0] if headers else {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class StubServer:
+    """Base class; subclasses answer ``handle(path, query, headers)`` with
+    ``(status, content type, body bytes)`` and optionally a dict of headers."""
+
+    path = '/'
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.requests = 0
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        self.server.daemon_threads = True
+        self.server.stub = self
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+
+    @property
+    def host(self):
+        return '127.0.0.1:%d' % self.server.server_address[1]
+
+    @property
+    def url(self):
+        return 'http://' + self.host + self.path
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def handle(self, path, query, headers):
+        raise NotImplementedError
+
+    @staticmethod
+    def json(body, status=200):
+        return status, 'application/json', json.dumps(body).encode('utf-8')
+
+
+class WikipediaStub(StubServer):
+    """Serves postal code pages, e.g. ``synthetic.postal_table(rows)`` or saved HTML.
+
+    ``pages`` is one HTML string, served at any path, or a dict of pages by
+    FSA letter, served at ``url_template.format(letter)``.  Pages carry an
+    ``ETag`` and a ``Last-Modified`` date, and conditional requests that
+    match get an empty 304.
+    """
+
+    path = '/wiki/List_of_postal_codes_of_Canada:_M'
+    last_modified = 'Mon, 04 Jun 2018 00:00:00 GMT'
+
+    def __init__(self, pages, latency=0.0):
+        if isinstance(pages, str):
+            pages = {None: pages}
+        self.pages = {letter: html.encode('utf-8') for letter, html in pages.items()}
+        self.etags = {letter: '"%s"' % hashlib.sha1(body).hexdigest()[:16]
+                      for letter, body in self.pages.items()}
+        self.not_modified = 0
+        super().__init__(latency)
+
+    @property
+    def url_template(self):
+        return 'http://' + self.host + '/wiki/List_of_postal_codes_of_Canada:_{}'
+
+    def handle(self, path, query, headers):
+        letter = path.rsplit('_', 1)[-1] if None not in self.pages else None
+        if letter not in self.pages:
+            return 404, 'text/html', b'no such page'
+        validators = {'ETag': self.etags[letter], 'Last-Modified': self.last_modified}
+        if (headers.get('If-None-Match') == self.etags[letter]
+                or headers.get('If-Modified-Since') == self.last_modified):
+            with self.lock:
+                self.not_modified += 1
+            return 304, 'text/html; charset=utf-8', b'', validators
+        return 200, 'text/html; charset=utf-8', self.pages[letter], validators
+
+
+class NominatimStub(StubServer):
+    """Answers ``/search`` with a made-up but stable point in Toronto per query."""
+
+    def handle(self, path, query, headers):
+        if path.rstrip('/') != '/search' or 'q' not in query:
+            return self.json({'error': 'not found'}, 404)
+        seed = sum(query['q'].encode('utf-8')) % 1000 / 1000
+        lat = SOUTH + seed * (NORTH - SOUTH)
+        lng = WEST + (1 - seed) * (EAST - WEST)
+        return self.json([{'lat': str(lat), 'lon': str(lng), 'display_name': query['q'],
+                           'importance': 0.5}])
+
+    def geolocator(self, user_agent='benchmarks'):
+        """A geopy ``Nominatim`` that talks to this stub (see ``Geocoder``)."""
+        from geopy.geocoders import Nominatim
+
+        return Nominatim(user_agent=user_agent, domain=self.host, scheme='http')
+
+
+class FoursquareStub(StubServer):
+    """The explore and search endpoints over a ``synthetic.VenueField``.
+
+    Use ``url`` as the ``base_url`` of a ``FoursquareClient``.
+    """
+
+    path = '/v2/venues/'
+
+    def __init__(self, field, latency=0.0):
+        self.field = field
+        super().__init__(latency)
+
+    def handle(self, path, query, headers):
+        try:
+            lat, lng = map(float, query['ll'].split(','))
+            radius = float(query.get('radius', 5000))
+            limit = int(query.get('limit', 100))
+        except (KeyError, ValueError):
+            return self.json({'meta': {'code': 400}}, 400)
+        if path.endswith('/explore'):
+            items = self.field.explore(lat, lng, radius, limit)
+            return self.json({'meta': {'code': 200},
+                              'response': {'groups': [{'type': 'Recommended Places',
+                                                       'items': items}]}})
+        if path.endswith('/search'):
+            venues = self.field.search(lat, lng, query.get('query'), radius, limit)
+            return self.json({'meta': {'code': 200}, 'response': {'venues': venues}})
+        return self.json({'meta': {'code': 404}}, 404)
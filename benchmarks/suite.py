@@ -0,0 +1,259 @@
+"""Time every stage of the pipeline against synthetic data and local stubs.
+
+    python -m benchmarks.suite --venues 100000 --latency 0.02
+    python -m benchmarks.suite --stages fetch parse --compare 1a2b3c4
+
+Stages: scrape (Wikipedia page -> neighborhoods), national (every FSA letter
+page, fetched concurrently and revalidated with conditional requests), merge
+(coordinates CSV), geocode (Nominatim), fetch (explore every neighborhood),
+fetch_warm (the same requests answered by a warm response cache), parse
+(refine search results), aggregate (category matrix, top venues, diversity)
+and render (map HTML).  Each stage runs ``--repeat`` times after one warm-up.
+Results are saved as ``.benchmarks/<commit>.json``; ``--compare`` prints them
+next to a previous run, by commit or file name, and flags stages that got
+slower.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+
+from neighborhoods.cache import ResponseCache
+from neighborhoods.diversity import diversity
+from neighborhoods.features import CategoryMatrix, most_common_venues
+from neighborhoods.foursquare import FoursquareClient, fetch_venues
+from neighborhoods.geocode import Geocoder
+from neighborhoods.maps import venue_map
+from neighborhoods.postal import (FSA_LETTERS, fetch_postal_page, merge_coordinates,
+                                  read_coordinates, read_national, read_neighborhoods)
+from neighborhoods.venues import filter_venues
+
+from .stubs import FoursquareStub, NominatimStub, WikipediaStub
+from .synthetic import (VenueField, coordinates_frame, postal_pages, postal_table,
+                        search_venues)
+
+RESULTS_DIR = '.benchmarks'
+
+STAGES = {}
+
+
+def stage(name):
+    """Register ``setup(env) -> run()`` as the benchmark of stage ``name``."""
+    def register(setup):
+        STAGES[name] = setup
+        return setup
+    return register
+
+
+class Environment:
+    """Synthetic inputs and running stubs shared by the stages."""
+
+    def __init__(self, args, directory):
+        self.args = args
+        self.directory = directory
+        self.html = postal_table(args.rows)
+        self.coordinates_csv = os.path.join(directory, 'Geospatial_Coordinates.csv')
+        coordinates_frame(args.rows).to_csv(self.coordinates_csv, index=False)
+        self.field = VenueField.random(args.venues)
+        self.wikipedia = WikipediaStub(self.html, args.latency)
+        self.national = WikipediaStub(postal_pages(args.rows, FSA_LETTERS), args.latency)
+        self.nominatim = NominatimStub(args.latency)
+        self.foursquare = FoursquareStub(self.field, args.latency)
+        self._df_geo = None
+
+    def close(self):
+        for stub in (self.wikipedia, self.national, self.nominatim, self.foursquare):
+            stub.close()
+
+    @property
+    def df_geo(self):
+        if self._df_geo is None:
+            self._df_geo = merge_coordinates(read_neighborhoods(self.html),
+                                             read_coordinates(self.coordinates_csv))
+        return self._df_geo
+
+    def client(self, cache=None):
+        return FoursquareClient('id', 'secret', base_url=self.foursquare.url,
+                                max_workers=self.args.workers, cache=cache)
+
+
+@stage('scrape')
+def scrape(env):
+    return lambda: read_neighborhoods(fetch_postal_page(env.wikipedia.url))
+
+
+@stage('national')
+def national(env):
+    coordinates = coordinates_frame(env.args.rows, letters=FSA_LETTERS)
+    coordinates = coordinates.rename(columns={'Postal Code': 'PostalCode'})
+    cache = ResponseCache(os.path.join(env.directory, 'wikipedia.sqlite'), ttl=None)
+    return lambda: read_national(coordinates, url=env.national.url_template, cache=cache)
+
+
+@stage('merge')
+def merge(env):
+    df = read_neighborhoods(env.html)
+    return lambda: merge_coordinates(df, read_coordinates(env.coordinates_csv))
+
+
+@stage('geocode')
+def geocode(env):
+    boroughs = env.df_geo['Borough'].unique()
+    runs = iter(range(1000000))
+
+    def run():
+        #a fresh cache every run, or only the first run would reach the stub
+        cache = ResponseCache(os.path.join(env.directory, 'geocode%d.sqlite' % next(runs)),
+                              ttl=None)
+        geocoder = Geocoder(cache=cache, interval=0,
+                            geolocator=env.nominatim.geolocator())
+        return [geocoder('{}, ON'.format(borough)) for borough in boroughs]
+    return run
+
+
+@stage('fetch')
+def fetch(env):
+    neighborhoods = env.df_geo.iloc[:env.args.neighborhoods]
+
+    def run():
+        with env.client() as client:
+            return fetch_venues(neighborhoods, client)
+    return run
+
+
+@stage('fetch_warm')
+def fetch_warm(env):
+    neighborhoods = env.df_geo.iloc[:env.args.neighborhoods]
+    #filled by the warm-up run, so the timed runs never reach the stub
+    cache = ResponseCache(os.path.join(env.directory, 'foursquare.sqlite'))
+
+    def run():
+        with env.client(cache) as client:
+            return fetch_venues(neighborhoods, client)
+    return run
+
+
+@stage('parse')
+def parse(env):
+    venues = search_venues(min(env.args.venues, env.args.parse_venues))
+    return lambda: filter_venues(venues)
+
+
+@stage('aggregate')
+def aggregate(env):
+    venues = env.field.frame(env.args.neighborhoods)
+
+    def run():
+        matrix = CategoryMatrix.from_venues(venues)
+        return most_common_venues(matrix), diversity(matrix)
+    return run
+
+
+@stage('render')
+def render(env):
+    venues = env.field.frame().iloc[:env.args.render_venues]
+    return lambda: venue_map(venues['Latitude'], venues['Longitude'], venues['Name'].tolist(),
+                             mode='geojson').get_root().render()
+
+
+def measure(run, repeat):
+    run()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+    return {'min': min(times), 'median': statistics.median(times), 'repeat': repeat}
+
+
+def git_commit():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'],
+                               capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+    return commit + ('-dirty' if dirty else '')
+
+
+def load_results(reference, directory=RESULTS_DIR):
+    """Load saved results by path, file name or (prefix of a) commit."""
+    if os.path.exists(reference):
+        path = reference
+    else:
+        names = sorted(name for name in os.listdir(directory) if name.startswith(reference))
+        if not names:
+            raise SystemExit('no saved results match {!r}'.format(reference))
+        path = os.path.join(directory, names[-1])
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(results, reference, threshold):
+    print('{:<10} {:>10} {:>10} {:>8}'.format('stage', reference['commit'][:10],
+                                              results['commit'][:10], 'ratio'))
+    for name, timing in results['stages'].items():
+        before = reference['stages'].get(name)
+        if before is None:
+            print('{:<10} {:>10} {:>9.4f}s'.format(name, '-', timing['min']))
+            continue
+        ratio = timing['min'] / before['min']
+        flag = '  slower' if ratio > 1 + threshold else ('  faster' if ratio < 1 - threshold else '')
+        print('{:<10} {:>9.4f}s {:>9.4f}s {:>7.2f}x{}'.format(name, before['min'], timing['min'],
+                                                            ratio, flag))
+    if reference.get('params') != results.get('params'):
+        print('note: the runs used different parameters')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--stages', nargs='+', choices=list(STAGES), default=list(STAGES))
+    parser.add_argument('--rows', type=int, default=1000, help='postal code table rows')
+    parser.add_argument('--venues', type=int, default=100000, help='venues in the field')
+    parser.add_argument('--neighborhoods', type=int, default=100,
+                        help='neighborhoods explored by the fetch stage')
+    parser.add_argument('--parse-venues', type=int, default=100000,
+                        help='search results refined by the parse stage, at most --venues')
+    parser.add_argument('--render-venues', type=int, default=10000)
+    parser.add_argument('--latency', type=float, default=0.02,
+                        help='seconds every stub waits before answering')
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--compare', metavar='COMMIT', help='compare with a saved run')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='relative change reported as slower or faster')
+    parser.add_argument('--no-save', action='store_true')
+    args = parser.parse_args(argv)
+
+    params = {key: value for key, value in vars(args).items()
+              if key not in ('stages', 'repeat', 'compare', 'threshold', 'no_save')}
+    results = {'commit': git_commit(), 'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+               'python': platform.python_version(), 'machine': platform.platform(),
+               'params': params, 'stages': {}}
+    with tempfile.TemporaryDirectory() as directory:
+        env = Environment(args, directory)
+        try:
+            for name in args.stages:
+                results['stages'][name] = timing = measure(STAGES[name](env), args.repeat)
+                print('{:<10} min {:8.4f}s  median {:8.4f}s'.format(name, timing['min'],
+                                                                    timing['median']))
+        finally:
+            env.close()
+
+    if args.compare:
+        compare(results, load_results(args.compare), args.threshold)
+    if not args.no_save:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        path = os.path.join(RESULTS_DIR, results['commit'] + '.json')
+        with open(path, 'w') as f:
+            json.dump(results, f, indent=1)
+        print('results saved to {}'.format(path))
+
+
+if __name__ == '__main__':
+    main()
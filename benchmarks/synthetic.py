@@ -0,0 +1,165 @@
+"""Synthetic stand-ins for the Wikipedia table, the coordinates CSV and Foursquare.
+
+Everything is generated from a seed, so two runs of a benchmark see the same
+data.  ``VenueField`` holds the venues as coordinate arrays and only builds
+the JSON-shaped dicts of the venues a request returns, which keeps a field of
+a million venues cheap.
+"""
+import random
+import string
+
+import numpy as np
+import pandas as pd
+
+from neighborhoods.postal import NOT_ASSIGNED
+from neighborhoods.spatial import SpatialIndex
+
+#Toronto, roughly
+SOUTH, WEST, NORTH, EAST = 43.58, -79.62, 43.86, -79.12
+
+CATEGORIES = ['Chinese Restaurant', 'Caribbean Restaurant', 'Restaurant', 'Pizza Place',
+              'Indian Restaurant', 'Fast Food Restaurant', 'Sushi Restaurant', 'Coffee Shop',
+              'Italian Restaurant', 'Thai Restaurant', 'Park', 'Grocery Store']
+
+
+def postal_code(i, letter='M'):
+    """The postal code of row ``i``; about three rows share each code."""
+    return '%s%d%s%d' % (letter, i // 3 % 10, string.ascii_uppercase[i // 30 % 26], i // 780)
+
+
+def postal_table(rows, seed=0, boroughs=20, letter='M'):
+    """Return the HTML of a ``wikitable sortable`` postal code table.
+
+    Like the real table, all rows of a postal code are in the same borough,
+    so the cleaned table has one row per postal code.
+    """
+    rng = random.Random(seed)
+    names = ['Borough %d' % i for i in range(boroughs)] + [NOT_ASSIGNED]
+    parts = ['<html><body><table class="wikitable sortable"><tbody>',
+             '<tr><th>Postal Code</th><th>Borough</th><th>Neighborhood</th></tr>']
+    borough_of = {}
+    for i in range(rows):
+        code = postal_code(i, letter)
+        if code not in borough_of:
+            borough_of[code] = rng.choice(names)
+        borough = borough_of[code]
+        neighborhood = NOT_ASSIGNED if rng.random() < 0.05 else 'Neighborhood %d' % i
+        parts.append('<tr><td>%s</td><td>%s</td><td>%s\n</td></tr>'
+                     % (code, borough, neighborhood))
+    parts.append('</tbody></table></body></html>')
+    return ''.join(parts)
+
+
+def postal_pages(rows, letters, seed=0):
+    """One ``postal_table`` of ``rows`` rows per FSA letter, as ``{letter: html}``."""
+    return {letter: postal_table(rows, seed + i, letter=letter)
+            for i, letter in enumerate(letters)}
+
+
+def coordinates_frame(rows, seed=0, letters='M'):
+    """The ``Geospatial_Coordinates.csv`` of the codes of ``postal_table(rows)``
+    (of every page of ``postal_pages(rows, letters)``)."""
+    codes = pd.unique(pd.Series([postal_code(i, letter) for letter in letters
+                                 for i in range(rows)]))
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({'Postal Code': codes,
+                         'Latitude': SOUTH + rng.random(len(codes)) * (NORTH - SOUTH),
+                         'Longitude': WEST + rng.random(len(codes)) * (EAST - WEST)})
+
+
+def search_venues(count, seed=0):
+    """Return ``count`` venues shaped like the ``venues/search`` response."""
+    rng = random.Random(seed)
+    venues = []
+    for i in range(count):
+        lat = 43.6 + rng.random() * 0.3
+        lng = -79.6 + rng.random() * 0.4
+        venue = _venue(i, lat, lng, None if i % 50 == 0 else rng.choice(CATEGORIES))
+        venue['location']['distance'] = rng.randrange(5000)
+        if not i % 3:
+            del venue['location']['postalCode']
+        venues.append(venue)
+    return venues
+
+
+def _venue(i, lat, lng, category):
+    location = {'address': '%d Main St' % i, 'lat': lat, 'lng': lng,
+                'labeledLatLngs': [{'label': 'display', 'lat': lat, 'lng': lng}],
+                'postalCode': 'M1B %dA%d' % (i % 10, i % 7), 'cc': 'CA', 'city': 'Toronto',
+                'state': 'ON', 'country': 'Canada',
+                'formattedAddress': ['%d Main St' % i, 'Toronto ON', 'Canada']}
+    categories = [] if category is None else [{'id': str(CATEGORIES.index(category)),
+                                               'name': category, 'pluralName': category + 's',
+                                               'shortName': category,
+                                               'icon': {'prefix': 'https://x/', 'suffix': '.png'},
+                                               'primary': True}]
+    return {'id': 'v%d' % i, 'name': 'Venue %d' % i, 'location': location,
+            'categories': categories, 'referralId': 'v-%d' % i, 'hasPerk': False,
+            'venuePage': {'id': str(i)}}
+
+
+class VenueField:
+    """Venues scattered over an area, answering explore and search queries.
+
+    Like Foursquare, a query returns at most ``limit`` venues within
+    ``radius`` meters, nearest first.  Half of the venues are clustered
+    around a few centres to give the field dense and sparse parts.
+    """
+
+    def __init__(self, latitudes, longitudes, categories):
+        self.index = SpatialIndex(latitudes, longitudes)
+        self.categories = np.asarray(categories)
+
+    def __len__(self):
+        return len(self.index)
+
+    @classmethod
+    def random(cls, count, seed=0, centres=5, spread=0.01):
+        rng = np.random.default_rng(seed)
+        dense = count // 2
+        centre_lat = SOUTH + rng.random(centres) * (NORTH - SOUTH)
+        centre_lng = WEST + rng.random(centres) * (EAST - WEST)
+        cluster = rng.integers(0, centres, size=dense)
+        lat = np.concatenate([centre_lat[cluster] + rng.normal(0, spread, dense),
+                              SOUTH + rng.random(count - dense) * (NORTH - SOUTH)])
+        lng = np.concatenate([centre_lng[cluster] + rng.normal(0, spread, dense),
+                              WEST + rng.random(count - dense) * (EAST - WEST)])
+        categories = rng.integers(0, len(CATEGORIES), size=count)
+        return cls(lat, lng, categories)
+
+    def nearest(self, lat, lng, radius, limit, query=None):
+        """Positions of the venues a request around ``(lat, lng)`` returns."""
+        hits = self.index.query_radius(lat, lng, radius)[0]
+        if query:
+            matching = [i for i, name in enumerate(CATEGORIES) if query.lower() in name.lower()]
+            hits = hits[np.isin(self.categories[hits], matching)]
+        distance = np.hypot(self.index.latitudes[hits] - lat,
+                            (self.index.longitudes[hits] - lng) * np.cos(np.radians(lat)))
+        return hits[np.argsort(distance, kind='stable')[:limit]]
+
+    def venue(self, i):
+        return _venue(int(i), float(self.index.latitudes[i]), float(self.index.longitudes[i]),
+                      CATEGORIES[self.categories[i]])
+
+    def explore(self, lat, lng, radius, limit):
+        """The ``groups[0].items`` of an explore request."""
+        return [{'venue': self.venue(i)} for i in self.nearest(lat, lng, radius, limit)]
+
+    def search(self, lat, lng, query, radius, limit):
+        """The ``venues`` of a search request."""
+        return [self.venue(i) for i in self.nearest(lat, lng, radius, limit, query)]
+
+    def frame(self, neighborhoods=100, seed=0):
+        """The venues as a ``fetch_venues`` frame over ``neighborhoods`` names."""
+        rng = np.random.default_rng(seed)
+        count = len(self)
+        names = pd.Categorical.from_codes(rng.integers(0, neighborhoods, size=count),
+                                          ['Neighborhood %d' % i for i in range(neighborhoods)])
+        return pd.DataFrame({'Borough': pd.Categorical.from_codes(
+                                 names.codes % 10, ['Borough %d' % i for i in range(10)]),
+                             'Neighborhood': names,
+                             'ID': np.array(['v%d' % i for i in range(count)], dtype=object),
+                             'Name': np.array(['Venue %d' % i for i in range(count)], dtype=object),
+                             'Category': pd.Categorical.from_codes(self.categories, CATEGORIES),
+                             'Latitude': self.index.latitudes,
+                             'Longitude': self.index.longitudes})
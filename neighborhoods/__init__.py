@@ -0,0 +1,6 @@
+"""Reusable pieces of the Battle of the Neighborhoods analysis.
+
+The notebook in ``Battle of the Neighborhoods.py`` walks through the analysis
+one cell at a time; the modules in this package hold the same steps as plain
+functions so they can be run over every borough instead of two.
+"""
@@ -0,0 +1,144 @@
+"""On-disk cache for Foursquare responses.
+
+Responses are stored in a SQLite file keyed on a hash of the normalized request
+(endpoint, coordinates, radius, limit, query and API version), so re-running
+the analysis over the same neighborhoods does not touch the network.  Entries
+expire after ``ttl`` seconds and the least recently used ones are evicted once
+the cache holds more than ``max_entries``.  Hits only note their access time in
+memory; the times are written in one batch on the next ``set``, on ``close`` or
+after ``FLUSH_INTERVAL`` seconds, so a warm run reads without writing.
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+DEFAULT_PATH = 'foursquare_cache.sqlite'
+DEFAULT_TTL = 7 * 24 * 3600 # one week, in seconds
+FLUSH_INTERVAL = 60 # seconds between writes of the access times of hits
+
+
+def cache_key(endpoint, lat, lng, radius, limit, query=None, version=None):
+    """Return the content address of a venues request.
+
+    Coordinates are rounded to six decimals (about 10 cm) so the same point
+    read from a CSV or typed by hand maps to the same entry.
+    """
+    request = {'endpoint': endpoint.strip('/'),
+               'lat': round(float(lat), 6),
+               'lng': round(float(lng), 6),
+               'radius': int(radius),
+               'limit': int(limit),
+               'query': (query or '').strip().lower(),
+               'version': str(version or '')}
+    encoded = json.dumps(request, sort_keys=True).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class ResponseCache:
+    """SQLite backed response cache with TTL and LRU eviction.
+
+    ``hits`` and ``misses`` count lookups since the cache was opened.  One
+    instance can be shared by the worker threads of ``fetch_venues``.
+    """
+
+    def __init__(self, path=DEFAULT_PATH, ttl=DEFAULT_TTL, max_entries=100000):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._accessed = {} # access times of hits not written yet, by key
+        self._flushed = time.time()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('CREATE TABLE IF NOT EXISTS responses ('
+                           'key TEXT PRIMARY KEY, body TEXT NOT NULL, '
+                           'created REAL NOT NULL, accessed REAL NOT NULL)')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS responses_accessed '
+                           'ON responses (accessed)')
+        self._conn.commit()
+        self._count = self._conn.execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        with self._lock:
+            return self._count
+
+    def close(self):
+        with self._lock:
+            self._flush()
+        self._conn.close()
+
+    def _flush(self):
+        #called with the lock held
+        if self._accessed:
+            self._conn.executemany('UPDATE responses SET accessed = ? WHERE key = ?',
+                                   [(accessed, key) for key, accessed in self._accessed.items()])
+            self._conn.commit()
+            self._accessed.clear()
+        self._flushed = time.time()
+
+    def get(self, key):
+        """Return the cached response for ``key``, or None if missing or expired."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute('SELECT body, created FROM responses WHERE key = ?',
+                                     (key,)).fetchone()
+            if row is None or (self.ttl is not None and now - row[1] > self.ttl):
+                if row is not None:
+                    self._conn.execute('DELETE FROM responses WHERE key = ?', (key,))
+                    self._conn.commit()
+                    self._accessed.pop(key, None)
+                    self._count -= 1
+                self.misses += 1
+                return None
+            self._accessed[key] = now
+            if now - self._flushed > FLUSH_INTERVAL:
+                self._flush()
+            self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, key, value):
+        """Store ``value`` under ``key`` and evict the least recently used overflow.
+
+        The eviction only runs when a new key takes the cache past
+        ``max_entries``.
+        """
+        now = time.time()
+        with self._lock:
+            self._accessed.pop(key, None)
+            self._flush()
+            exists = self._conn.execute('SELECT 1 FROM responses WHERE key = ?',
+                                        (key,)).fetchone() is not None
+            self._conn.execute('INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)',
+                               (key, json.dumps(value), now, now))
+            if not exists:
+                self._count += 1
+            if self.max_entries is not None and self._count > self.max_entries:
+                self._count -= self._conn.execute(
+                    'DELETE FROM responses WHERE key IN ('
+                    'SELECT key FROM responses ORDER BY accessed DESC '
+                    'LIMIT -1 OFFSET ?)', (self.max_entries,)).rowcount
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute('DELETE FROM responses')
+            self._conn.commit()
+            self._accessed.clear()
+            self._count = 0
+
+    def stats(self):
+        """Return the hit/miss counters and the hit rate as a dict."""
+        lookups = self.hits + self.misses
+        return {'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'entries': len(self)}
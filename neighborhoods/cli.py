@@ -0,0 +1,264 @@
+"""Command-line entry point: ``python -m neighborhoods <command>``.
+
+    python -m neighborhoods geo -o df_geo.csv
+    python -m neighborhoods fetch df_geo.csv -o venues.parquet --boroughs Scarborough
+    python -m neighborhoods analyze df_geo.csv --boroughs Scarborough Etobicoke -d results
+    python -m neighborhoods stats venues.parquet --by Borough --diversity
+    python -m neighborhoods export df_geo.csv venues.parquet -d report --by Neighborhood
+    python -m neighborhoods serve venues.parquet --df-geo df_geo.csv --port 8000
+
+Nothing is installed and nothing heavy is imported up front: pandas and
+requests load with the pipeline modules a command needs, while lxml, scipy,
+scikit-learn, pyarrow, matplotlib and folium only load in the commands (or
+with the options) that use them.  Foursquare credentials are read from
+``FOURSQUARE_CLIENT_ID`` and ``FOURSQUARE_CLIENT_SECRET``.
+"""
+import argparse
+import os
+import sys
+
+
+def read_frame(path):
+    """Read a frame from a .csv, .parquet or .arrow file."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.arrow':
+        from .store import load_frame
+
+        return load_frame(path)
+    import pandas as pd
+
+    if extension == '.parquet':
+        return pd.read_parquet(path)
+    return pd.read_csv(path)
+
+
+def write_frame(frame, path):
+    """Write ``frame`` in the format given by the extension of ``path``."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.arrow':
+        from .store import save_frame
+
+        save_frame(frame, path)
+    elif extension == '.parquet':
+        frame.to_parquet(path, index=False)
+    else:
+        frame.to_csv(path, index=False)
+
+
+def _client(args):
+    from .foursquare import FoursquareClient
+
+    cache = None
+    if args.cache:
+        from .cache import ResponseCache
+
+        cache = ResponseCache(args.cache)
+    return FoursquareClient(max_workers=args.workers, cache=cache)
+
+
+def _select(df_geo, boroughs):
+    if not boroughs:
+        return df_geo
+    missing = set(boroughs) - set(df_geo['Borough'])
+    if missing:
+        raise SystemExit('unknown borough(s): ' + ', '.join(sorted(missing)))
+    return df_geo[df_geo['Borough'].isin(boroughs)].reset_index(drop=True)
+
+
+def geo(args):
+    from .cache import ResponseCache
+    from .postal import (FSA_LETTERS, fetch_postal_page, merge_coordinates, read_coordinates,
+                         read_national, read_neighborhoods)
+
+    coordinates = read_coordinates(args.coordinates)
+    cache = ResponseCache(args.page_cache, ttl=None) if args.page_cache else None
+    try:
+        if args.html:
+            with open(args.html, encoding='utf-8') as f:
+                df_geo = merge_coordinates(read_neighborhoods(f.read()), coordinates)
+        elif args.letters in ('M', 'm'):
+            df_geo = merge_coordinates(read_neighborhoods(fetch_postal_page(cache=cache)),
+                                       coordinates)
+        else:
+            letters = FSA_LETTERS if args.letters == 'all' else args.letters.upper()
+            df_geo = read_national(coordinates, letters, cache=cache)
+    finally:
+        if cache is not None:
+            cache.close()
+    write_frame(df_geo, args.output)
+    print('{} postal codes written to {}'.format(len(df_geo), args.output))
+
+
+def fetch(args):
+    df_geo = _select(read_frame(args.df_geo), args.boroughs)
+    with _client(args) as client:
+        if args.coverage:
+            from .coverage import explore_coverage
+
+            venues = explore_coverage(df_geo, client, radius=args.radius,
+                                      limit=args.limit)['venues']
+        else:
+            from .foursquare import fetch_venues
+
+            venues = fetch_venues(df_geo, client, args.radius, args.limit)
+    write_frame(venues, args.output)
+    print('{} venues written to {}'.format(len(venues), args.output))
+
+
+def analyze(args):
+    from .pipeline import analyze_boroughs
+
+    df_geo = read_frame(args.df_geo)
+    _select(df_geo, args.boroughs)
+    with _client(args) as client:
+        results = analyze_boroughs(df_geo, args.boroughs or None, client,
+                                   search_query=args.query, radius=args.radius,
+                                   limit=args.limit, category=args.category)
+    os.makedirs(args.output_dir, exist_ok=True)
+    for name, frame in results.items():
+        write_frame(frame, os.path.join(args.output_dir, name + '.csv'))
+    restaurants = results['restaurants']
+    if not restaurants.empty:
+        print(restaurants.groupby('Borough', observed=True).size().to_string())
+    if args.map and not restaurants.empty:
+        from .maps import venue_map
+
+        path = os.path.join(args.output_dir, 'restaurants.html')
+        venue_map(restaurants['Latitude'], restaurants['Longitude'],
+                  restaurants['Name'].tolist(), mode='geojson').save(path)
+    print('results written to {}'.format(args.output_dir))
+
+
+def stats(args):
+    venues = read_frame(args.venues)
+    if args.diversity:
+        from .diversity import compare_diversity
+
+        print(compare_diversity(venues, by=args.by, replicates=args.replicates).to_string())
+        return
+    counts = venues.groupby([args.by, 'Category'], observed=True).size()
+    counts = counts.sort_values(ascending=False, kind='stable')
+    print(counts.groupby(level=0, observed=True).head(args.top).sort_index(
+        level=0, sort_remaining=False).to_string())
+
+
+def export(args):
+    from .export import export as export_artifacts, report_artifacts
+
+    artifacts = report_artifacts(read_frame(args.df_geo), read_frame(args.venues), by=args.by,
+                                 top=args.top)
+    result = export_artifacts(artifacts, args.output_dir, args.workers, args.force)
+    print(result['status'].value_counts().to_string())
+
+
+def serve(args):
+    from .service import QueryService, make_server
+
+    df_geo = read_frame(args.df_geo) if args.df_geo else None
+    server = make_server(QueryService(read_frame(args.venues), df_geo), args.host, args.port)
+    print('serving on http://{}:{}/'.format(*server.server_address[:2]))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m neighborhoods',
+                                     description='Battle of the Neighborhoods analysis.')
+    parser.add_argument('--profile', metavar='JSON',
+                        help='write per-stage timings to this file')
+    parser.add_argument('--trace', metavar='JSON',
+                        help='write a Chrome trace of the run to this file')
+    parser.add_argument('--trace-memory', action='store_true',
+                        help='also record the peak memory of every top-level stage '
+                             '(with --profile or --trace)')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    sub = commands.add_parser('geo', help='build df_geo from the Wikipedia postal code table')
+    sub.add_argument('-o', '--output', default='df_geo.csv')
+    sub.add_argument('--html', help='read the postal code page from this file')
+    sub.add_argument('--coordinates', default='Geospatial_Coordinates.csv')
+    sub.add_argument('--letters', default='M',
+                     help="FSA letters to fetch, e.g. 'KLM', or 'all' (default: M, Toronto)")
+    sub.add_argument('--page-cache', default='wikipedia_cache.sqlite',
+                     help="cache of the Wikipedia pages ('' to disable)")
+    sub.set_defaults(run=geo)
+
+    foursquare = argparse.ArgumentParser(add_help=False)
+    foursquare.add_argument('--boroughs', nargs='+', metavar='BOROUGH')
+    foursquare.add_argument('--radius', type=int, default=5000)
+    foursquare.add_argument('--limit', type=int, default=100)
+    foursquare.add_argument('--workers', type=int, default=8)
+    foursquare.add_argument('--cache', default='foursquare_cache.sqlite',
+                            help="response cache file ('' to disable)")
+
+    sub = commands.add_parser('fetch', parents=[foursquare],
+                              help='explore the venues around the neighborhoods of df_geo')
+    sub.add_argument('df_geo')
+    sub.add_argument('-o', '--output', default='venues.csv')
+    sub.add_argument('--coverage', action='store_true',
+                     help='explore with the adaptive coverage planner')
+    sub.set_defaults(run=fetch)
+
+    sub = commands.add_parser('analyze', parents=[foursquare],
+                              help='run the borough analysis of section 3.7')
+    sub.add_argument('df_geo')
+    sub.add_argument('-d', '--output-dir', default='results')
+    sub.add_argument('--query', default='Restaurant')
+    sub.add_argument('--category', default='Restaurant')
+    sub.add_argument('--map', action='store_true', help='also write a map of the restaurants')
+    sub.set_defaults(run=analyze)
+
+    sub = commands.add_parser('stats', help='summarize a venues file')
+    sub.add_argument('venues')
+    sub.add_argument('--by', default='Borough')
+    sub.add_argument('--top', type=int, default=10)
+    sub.add_argument('--diversity', action='store_true',
+                     help='compare cuisine diversity with bootstrap intervals')
+    sub.add_argument('--replicates', type=int, default=1000)
+    sub.set_defaults(run=stats)
+
+    sub = commands.add_parser('export', help='render the charts and maps of the report')
+    sub.add_argument('df_geo')
+    sub.add_argument('venues')
+    sub.add_argument('-d', '--output-dir', default='report')
+    sub.add_argument('--by', default='Borough')
+    sub.add_argument('--top', type=int, help='only chart the most common categories')
+    sub.add_argument('--workers', type=int, help='processes (default: one per CPU)')
+    sub.add_argument('--force', action='store_true', help='render unchanged artifacts too')
+    sub.set_defaults(run=export)
+
+    sub = commands.add_parser('serve', help='answer count and top-N queries over HTTP')
+    sub.add_argument('venues')
+    sub.add_argument('--df-geo', help='neighborhood centres, for /within queries')
+    sub.add_argument('--host', default='127.0.0.1')
+    sub.add_argument('--port', type=int, default=8000)
+    sub.set_defaults(run=serve)
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.trace_memory and not (args.profile or args.trace):
+        parser.error('--trace-memory needs --profile or --trace')
+    if args.profile or args.trace:
+        from .profiling import profiler
+
+        profiler.enable(trace_memory=args.trace_memory)
+    try:
+        args.run(args)
+    finally:
+        if args.profile or args.trace:
+            if args.profile:
+                profiler.export_json(args.profile)
+            if args.trace:
+                profiler.export_chrome_trace(args.trace)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,93 @@
+"""Clustering neighborhoods by their venue profiles (week 3, part 3).
+
+The notebook fits a ``KMeans`` with a fixed k on the dense ``toronto_grouped``
+frame.  Here ``MiniBatchKMeans`` runs on the sparse frequencies of a
+``features.CategoryMatrix``, candidate values of k are scored in parallel on
+a process pool, and the centroids of one run can seed the next so that
+re-clustering after a refresh converges in a few batches.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.metrics import silhouette_score
+
+CENTROIDS_PATH = 'centroids.npz'
+
+
+def cluster_neighborhoods(matrix, k=5, init=None, random_state=0, batch_size=1024):
+    """Fit ``MiniBatchKMeans`` to the category frequencies of ``matrix``.
+
+    ``init`` may be an array of starting centroids (see ``load_centroids``);
+    when it is given a single initialisation is run from it.
+    """
+    if init is None:
+        model = MiniBatchKMeans(n_clusters=k, random_state=random_state,
+                                batch_size=batch_size, n_init=3)
+    else:
+        init = np.asarray(init, dtype=float)
+        model = MiniBatchKMeans(n_clusters=len(init), init=init, random_state=random_state,
+                                batch_size=batch_size, n_init=1)
+    return model.fit(matrix.frequencies())
+
+
+def cluster_labels(matrix, model):
+    """Return a Neighborhood / Cluster Labels frame for a fitted model."""
+    return pd.DataFrame({'Neighborhood': matrix.index.to_numpy(),
+                         'Cluster Labels': model.labels_})
+
+
+def _score_k(args):
+    values, k, random_state, batch_size, sample_size = args
+    model = MiniBatchKMeans(n_clusters=k, random_state=random_state,
+                            batch_size=batch_size, n_init=3).fit(values)
+    if len(set(model.labels_)) > 1:
+        silhouette = silhouette_score(values, model.labels_, sample_size=sample_size,
+                                      random_state=random_state)
+    else:
+        silhouette = np.nan
+    return k, model.inertia_, silhouette
+
+
+def sweep_k(matrix, ks=range(2, 11), max_workers=None, random_state=0, batch_size=1024,
+            sample_size=10000):
+    """Score a clustering for every k in ``ks`` across a process pool.
+
+    Returns a frame with k, inertia and silhouette columns.  The silhouette is
+    computed on at most ``sample_size`` rows, as it is quadratic in the number
+    of rows.
+    """
+    values = matrix.frequencies()
+    ks = [k for k in ks if k < values.shape[0]]
+    sample_size = sample_size if sample_size and sample_size < values.shape[0] else None
+    jobs = [(values, k, random_state, batch_size, sample_size) for k in ks]
+    if max_workers is None:
+        max_workers = min(len(jobs), os.cpu_count() or 1) or 1
+    if max_workers == 1:
+        scores = list(map(_score_k, jobs))
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            scores = list(executor.map(_score_k, jobs))
+    return pd.DataFrame(scores, columns=['k', 'inertia', 'silhouette'])
+
+
+def save_centroids(model, matrix, path=CENTROIDS_PATH):
+    """Store the centroids of ``model`` with the category names they refer to."""
+    np.savez(path, centroids=model.cluster_centers_,
+             columns=matrix.columns.to_numpy(dtype=str))
+
+
+def load_centroids(matrix, path=CENTROIDS_PATH):
+    """Return stored centroids aligned to the categories of ``matrix``.
+
+    Categories that are new since the centroids were saved start at 0 and
+    categories that disappeared are dropped.  Returns None if nothing was
+    stored yet.
+    """
+    if not os.path.exists(path):
+        return None
+    with np.load(path) as stored:
+        centroids = pd.DataFrame(stored['centroids'], columns=stored['columns'])
+    return centroids.reindex(columns=matrix.columns.to_numpy(dtype=str), fill_value=0.0).to_numpy()
@@ -0,0 +1,98 @@
+"""Columnar accumulation of venue rows.
+
+The notebook grows its ``venues`` frame with ``DataFrame.append`` once per
+restaurant, copying the whole frame every time (and ``append`` is gone from
+pandas 2).  ``VenueCollector`` keeps one growing array per column instead and
+builds the frame once at the end, so collecting venues for thousands of
+neighborhoods costs time and memory linear in the number of venues.
+"""
+from array import array
+
+import numpy as np
+import pandas as pd
+
+COLUMNS = ['PostalCode', 'Borough', 'Neighborhood', 'ID', 'Name', 'Category', 'Latitude',
+           'Longitude']
+
+
+class _Codes:
+    """Integer codes for a categorical column, categories in order of first use."""
+
+    def __init__(self):
+        self.lookup = {}
+        self.categories = []
+        self.codes = array('l')
+
+    def code(self, value):
+        if value is None:
+            return -1
+        code = self.lookup.get(value)
+        if code is None:
+            code = self.lookup[value] = len(self.categories)
+            self.categories.append(value)
+        return code
+
+    def to_categorical(self):
+        codes = np.frombuffer(self.codes, dtype=self.codes.typecode) if len(self.codes) else []
+        return pd.Categorical.from_codes(codes, categories=self.categories)
+
+
+class VenueCollector:
+    """Collect venues per neighborhood and materialize them as one frame.
+
+    ``add`` takes the ``[id, name, category, lat, lng]`` rows of one
+    neighborhood (as returned by ``foursquare.venue_rows``); ``to_frame``
+    returns a frame with PostalCode, Borough, Neighborhood, ID, Name,
+    Category, Latitude and Longitude columns where PostalCode, Borough,
+    Neighborhood and Category use the ``category`` dtype (a missing value is
+    stored as NaN).
+    """
+
+    def __init__(self):
+        self._postal_code = _Codes()
+        self._borough = _Codes()
+        self._neighborhood = _Codes()
+        self._category = _Codes()
+        self._ids = []
+        self._names = []
+        self._latitudes = array('d')
+        self._longitudes = array('d')
+
+    def __len__(self):
+        return len(self._ids)
+
+    def add(self, borough, neighborhood, venues, postal_code=None):
+        """Add the venue rows found for one neighborhood."""
+        postal_code_code = self._postal_code.code(postal_code)
+        borough_code = self._borough.code(borough)
+        neighborhood_code = self._neighborhood.code(neighborhood)
+        category_code = self._category.code
+        count = 0
+        for venue_id, name, category, lat, lng in venues:
+            self._ids.append(venue_id)
+            self._names.append(name)
+            self._category.codes.append(category_code(category))
+            self._latitudes.append(lat)
+            self._longitudes.append(lng)
+            count += 1
+        self._postal_code.codes.extend([postal_code_code] * count)
+        self._borough.codes.extend([borough_code] * count)
+        self._neighborhood.codes.extend([neighborhood_code] * count)
+
+    def add_row(self, borough, neighborhood, venue_id, name, category=None,
+                latitude=np.nan, longitude=np.nan, postal_code=None):
+        """Add a single venue."""
+        self.add(borough, neighborhood, [(venue_id, name, category, latitude, longitude)],
+                 postal_code)
+
+    def to_frame(self):
+        """Build the collected venues into a DataFrame."""
+        return pd.DataFrame({'PostalCode': self._postal_code.to_categorical(),
+                             'Borough': self._borough.to_categorical(),
+                             'Neighborhood': self._neighborhood.to_categorical(),
+                             'ID': np.array(self._ids, dtype=object),
+                             'Name': np.array(self._names, dtype=object),
+                             'Category': self._category.to_categorical(),
+                             'Latitude': np.array(self._latitudes, dtype=float),
+                             'Longitude': np.array(self._longitudes, dtype=float)},
+                            columns=COLUMNS)
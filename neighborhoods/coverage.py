@@ -0,0 +1,190 @@
+"""Covering an area with as few explore requests as possible.
+
+The notebook explores a 5 km circle around every neighborhood centroid, so
+neighborhoods a kilometre or two apart ask for mostly the same venues, while
+an explore request that comes back with ``limit`` items has silently dropped
+the rest.  Here the area around ``df_geo`` is tiled with square cells, each
+explored through the circle that circumscribes it, or, when that takes fewer
+requests, the centroid circles are explored first and only the area around
+those that saturated is tiled.  A cell whose response saturates the limit is
+split into four and its quarters are explored in turn (a quadtree), down to
+``min_radius``.  Venues are kept once per ID as the responses arrive.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from .foursquare import LIMIT, RADIUS, VENUE_COLUMNS, FoursquareClient, venue_rows
+from .profiling import timed
+from .spatial import EARTH_RADIUS, SpatialIndex, assign_nearest, haversine
+
+MARGIN = 1000 # meters around the neighborhood centroids that must be covered
+MIN_RADIUS = 250 # smallest query circle, in meters
+
+PLAN_COLUMNS = ['Latitude', 'Longitude', 'Radius', 'Depth']
+
+#meters per degree of latitude
+METERS_PER_DEGREE = np.pi * EARTH_RADIUS / 180
+
+
+def bounding_box(df_geo, margin=MARGIN):
+    """Return ``(south, west, north, east)`` around ``df_geo`` plus ``margin`` meters."""
+    lat = df_geo['Latitude'].to_numpy(dtype=float)
+    lng = df_geo['Longitude'].to_numpy(dtype=float)
+    pad_lat = margin / METERS_PER_DEGREE
+    pad_lng = pad_lat / np.cos(np.radians(np.abs(lat).max()))
+    return (lat.min() - pad_lat, lng.min() - pad_lng, lat.max() + pad_lat, lng.max() + pad_lng)
+
+
+def cell_circle(cell):
+    """Return the ``(latitude, longitude, radius)`` circle around a cell."""
+    south, west, north, east = cell
+    lat, lng = (south + north) / 2, (west + east) / 2
+    radius = haversine(lat, lng, np.array([south, north]), np.array([west, east])).max()
+    return lat, lng, float(np.ceil(radius))
+
+
+def split_cell(cell):
+    """Return the four quarters of a cell."""
+    south, west, north, east = cell
+    lat, lng = (south + north) / 2, (west + east) / 2
+    return [(south, west, lat, lng), (south, lng, lat, east),
+            (lat, west, north, lng), (lat, lng, north, east)]
+
+
+def grid_cells(area, radius=RADIUS):
+    """Tile ``area`` with the fewest equal cells whose circles fit in ``radius``."""
+    south, west, north, east = area
+    #a square of side radius * sqrt(2) has a circumradius of radius
+    side = radius * np.sqrt(2) / METERS_PER_DEGREE
+    rows = max(1, int(np.ceil((north - south) / side)))
+    cols = max(1, int(np.ceil((east - west) / (side / np.cos(np.radians(max(abs(south),
+                                                                             abs(north))))))))
+    lats = np.linspace(south, north, rows + 1)
+    lngs = np.linspace(west, east, cols + 1)
+    return [(lats[i], lngs[j], lats[i + 1], lngs[j + 1])
+            for i in range(rows) for j in range(cols)]
+
+
+def plan_coverage(df_geo, area=None, radius=RADIUS, margin=MARGIN):
+    """Return the initial query circles covering the neighborhoods of ``df_geo``.
+
+    ``area`` is a ``(south, west, north, east)`` box and defaults to the
+    bounding box of ``df_geo``.  Of the grid over it only the cells that come
+    within ``margin`` meters of a neighborhood centroid are kept.  The result
+    has one row per circle (see ``PLAN_COLUMNS``) and a ``cells`` attribute
+    with the matching cells.
+    """
+    if area is None:
+        area = bounding_box(df_geo, margin)
+    cells = grid_cells(area, radius)
+    circles = np.array([cell_circle(cell) for cell in cells]).reshape(-1, 3)
+    keep = near_centroids(circles, SpatialIndex.from_frame(df_geo), margin)
+    plan = pd.DataFrame(circles[keep], columns=PLAN_COLUMNS[:3])
+    plan['Depth'] = 0
+    plan.attrs['cells'] = [cell for cell, kept in zip(cells, keep) if kept]
+    return plan
+
+
+def near_centroids(circles, index, margin=MARGIN):
+    """Mask of the ``(latitude, longitude, radius)`` circles within ``margin`` of ``index``."""
+    circles = np.asarray(circles, dtype=float).reshape(-1, 3)
+    distance, _ = index.nearest(circles[:, 0], circles[:, 1])
+    return distance <= circles[:, 2] + margin
+
+
+def refine_cells(df_geo, saturated, area=None, radius=RADIUS, margin=MARGIN):
+    """Return the cells to explore around the centroids whose circle saturated.
+
+    ``saturated`` marks the rows of ``df_geo`` whose ``radius`` circle came
+    back with ``limit`` items.  The grid of half that radius is kept within
+    ``margin`` meters of those centroids, less the cells that already lie
+    inside the circle of a centroid that did not saturate, as every venue
+    there has been returned.
+    """
+    saturated = np.asarray(saturated, dtype=bool)
+    if not saturated.any():
+        return []
+    if area is None:
+        area = bounding_box(df_geo, margin)
+    cells = plan_coverage(df_geo[saturated], area, radius / 2, margin).attrs['cells']
+    if saturated.all() or not cells:
+        return cells
+    circles = np.array([cell_circle(cell) for cell in cells])
+    distance, _ = SpatialIndex.from_frame(df_geo[~saturated]).nearest(circles[:, 0],
+                                                                      circles[:, 1])
+    return [cell for cell, covered in zip(cells, distance + circles[:, 2] <= radius)
+            if not covered]
+
+
+@timed('explore_coverage')
+def explore_coverage(df_geo, client=None, area=None, radius=RADIUS, limit=LIMIT,
+                     margin=MARGIN, min_radius=MIN_RADIUS):
+    """Explore the area around ``df_geo``, splitting the saturated queries.
+
+    The first round is whichever is smaller of the cells of ``plan_coverage``
+    and the ``radius`` circles around the neighborhood centroids, so where
+    nothing saturates no more requests are made than by ``fetch_venues``.
+    Around the centroids whose circle saturated, the cells of
+    ``refine_cells`` are explored next.  Each round is requested concurrently
+    over ``client``; a cell whose response has ``limit`` items is split into
+    quarters for the next round unless its circle is already smaller than
+    ``min_radius``; quarters farther than ``margin`` from every centroid are
+    dropped.  Returns a dict with
+
+    * ``venues``: one row per venue ID, assigned to its nearest neighborhood
+      (see ``spatial.assign_nearest``);
+    * ``queries``: every request made, with its circle, depth, the number of
+      items returned and whether it saturated.
+    """
+    own_client = client is None
+    if own_client:
+        client = FoursquareClient()
+    rows, seen, queries = [], set(), []
+
+    def explore(executor, circles, depths):
+        responses = executor.map(
+            lambda circle: client.explore(circle[0], circle[1], int(circle[2]), limit), circles)
+        saturated = []
+        for circle, depth, items in zip(circles, depths, responses):
+            saturated.append(len(items) >= limit)
+            queries.append(tuple(circle) + (depth, len(items), saturated[-1]))
+            for row in venue_rows(items):
+                if row[0] not in seen:
+                    seen.add(row[0])
+                    rows.append(row)
+        return saturated
+
+    plan = plan_coverage(df_geo, area, radius, margin)
+    index = SpatialIndex.from_frame(df_geo)
+    try:
+        with ThreadPoolExecutor(max_workers=client.max_workers) as executor:
+            if len(plan) < len(df_geo):
+                cells = [(cell, 0) for cell in plan.attrs['cells']]
+            else:
+                centroids = [(lat, lng, float(radius)) for lat, lng
+                             in zip(df_geo['Latitude'], df_geo['Longitude'])]
+                saturated = explore(executor, centroids, [0] * len(centroids))
+                cells = [(cell, 1) for cell
+                         in refine_cells(df_geo, saturated, area, radius, margin)]
+            while cells:
+                circles = [cell_circle(cell) for cell, _ in cells]
+                saturated = explore(executor, circles, [depth for _, depth in cells])
+                cells = [(quarter, depth + 1)
+                         for (cell, depth), circle, full in zip(cells, circles, saturated)
+                         if full and circle[2] / 2 >= min_radius
+                         for quarter in split_cell(cell)]
+                if cells:
+                    keep = near_centroids([cell_circle(cell) for cell, _ in cells], index,
+                                          margin)
+                    cells = [cell for cell, kept in zip(cells, keep) if kept]
+    finally:
+        if own_client:
+            client.close()
+
+    venues = assign_nearest(pd.DataFrame(rows, columns=VENUE_COLUMNS), df_geo)
+    columns = [column for column in ['PostalCode', 'Borough', 'Neighborhood'] if column in venues]
+    venues = venues[columns + VENUE_COLUMNS + ['Distance']].reset_index(drop=True)
+    queries = pd.DataFrame(queries, columns=PLAN_COLUMNS + ['Items', 'Saturated'])
+    return {'venues': venues, 'queries': queries}
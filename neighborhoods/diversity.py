@@ -0,0 +1,110 @@
+"""Cuisine diversity of boroughs and neighborhoods.
+
+The notebook concludes that Etobicoke is the more diverse borough from the
+bar charts of restaurant counts per category.  The functions here put numbers
+on that: richness (number of cuisines), Shannon entropy and the Gini-Simpson
+index for every row of a ``features.CategoryMatrix`` at once, with bootstrap
+confidence intervals drawn as batched multinomial resamples.
+"""
+import numpy as np
+import pandas as pd
+
+from .features import CategoryMatrix
+from .taxonomy import EXCLUDED_CATEGORIES, exclude, is_excluded
+
+#resampled counts held in memory at once by bootstrap_diversity
+BOOTSTRAP_BATCH = 5000000
+
+
+def exclude_categories(venues, excluded=EXCLUDED_CATEGORIES, column='Category'):
+    """Drop the venues whose ``column`` is one of ``excluded`` (``taxonomy.exclude``)."""
+    return exclude(venues, excluded, column=column)
+
+
+def _padded_rows(counts):
+    """Lay the non-zeros of each CSR row out in a (rows x widest row) array."""
+    rows = counts.shape[0]
+    lengths = np.diff(counts.indptr)
+    width = int(lengths.max()) if rows and counts.nnz else 0
+    padded = np.zeros((rows, width))
+    row_of = np.repeat(np.arange(rows), lengths)
+    padded[row_of, np.arange(counts.nnz) - counts.indptr[row_of]] = counts.data
+    return padded
+
+
+def _indices(counts):
+    """Richness, Shannon and Gini-Simpson along the last axis of ``counts``."""
+    totals = counts.sum(axis=-1, keepdims=True)
+    p = np.divide(counts, totals, out=np.zeros(counts.shape), where=totals > 0)
+    log_p = np.log(p, out=np.zeros(p.shape), where=p > 0)
+    richness = (counts > 0).sum(axis=-1)
+    shannon = -(p * log_p).sum(axis=-1)
+    simpson = np.where(totals[..., 0] > 0, 1.0 - (p * p).sum(axis=-1), 0.0)
+    return richness, shannon, simpson
+
+
+def diversity(matrix):
+    """Return richness, shannon, simpson and venue totals per row of ``matrix``."""
+    counts = _padded_rows(matrix.counts)
+    richness, shannon, simpson = _indices(counts)
+    return pd.DataFrame({'venues': counts.sum(axis=1).astype(np.int64),
+                         'richness': richness,
+                         'shannon': shannon,
+                         'simpson': simpson}, index=matrix.index)
+
+
+def bootstrap_diversity(matrix, replicates=1000, confidence=0.95, seed=0):
+    """Add bootstrap confidence intervals to ``diversity(matrix)``.
+
+    Every row's venues are resampled with replacement ``replicates`` times
+    (one multinomial draw per row and replicate, all rows drawn together).
+    The plug-in indices are biased downward, so a resampled index tends to
+    fall below the one it was drawn from, by about as much as the observed
+    index falls below the true one.  The percentiles of the replicates are
+    therefore reflected around the estimate (the basic bootstrap interval,
+    ``2 * estimate - percentile``) and returned in ``<index>_low`` and
+    ``<index>_high`` columns, and ``<index>_corrected`` holds the estimate
+    minus the bootstrap bias, which the interval is centred on.
+    """
+    result = diversity(matrix)
+    counts = _padded_rows(matrix.counts)
+    rows, width = counts.shape
+    totals = counts.sum(axis=1).astype(np.int64)
+    p = np.divide(counts, totals[:, None], out=np.zeros(counts.shape), where=totals[:, None] > 0)
+    if not width:
+        p = np.ones((rows, 1))
+    rng = np.random.default_rng(seed)
+    tail = (1 - confidence) / 2 * 100
+
+    names = ('richness', 'shannon', 'simpson')
+    bounds = {name: np.zeros((rows, 2)) for name in names}
+    means = {name: np.zeros(rows) for name in names}
+    step = max(1, BOOTSTRAP_BATCH // max(1, replicates * p.shape[1]))
+    for start in range(0, rows, step):
+        stop = min(rows, start + step)
+        #shape (replicates, rows in batch, width)
+        samples = rng.multinomial(totals[start:stop], p[start:stop], size=(replicates, stop - start))
+        for name, values in zip(names, _indices(samples)):
+            bounds[name][start:stop] = np.percentile(values, [tail, 100 - tail], axis=0).T
+            means[name][start:stop] = values.mean(axis=0)
+    for name in names:
+        estimate = result[name].to_numpy(dtype=float)
+        result[name + '_low'] = 2 * estimate - bounds[name][:, 1]
+        result[name + '_high'] = 2 * estimate - bounds[name][:, 0]
+        result[name + '_corrected'] = 2 * estimate - means[name]
+    return result
+
+
+def compare_diversity(venues, by='Borough', column='Category', excluded=EXCLUDED_CATEGORIES,
+                      replicates=1000, confidence=0.95, seed=0):
+    """Diversity with confidence intervals for every ``by`` group of ``venues``.
+
+    Venues in ``excluded`` categories are left out first; pass ``excluded=()``
+    to keep them.  A group left without venues stays in the result with zero
+    diversity.  Rows are sorted by Shannon entropy, most diverse first.
+    """
+    matrix = CategoryMatrix.from_venues(venues, row=by, column=column)
+    keep = np.flatnonzero(~is_excluded(matrix.columns, excluded))
+    matrix = CategoryMatrix(matrix.counts[:, keep], matrix.index, matrix.columns[keep])
+    result = bootstrap_diversity(matrix, replicates, confidence, seed)
+    return result.sort_values('shannon', ascending=False, kind='stable')
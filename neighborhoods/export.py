@@ -0,0 +1,214 @@
+"""Headless export of the report's bar charts and maps (section 3.8).
+
+The notebook draws each chart with ``plt.show()`` and leaves the maps as cell
+outputs.  Here every chart and map is an ``Artifact``: a name, the small piece
+of data it is drawn from and the template it is drawn with.  ``export``
+renders a list of them across a process pool, charts on the Agg canvas and
+maps as standalone HTML, and writes a manifest of the data hash behind every
+file so that the next export skips the artifacts whose data did not change.
+
+Each worker builds the figure of a chart template once and only swaps the bars
+and title for every chart drawn with it.
+"""
+import hashlib
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from .profiling import timed
+
+MANIFEST = 'manifest.json'
+
+#figure styling of section 3.8 (and of the neighborhood count chart of In[9])
+TEMPLATES = {
+    'neighborhoods': {'figsize': (7, 7), 'dpi': 80, 'color': 'red', 'horizontal': False,
+                      'xlabel': 'Boroughs', 'ylabel': 'Number of Neighborhoods',
+                      'fontsize': 15},
+    'cuisines': {'figsize': (10, 6), 'dpi': 80, 'color': 'red', 'horizontal': True,
+                 'xlabel': 'Number of Resturants', 'ylabel': 'Types of Restaurants',
+                 'fontsize': 10},
+}
+
+#figures already built in this process, by template name
+_figures = {}
+
+
+class Artifact:
+    """One chart or map of the report.
+
+    ``kind`` is 'chart' or 'map'.  A chart's ``data`` is a Series of bar
+    values indexed by label and ``options`` holds its template and title; a
+    map's ``data`` is a frame with Latitude, Longitude and Name columns and
+    ``options`` is passed on to ``maps.venue_map``, except for ``marker``, a
+    ``(latitude, longitude, label)`` centre marker.
+    """
+
+    def __init__(self, kind, name, data, **options):
+        self.kind = kind
+        self.name = name
+        self.data = data
+        self.options = options
+
+    @property
+    def filename(self):
+        return slugify(self.name) + ('.png' if self.kind == 'chart' else '.html')
+
+    def digest(self):
+        """Hash of the data and options the artifact is drawn from."""
+        digest = hashlib.sha256(self.kind.encode('utf-8'))
+        options = dict(self.options)
+        if self.kind == 'chart':
+            options['template'] = TEMPLATES[options.get('template', 'cuisines')]
+        digest.update(json.dumps(options, sort_keys=True, default=str).encode('utf-8'))
+        digest.update(pd.util.hash_pandas_object(self.data, index=True).to_numpy().tobytes())
+        return digest.hexdigest()
+
+
+def slugify(name):
+    return re.sub(r'[^0-9A-Za-z]+', '_', name).strip('_').lower() or 'artifact'
+
+
+class _ChartFigure:
+    """A figure styled once by a template and redrawn for every chart."""
+
+    def __init__(self, template):
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+
+        self.template = template
+        self.figure = Figure(figsize=template['figsize'], dpi=template['dpi'])
+        FigureCanvasAgg(self.figure)
+        self.axes = self.figure.add_subplot()
+        self.axes.set_xlabel(template['xlabel'], fontsize=template['fontsize'])
+        self.axes.set_ylabel(template['ylabel'], fontsize=template['fontsize'])
+        self.title = self.axes.set_title('', fontsize=template['fontsize'])
+        self.bars = None
+
+    def draw(self, values, title, path):
+        if self.bars is not None:
+            self.bars.remove()
+        positions = range(len(values))
+        labels = [str(label) for label in values.index]
+        if self.template['horizontal']:
+            self.bars = self.axes.barh(positions, values.to_numpy(), color=self.template['color'])
+            self.axes.set_yticks(positions, labels)
+        else:
+            self.bars = self.axes.bar(positions, values.to_numpy(), color=self.template['color'])
+            self.axes.set_xticks(positions, labels, rotation=90)
+        self.title.set_text(title)
+        self.axes.relim()
+        self.axes.autoscale_view()
+        self.figure.tight_layout()
+        self.figure.savefig(path)
+
+
+def render(artifact, directory):
+    """Draw ``artifact`` into ``directory`` and return the file's path."""
+    path = os.path.join(directory, artifact.filename)
+    if artifact.kind == 'chart':
+        options = dict(artifact.options)
+        template = options.pop('template', 'cuisines')
+        if template not in _figures:
+            _figures[template] = _ChartFigure(TEMPLATES[template])
+        _figures[template].draw(artifact.data, options.get('title', artifact.name), path)
+    elif artifact.kind == 'map':
+        from .maps import add_centre_marker, venue_map
+
+        options = dict(artifact.options)
+        marker = options.pop('marker', None)
+        options.setdefault('mode', 'geojson')
+        frame = artifact.data
+        map_ = venue_map(frame['Latitude'], frame['Longitude'], frame['Name'].tolist(),
+                         **options)
+        if marker is not None:
+            add_centre_marker(map_, *marker)
+        map_.save(path)
+    else:
+        raise ValueError('unknown artifact kind {!r}'.format(artifact.kind))
+    return path
+
+
+def _render_all(args):
+    artifacts, directory = args
+    return [render(artifact, directory) for artifact in artifacts]
+
+
+@timed('export')
+def export(artifacts, directory, max_workers=None, force=False, batch_size=16):
+    """Render ``artifacts`` into ``directory`` on a process pool.
+
+    Artifacts whose file exists and whose ``digest`` matches the manifest of
+    the previous export are skipped unless ``force`` is set.  Artifacts go to
+    the workers ``batch_size`` at a time, so the figure templates are reused
+    within a batch.  Returns a frame with the name, path and status
+    ('rendered' or 'unchanged') of every artifact.  Raises ValueError if two
+    artifacts would be written to the same file.
+    """
+    owners = {}
+    for artifact in artifacts:
+        other = owners.setdefault(artifact.filename, artifact)
+        if other is not artifact:
+            raise ValueError('artifacts {!r} and {!r} would both be written to {}'.format(
+                other.name, artifact.name, artifact.filename))
+    os.makedirs(directory, exist_ok=True)
+    manifest_path = os.path.join(directory, MANIFEST)
+    manifest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+
+    digests = [artifact.digest() for artifact in artifacts]
+    stale = [artifact for artifact, digest in zip(artifacts, digests)
+             if force or manifest.get(artifact.filename) != digest
+             or not os.path.exists(os.path.join(directory, artifact.filename))]
+    #charts of one template next to each other, so a batch shares its figure
+    stale.sort(key=lambda artifact: (artifact.kind, artifact.options.get('template', '')))
+    batches = [(stale[start:start + batch_size], directory)
+               for start in range(0, len(stale), batch_size)]
+    if max_workers is None:
+        max_workers = min(len(batches), os.cpu_count() or 1)
+    if max_workers <= 1:
+        list(map(_render_all, batches))
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            list(executor.map(_render_all, batches))
+
+    rendered = {artifact.filename for artifact in stale}
+    manifest.update((artifact.filename, digest) for artifact, digest in zip(artifacts, digests))
+    tmp = manifest_path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp, manifest_path)
+    return pd.DataFrame({'name': [artifact.name for artifact in artifacts],
+                         'path': [os.path.join(directory, artifact.filename)
+                                  for artifact in artifacts],
+                         'status': ['rendered' if artifact.filename in rendered else 'unchanged'
+                                    for artifact in artifacts]})
+
+
+def report_artifacts(df_geo, venues, by='Borough', column='Category', top=None):
+    """The charts and maps of the report, one pair per ``by`` group of ``venues``.
+
+    Returns the neighborhoods-per-borough chart of In[9] and, for every
+    ``by`` value, a chart of venues per ``column`` value (the ``top`` most
+    common only, if given) like In[26]/In[27] and a map of its venues like
+    In[28]/In[29].
+    """
+    artifacts = [Artifact('chart', 'Number of Neighborhoods in Toronto',
+                          df_geo.groupby('Borough')['Neighborhood'].count(),
+                          template='neighborhoods')]
+    venues = venues.dropna(subset=['Latitude', 'Longitude'])
+    for group, frame in venues.groupby(by, observed=True, sort=True):
+        counts = frame.groupby(column, observed=True).size().sort_values(kind='stable')
+        if top is not None:
+            counts = counts.iloc[-top:]
+        counts.index = counts.index.astype(str)
+        artifacts.append(Artifact('chart', 'Popular cuisines in {}'.format(group), counts,
+                                  template='cuisines'))
+        points = frame[['Latitude', 'Longitude', 'Name']].reset_index(drop=True)
+        points['Name'] = points['Name'].astype(str)
+        artifacts.append(Artifact('map', '{} map'.format(group), points))
+    return artifacts
@@ -0,0 +1,137 @@
+"""Neighborhood x venue-category features (week 3, part 3).
+
+The notebook one-hot encodes every venue with ``pd.get_dummies``, averages
+the dummies per neighborhood and then sorts each neighborhood's row on its
+own to find the most common venues.  ``CategoryMatrix`` builds the same
+frequencies straight from categorical codes into a ``scipy.sparse`` matrix,
+so memory grows with the number of (neighborhood, category) pairs actually
+seen, and ``top_categories`` ranks every neighborhood at once.
+"""
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from .profiling import timed
+
+INDICATORS = ['st', 'nd', 'rd']
+
+
+class CategoryMatrix:
+    """Sparse counts of venues per row label (neighborhood) and category.
+
+    ``counts`` is a CSR matrix with one row per entry of ``index`` and one
+    column per entry of ``columns``.
+    """
+
+    def __init__(self, counts, index, columns):
+        self.counts = sparse.csr_matrix(counts)
+        self.index = pd.Index(index)
+        self.columns = pd.Index(columns)
+
+    @property
+    def shape(self):
+        return self.counts.shape
+
+    @classmethod
+    @timed('category_matrix')
+    def from_venues(cls, venues, row='Neighborhood', column='Category'):
+        """Count the venues of each ``row`` value per ``column`` value.
+
+        Rows and columns are sorted like ``groupby`` and ``get_dummies`` sort
+        them; venues missing either value are ignored.
+        """
+        rows = pd.Categorical(venues[row])
+        columns = pd.Categorical(venues[column])
+        rows = rows.remove_unused_categories()
+        columns = columns.remove_unused_categories()
+        keep = (rows.codes >= 0) & (columns.codes >= 0)
+        counts = sparse.coo_matrix((np.ones(keep.sum(), dtype=np.int64),
+                                    (rows.codes[keep], columns.codes[keep])),
+                                   shape=(len(rows.categories), len(columns.categories)))
+        return cls(counts.tocsr(), rows.categories, columns.categories)
+
+    def row_totals(self):
+        return np.asarray(self.counts.sum(axis=1)).ravel()
+
+    def frequencies(self):
+        """Return each row's counts divided by its total (``toronto_grouped``)."""
+        totals = self.row_totals().astype(float)
+        totals[totals == 0] = 1.0
+        return sparse.diags(1.0 / totals) @ self.counts
+
+    def to_frame(self, normalize=True):
+        """Return the matrix as a sparse DataFrame indexed by row label."""
+        values = self.frequencies() if normalize else self.counts
+        frame = pd.DataFrame.sparse.from_spmatrix(values, index=self.index, columns=self.columns)
+        #some pandas versions leave the implicit entries as NaN rather than 0
+        return frame.fillna(0)
+
+
+def top_categories(matrix, n=10):
+    """Return the ``n`` most common categories of every row of ``matrix``.
+
+    The non-zero entries of each row are laid out in a (rows x widest row)
+    array and the ``n``-th largest value of every row is found with one
+    ``partition`` over all rows.  Entries above it are kept, and of those
+    equal to it only the leftmost, so ties are broken by column order exactly
+    as a stable sort would.  Rows with fewer than ``n`` categories are padded
+    with None.  Returns ``(labels, values)`` arrays of shape (rows, n).
+    """
+    counts = matrix.counts
+    if not counts.has_sorted_indices:
+        counts = counts.sorted_indices()
+    rows = counts.shape[0]
+    lengths = np.diff(counts.indptr)
+    width = int(lengths.max()) if rows and counts.nnz else 0
+    k = min(n, width)
+
+    values = np.full((rows, width), -np.inf)
+    columns = np.full((rows, width), -1, dtype=np.int64)
+    row_of = np.repeat(np.arange(rows), lengths)
+    position = np.arange(counts.nnz) - counts.indptr[row_of]
+    values[row_of, position] = counts.data
+    columns[row_of, position] = counts.indices
+
+    labels = np.full((rows, n), None, dtype=object)
+    top_values = np.zeros((rows, n))
+    if k:
+        threshold = -np.partition(-values, k - 1, axis=1)[:, k - 1:k]
+        above = values > threshold
+        tied = values == threshold
+        #of the entries tied at the threshold, the leftmost ones fill the k slots
+        tied &= np.cumsum(tied, axis=1) <= k - above.sum(axis=1, keepdims=True)
+        best = np.nonzero(above | tied)[1].reshape(rows, k)
+        best_values = np.take_along_axis(values, best, axis=1)
+        best_columns = np.take_along_axis(columns, best, axis=1)
+        #order the k survivors by value, then by column
+        order = _row_lexsort(best_columns, -best_values)
+        best_values = np.take_along_axis(best_values, order, axis=1)
+        best_columns = np.take_along_axis(best_columns, order, axis=1)
+        found = best_columns >= 0
+        names = matrix.columns.to_numpy(dtype=object)
+        labels[:, :k] = np.where(found, names[np.where(found, best_columns, 0)], None)
+        top_values[:, :k] = np.where(found, best_values, 0)
+    return labels, top_values
+
+
+def _row_lexsort(secondary, primary):
+    """Per-row argsort by ``primary`` then ``secondary``."""
+    order = np.argsort(secondary, axis=1, kind='stable')
+    primary = np.take_along_axis(primary, order, axis=1)
+    return np.take_along_axis(order, np.argsort(primary, axis=1, kind='stable'), axis=1)
+
+
+def most_common_venues(matrix, n=10):
+    """The ``neighborhoods_venues_sorted`` frame of the notebook.
+
+    One row per neighborhood with '1st Most Common Venue', '2nd Most Common
+    Venue', ... columns.
+    """
+    labels, _ = top_categories(matrix, n)
+    columns = ['Neighborhood']
+    for ind in range(n):
+        suffix = INDICATORS[ind] if ind < len(INDICATORS) else 'th'
+        columns.append('{}{} Most Common Venue'.format(ind + 1, suffix))
+    frame = pd.DataFrame(labels, columns=columns[1:])
+    frame.insert(0, 'Neighborhood', matrix.index.to_numpy())
+    return frame
@@ -0,0 +1,208 @@
+"""Foursquare API access for the neighborhood venue searches.
+
+``get_venues`` is the function from section 3.6 of the notebook.  It is kept
+for one-off lookups; ``fetch_venues`` runs the same explore request for every
+neighborhood of a borough (or of all of ``df_geo``) at once, sharing one pooled
+HTTP session between the requests.
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+
+from .cache import cache_key
+from .collector import VenueCollector
+from .profiling import record_http, timed
+
+API_URL = 'https://api.foursquare.com/v2/venues/'
+VERSION = '20180604' # Foursquare API version
+RADIUS = 5000 # in meters
+LIMIT = 100
+
+#status codes worth retrying: rate limiting and temporary server errors
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+NAN = float('nan')
+
+VENUE_COLUMNS = ['ID', 'Name', 'Category', 'Latitude', 'Longitude']
+
+
+class FoursquareClient:
+    """Pooled HTTP client for the Foursquare ``venues`` endpoints.
+
+    Credentials default to the ``FOURSQUARE_CLIENT_ID`` and
+    ``FOURSQUARE_CLIENT_SECRET`` environment variables.  ``max_workers`` sets
+    both the number of requests in flight and the size of the connection pool;
+    the limit holds across threads, so callers running ``fetch_venues`` on
+    several threads at once still share ``max_workers`` connections.
+    Rate limited (429) and 5xx responses are retried with exponential backoff,
+    honouring ``Retry-After`` when the server sends it.  Pass a
+    ``ResponseCache`` as ``cache`` to serve repeated explore and search
+    requests from disk.
+    """
+
+    def __init__(self, client_id=None, client_secret=None, version=VERSION,
+                 base_url=API_URL, max_workers=8, timeout=10, max_retries=3,
+                 backoff=1.0, session=None, cache=None):
+        self.client_id = client_id or os.environ.get('FOURSQUARE_CLIENT_ID', '')
+        self.client_secret = client_secret or os.environ.get('FOURSQUARE_CLIENT_SECRET', '')
+        self.version = version
+        self.base_url = base_url
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.session = session or make_session(max_workers)
+        self.cache = cache
+        self._slots = threading.BoundedSemaphore(max_workers)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.session.close()
+
+    def get(self, endpoint, **params):
+        """GET ``base_url + endpoint`` and return the decoded JSON body."""
+        query = {'client_id': self.client_id,
+                 'client_secret': self.client_secret,
+                 'v': self.version}
+        query.update(params)
+        url = self.base_url + endpoint
+        attempt = 0
+        while True:
+            start = time.perf_counter()
+            try:
+                #a slot per request in flight, released before any backoff sleep
+                with self._slots:
+                    response = self.session.get(url, params=query, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout):
+                record_http(endpoint, time.perf_counter() - start)
+                if attempt >= self.max_retries:
+                    raise
+                time.sleep(self.backoff * 2 ** attempt)
+                attempt += 1
+                continue
+            record_http(endpoint, time.perf_counter() - start, len(response.content),
+                        response.status_code)
+            if response.status_code in RETRY_STATUS and attempt < self.max_retries:
+                time.sleep(_retry_delay(response, self.backoff * 2 ** attempt))
+                attempt += 1
+                continue
+            response.raise_for_status()
+            return response.json()
+
+    def explore(self, lat, lng, radius=RADIUS, limit=LIMIT):
+        """Return the raw ``groups[0].items`` list of an explore request."""
+        results = self._cached_get('explore', lat, lng, radius, limit)
+        return results['response']['groups'][0]['items']
+
+    def search(self, lat, lng, query, radius=RADIUS, limit=LIMIT):
+        """Return the raw ``venues`` list of a search request."""
+        results = self._cached_get('search', lat, lng, radius, limit, query)
+        return results['response']['venues']
+
+    def _cached_get(self, endpoint, lat, lng, radius, limit, query=None):
+        params = {'ll': '{},{}'.format(lat, lng), 'radius': radius, 'limit': limit}
+        if query is not None:
+            params['query'] = query
+        if self.cache is None:
+            return self.get(endpoint, **params)
+        key = cache_key(endpoint, lat, lng, radius, limit, query, self.version)
+        results = self.cache.get(key)
+        if results is None:
+            results = self.get(endpoint, **params)
+            self.cache.set(key, results)
+        return results
+
+
+def make_session(pool_size=8):
+    """Return a ``requests.Session`` whose connection pool fits ``pool_size`` threads."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def _retry_delay(response, default):
+    try:
+        return float(response.headers['Retry-After'])
+    except (KeyError, ValueError):
+        return default
+
+
+def venue_rows(items):
+    """Turn explore ``items`` into ``[id, name, category, lat, lng]`` rows.
+
+    Venues without a category are skipped, as in the notebook; a venue
+    without a location gets NaN coordinates.
+    """
+    venue_list = []
+    for row in items:
+        try:
+            venue_id = row['venue']['id']
+            venue_name = row['venue']['name']
+            venue_category = row['venue']['categories'][0]['name']
+            location = row['venue'].get('location', {})
+            venue_list.append([venue_id, venue_name, venue_category,
+                               location.get('lat', NAN), location.get('lng', NAN)])
+        except (KeyError, IndexError):
+            pass
+    return venue_list
+
+
+def get_venues(lat, lng, client=None, radius=RADIUS, limit=LIMIT):
+    """Return the venues around one coordinate as a ``VENUE_COLUMNS`` frame."""
+    if client is None:
+        with FoursquareClient() as client:
+            items = client.explore(lat, lng, radius, limit)
+    else:
+        items = client.explore(lat, lng, radius, limit)
+    return pd.DataFrame(venue_rows(items), columns=VENUE_COLUMNS)
+
+
+@timed('fetch_venues')
+def fetch_venues(neighborhoods, client=None, radius=RADIUS, limit=LIMIT):
+    """Fetch the explore venues of every neighborhood concurrently.
+
+    ``neighborhoods`` is a slice of ``df_geo`` (e.g. ``Scarborough_data``) with
+    Borough, Neighborhood, Latitude and Longitude columns, and optionally
+    PostalCode.  The requests go out ``client.max_workers`` at a time and the
+    result is one frame with a row per venue, tagged with the PostalCode,
+    Borough and Neighborhood it was found from (see
+    ``VenueCollector.to_frame``).
+    """
+    own_client = client is None
+    if own_client:
+        client = FoursquareClient()
+    try:
+        coords = list(zip(neighborhoods['Latitude'], neighborhoods['Longitude']))
+
+        def explore(coord):
+            return venue_rows(client.explore(coord[0], coord[1], radius, limit))
+
+        with ThreadPoolExecutor(max_workers=client.max_workers) as executor:
+            results = list(executor.map(explore, coords))
+    finally:
+        if own_client:
+            client.close()
+
+    if 'PostalCode' in neighborhoods:
+        postal_codes = neighborhoods['PostalCode']
+    else:
+        postal_codes = [None] * len(results)
+    collector = VenueCollector()
+    for postal_code, borough, neighborhood, venue_list in zip(postal_codes,
+                                                              neighborhoods['Borough'],
+                                                              neighborhoods['Neighborhood'],
+                                                              results):
+        collector.add(borough, neighborhood, venue_list, postal_code)
+    return collector.to_frame()
@@ -0,0 +1,150 @@
+"""Coordinates of boroughs and cities.
+
+The notebook creates a new ``Nominatim`` geolocator for every address it
+looks up.  ``Geocoder`` answers from an offline gazetteer of borough centroids
+first (built from the postal code coordinates in ``df_geo``), then from a
+persistent cache of earlier lookups, and only then asks Nominatim, at most
+once a second as its usage policy requires.
+"""
+import hashlib
+import threading
+import time
+
+from .cache import ResponseCache
+from .profiling import record_http
+
+GEOCODE_CACHE_PATH = 'geocode_cache.sqlite'
+NOMINATIM_INTERVAL = 1.0 # seconds between Nominatim requests
+
+#trailing address parts the gazetteer may drop, e.g. 'Scarborough, Toronto, ON'
+REGION_SUFFIXES = ('Toronto', 'Ontario', 'ON', 'Canada')
+
+
+def normalize_address(address):
+    """Lower-case ``address`` and collapse its whitespace."""
+    return ', '.join(' '.join(part.split()) for part in address.lower().split(','))
+
+
+class Gazetteer:
+    """Offline name -> (latitude, longitude) lookup.
+
+    ``from_df_geo`` builds one entry per borough, at the centroid of the
+    borough's postal code points, and one for the city at the centroid of all
+    of them.  Names are matched case-insensitively and with or without
+    trailing ``suffixes``, so 'Scarborough, Toronto, ON' and 'scarborough'
+    are the same entry; 'York, UK' is not York.
+    """
+
+    def __init__(self, places=None, suffixes=REGION_SUFFIXES):
+        self.places = {}
+        self.suffixes = {normalize_address(suffix) for suffix in suffixes}
+        for name, coords in (places or {}).items():
+            self.add(name, *coords)
+
+    def __len__(self):
+        return len(self.places)
+
+    def __contains__(self, address):
+        return self.get(address) is not None
+
+    @classmethod
+    def from_df_geo(cls, df_geo, city='Toronto', suffixes=REGION_SUFFIXES):
+        centroids = df_geo.groupby('Borough')[['Latitude', 'Longitude']].mean()
+        gazetteer = cls(suffixes=tuple(suffixes) + ((city,) if city is not None else ()))
+        for borough, row in centroids.iterrows():
+            gazetteer.add(borough, row['Latitude'], row['Longitude'])
+        if city is not None and len(df_geo):
+            gazetteer.add(city, df_geo['Latitude'].mean(), df_geo['Longitude'].mean())
+        return gazetteer
+
+    def add(self, name, latitude, longitude):
+        self.places[normalize_address(name)] = (float(latitude), float(longitude))
+
+    def get(self, address):
+        """Return the coordinates of ``address``, or None if it is not known."""
+        parts = normalize_address(address).split(', ')
+        while True:
+            coords = self.places.get(', '.join(parts))
+            if coords is not None or len(parts) == 1 or parts[-1] not in self.suffixes:
+                return coords
+            parts.pop()
+
+
+class Geocoder:
+    """Callable ``geocode(address) -> (latitude, longitude)``.
+
+    Lookups go to the ``gazetteer``, then the ``cache`` (a ``ResponseCache``,
+    by default ``geocode_cache.sqlite``), then Nominatim unless ``online`` is
+    False.  Nominatim results are written back to the cache, so each address
+    is only ever requested once.  ``geolocator`` replaces the default geopy
+    ``Nominatim`` instance, e.g. with one pointed at another server.
+
+    The default cache file is only opened by the first lookup the gazetteer
+    cannot answer, and ``close`` (or leaving a ``with`` block) closes it.
+    """
+
+    def __init__(self, gazetteer=None, cache=None, online=True,
+                 user_agent='foursquare_agent', interval=NOMINATIM_INTERVAL, geolocator=None):
+        self.gazetteer = gazetteer if gazetteer is not None else Gazetteer()
+        self._cache = cache
+        self._own_cache = cache is None
+        self.online = online
+        self.user_agent = user_agent
+        self.interval = interval
+        self._geolocator = geolocator
+        self._lock = threading.Lock()
+        self._last_request = 0.0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def cache(self):
+        with self._lock:
+            if self._cache is None:
+                self._cache = ResponseCache(GEOCODE_CACHE_PATH, ttl=None)
+            return self._cache
+
+    def close(self):
+        """Close the cache if this geocoder opened it."""
+        if self._own_cache and self._cache is not None:
+            self._cache.close()
+            self._cache = None
+
+    def __call__(self, address):
+        coords = self.gazetteer.get(address)
+        if coords is not None:
+            return coords
+
+        key = 'geocode:' + hashlib.sha256(normalize_address(address).encode('utf-8')).hexdigest()
+        cached = self.cache.get(key)
+        if cached is not None:
+            return tuple(cached)
+        if not self.online:
+            raise LookupError('{!r} is not in the gazetteer or the geocode cache'.format(address))
+
+        coords = self._nominatim(address)
+        self.cache.set(key, list(coords))
+        return coords
+
+    def _nominatim(self, address):
+        with self._lock:
+            if self._geolocator is None:
+                from geopy.geocoders import Nominatim
+
+                self._geolocator = Nominatim(user_agent=self.user_agent)
+            wait = self._last_request + self.interval - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            start = time.perf_counter()
+            try:
+                location = self._geolocator.geocode(address)
+            finally:
+                self._last_request = time.monotonic()
+                record_http('nominatim', time.perf_counter() - start)
+        if location is None:
+            raise LookupError('could not geocode {!r}'.format(address))
+        return location.latitude, location.longitude
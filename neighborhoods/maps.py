@@ -0,0 +1,203 @@
+"""Folium maps of neighborhoods and venues.
+
+The notebook adds one ``CircleMarker`` with its own ``Popup`` per row, which
+puts a separate block of JavaScript in the page for every point.  The layers
+here are built from whole arrays instead: ``'cluster'`` ships the points as a
+single JavaScript array to a ``FastMarkerCluster``, ``'geojson'`` as a single
+GeoJSON feature collection, and ``grid_layer`` pre-aggregates points into
+grid cells for an overview at low zoom.  ``venue_map`` can show the grid when
+zoomed out and swap it for the points when zoomed in.
+"""
+import html
+
+import folium
+import numpy as np
+from branca.element import MacroElement
+from folium.plugins import FastMarkerCluster
+from folium.template import Template
+from folium.utilities import JsCode
+
+from .profiling import timed
+
+DETAIL_ZOOM = 14 # zoom level from which venue_map shows points instead of the grid
+
+#one circle marker per point, as in the notebook's maps
+CIRCLE_MARKER_CALLBACK = """\
+function (row) {
+    var marker = L.circleMarker(new L.LatLng(row[0], row[1]), {
+        radius: %(radius)d, color: '%(color)s', fill: true,
+        fillColor: '%(color)s', fillOpacity: %(fill_opacity)s});
+    if (row[2]) {
+        marker.bindPopup(row[2]);
+    }
+    return marker;
+}"""
+
+#the GeoJSON counterpart: only labelled points get a popup
+POPUP_CALLBACK = """\
+function (feature, layer) {
+    if (feature.properties.label) {
+        layer.bindPopup(feature.properties.label);
+    }
+}"""
+
+#swaps two layers as the map is zoomed, see ZoomSwitch
+ZOOM_SWITCH = """\
+{% macro script(this, kwargs) %}
+(function () {
+    var map = {{ this._parent.get_name() }};
+    var overview = {{ this.overview.get_name() }};
+    var detail = {{ this.detail.get_name() }};
+    function update() {
+        var zoomed = map.getZoom() >= {{ this.zoom }};
+        map.removeLayer(zoomed ? overview : detail);
+        map.addLayer(zoomed ? detail : overview);
+    }
+    map.on('zoomend', update);
+    update();
+})();
+{% endmacro %}"""
+
+
+class ZoomSwitch(MacroElement):
+    """Show ``overview`` below zoom level ``zoom`` and ``detail`` from it on."""
+
+    _template = Template(ZOOM_SWITCH)
+
+    def __init__(self, overview, detail, zoom):
+        super().__init__()
+        self._name = 'ZoomSwitch'
+        self.overview = overview
+        self.detail = detail
+        self.zoom = int(zoom)
+
+
+def base_map(latitude, longitude, zoom_start=10):
+    return folium.Map(location=[latitude, longitude], zoom_start=zoom_start)
+
+
+def add_centre_marker(map_, latitude, longitude, label, color='red'):
+    """Add the large circle marking a borough centre (cells In[28]/In[29])."""
+    folium.CircleMarker([latitude, longitude], radius=10, color=color, popup=label,
+                        fill=True, fill_color=color, fill_opacity=0.6).add_to(map_)
+    return map_
+
+
+def add_points(map_, latitudes, longitudes, labels=None, mode='cluster', color='blue',
+               radius=5, fill_opacity=0.6, name=None):
+    """Add a batched layer of circle markers to ``map_``.
+
+    ``mode`` is ``'cluster'`` (markers clustered by a ``FastMarkerCluster``,
+    best for tens of thousands of points) or ``'geojson'`` (every marker drawn,
+    from one GeoJSON layer).  ``labels`` become the popups and are HTML
+    escaped; points with a missing label get no popup.
+    """
+    points_layer(latitudes, longitudes, labels, mode, color, radius, fill_opacity,
+                 name).add_to(map_)
+    return map_
+
+
+def points_layer(latitudes, longitudes, labels=None, mode='cluster', color='blue', radius=5,
+                 fill_opacity=0.6, name=None):
+    """The layer ``add_points`` adds, not yet attached to a map.
+
+    Points without finite coordinates are left out.
+    """
+    latitudes = np.asarray(latitudes, dtype=float)
+    longitudes = np.asarray(longitudes, dtype=float)
+    if labels is None:
+        labels = [''] * len(latitudes)
+    finite = np.isfinite(latitudes) & np.isfinite(longitudes)
+    latitudes, longitudes = latitudes[finite], longitudes[finite]
+    #missing labels (None or NaN) get no popup
+    labels = ['' if label is None or label != label else html.escape(str(label))
+              for label, kept in zip(labels, finite) if kept]
+
+    if mode == 'cluster':
+        data = [list(point) for point in zip(latitudes.tolist(), longitudes.tolist(), labels)]
+        callback = CIRCLE_MARKER_CALLBACK % {'radius': radius, 'color': color,
+                                             'fill_opacity': fill_opacity}
+        return FastMarkerCluster(data, callback=callback, name=name)
+    if mode == 'geojson':
+        features = [{'type': 'Feature',
+                     'geometry': {'type': 'Point', 'coordinates': [lng, lat]},
+                     'properties': {'label': label}}
+                    for lat, lng, label in zip(latitudes.tolist(), longitudes.tolist(), labels)]
+        marker = folium.CircleMarker(radius=radius, color=color, fill=True,
+                                     fill_color=color, fill_opacity=fill_opacity)
+        on_each_feature = JsCode(POPUP_CALLBACK) if any(labels) else None
+        return folium.GeoJson({'type': 'FeatureCollection', 'features': features}, name=name,
+                              marker=marker, on_each_feature=on_each_feature)
+    raise ValueError('unknown mode {!r}'.format(mode))
+
+
+def grid_bins(latitudes, longitudes, cell_size=0.01):
+    """Count points per ``cell_size``-degree grid cell.
+
+    Returns ``(south, west, counts)`` arrays with one entry per non-empty cell;
+    points without finite coordinates are not counted.
+    """
+    latitudes = np.asarray(latitudes, dtype=float)
+    longitudes = np.asarray(longitudes, dtype=float)
+    finite = np.isfinite(latitudes) & np.isfinite(longitudes)
+    rows = np.floor(latitudes[finite] / cell_size).astype(np.int64)
+    cols = np.floor(longitudes[finite] / cell_size).astype(np.int64)
+    cells, counts = np.unique(np.column_stack((rows, cols)), axis=0, return_counts=True)
+    return cells[:, 0] * cell_size, cells[:, 1] * cell_size, counts
+
+
+def grid_layer(map_, latitudes, longitudes, cell_size=0.01, color='red', name='density'):
+    """Add a layer of grid cells shaded by how many points they contain."""
+    grid(latitudes, longitudes, cell_size, color, name).add_to(map_)
+    return map_
+
+
+def grid(latitudes, longitudes, cell_size=0.01, color='red', name='density'):
+    """The layer ``grid_layer`` adds, not yet attached to a map."""
+    south, west, counts = grid_bins(latitudes, longitudes, cell_size)
+    peak = counts.max() if len(counts) else 1
+    features = []
+    for s, w, count in zip(south.tolist(), west.tolist(), counts.tolist()):
+        n, e = s + cell_size, w + cell_size
+        features.append({'type': 'Feature',
+                         'geometry': {'type': 'Polygon',
+                                      'coordinates': [[[w, s], [e, s], [e, n], [w, n], [w, s]]]},
+                         'properties': {'count': count,
+                                        'opacity': round(0.15 + 0.65 * count / peak, 3)}})
+    return folium.GeoJson({'type': 'FeatureCollection', 'features': features}, name=name,
+                          style_function=lambda feature: {
+                              'color': color, 'weight': 0, 'fillColor': color,
+                              'fillOpacity': feature['properties']['opacity']},
+                          tooltip=folium.GeoJsonTooltip(fields=['count']))
+
+
+@timed('venue_map')
+def venue_map(latitudes, longitudes, labels=None, centre=None, zoom_start=10, mode='cluster',
+              cell_size=None, color='blue', detail_zoom=DETAIL_ZOOM):
+    """Return a map of venues, centred on ``centre`` or on their mean position.
+
+    With ``cell_size`` the venues are shown as an aggregated grid below zoom
+    level ``detail_zoom`` and as individual points from it on; the layers
+    swap as the map is zoomed.
+    """
+    latitudes = np.asarray(latitudes, dtype=float)
+    longitudes = np.asarray(longitudes, dtype=float)
+    if centre is None:
+        centre = (float(np.nanmean(latitudes)), float(np.nanmean(longitudes)))
+    map_ = base_map(centre[0], centre[1], zoom_start)
+    points = points_layer(latitudes, longitudes, labels, mode=mode, color=color, name='venues')
+    if cell_size is not None:
+        #both layers start on the map; the switch removes the one not in use
+        overview = grid(latitudes, longitudes, cell_size).add_to(map_)
+        points.add_to(map_)
+        ZoomSwitch(overview, points, detail_zoom).add_to(map_)
+    else:
+        points.add_to(map_)
+    return map_
+
+
+def neighborhoods_map(df_geo, centre=None, zoom_start=10, mode='geojson'):
+    """The map of cell In[8]: every neighborhood labelled with its borough."""
+    labels = (df_geo['Neighborhood'] + ', ' + df_geo['Borough']).tolist()
+    return venue_map(df_geo['Latitude'], df_geo['Longitude'], labels, centre, zoom_start,
+                     mode=mode, color='#3186cc')
@@ -0,0 +1,126 @@
+"""Run the borough analysis of section 3.7 for any number of boroughs.
+
+The notebook repeats the same cells for Scarborough and Etobicoke: geocode the
+borough, search for restaurants around it, refine the results, then explore
+every neighborhood of the borough.  ``analyze_boroughs`` runs those stages for
+every requested borough with one shared Foursquare client (and so one
+connection pool and response cache) and returns one tidy frame per stage.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from . import collector
+from .foursquare import LIMIT, RADIUS, FoursquareClient, fetch_venues
+from .geocode import Gazetteer, Geocoder
+from .profiling import timed
+from .venues import filter_venues
+
+SEARCH_QUERY = 'Restaurant'
+RESTAURANT_CATEGORY = 'Restaurant'
+
+
+@timed('geocode_boroughs')
+def geocode_boroughs(boroughs, geocode=None, region='ON'):
+    """Return a Borough/Latitude/Longitude frame of the borough centres.
+
+    ``geocode`` is a ``geocode(address) -> (latitude, longitude)`` callable and
+    defaults to a ``Geocoder`` without a gazetteer.  Lookups run one after the
+    other, as Nominatim only allows one request a second.
+    """
+    own_geocoder = geocode is None
+    if own_geocoder:
+        geocode = Geocoder()
+    try:
+        centres = [geocode('{}, {}'.format(borough, region)) for borough in boroughs]
+    finally:
+        if own_geocoder:
+            geocode.close()
+    return pd.DataFrame({'Borough': list(boroughs),
+                         'Latitude': [centre[0] for centre in centres],
+                         'Longitude': [centre[1] for centre in centres]})
+
+
+@timed('analyze_borough')
+def analyze_borough(df_geo, borough, centre, client, search_query=SEARCH_QUERY,
+                    radius=RADIUS, limit=LIMIT, category=RESTAURANT_CATEGORY):
+    """Run the search and explore stages for one borough.
+
+    Returns the refined search results around ``centre``, every venue explored
+    around the borough's neighborhoods and the subset of those whose category
+    is ``category``.
+    """
+    search = filter_venues(client.search(centre[0], centre[1], search_query, radius, limit))
+    search.insert(0, 'Borough', borough)
+
+    data = df_geo[df_geo['Borough'] == borough].reset_index(drop=True)
+    venues = fetch_venues(data, client, radius, limit)
+    restaurants = venues[venues['Category'] == category].reset_index(drop=True)
+    return search, venues, restaurants
+
+
+@timed('analyze_boroughs')
+def analyze_boroughs(df_geo, boroughs=None, client=None, geocode=None, max_workers=4,
+                     search_query=SEARCH_QUERY, radius=RADIUS, limit=LIMIT,
+                     category=RESTAURANT_CATEGORY):
+    """Analyze several boroughs of ``df_geo`` with the same stages.
+
+    ``boroughs`` defaults to every borough in ``df_geo``.  Unless ``geocode``
+    is given, borough centres come from a gazetteer of the postal code
+    centroids in ``df_geo``, so no geocoding request is made.  Boroughs are
+    processed ``max_workers`` at a time on a thread pool; the work is HTTP
+    bound, and threads let every borough share ``client``'s connection pool
+    and response cache.  However many boroughs run at once, no more than
+    ``client.max_workers`` requests are in flight.  The result is a dict of
+    frames, each with a Borough column:
+
+    ``centres``
+        the geocoded borough centres,
+    ``search``
+        the refined restaurant search results around each centre,
+    ``venues``
+        every venue explored around each neighborhood,
+    ``restaurants``
+        the explored venues whose category is ``category``.
+    """
+    if boroughs is None:
+        boroughs = df_geo['Borough'].unique().tolist()
+    own_client = client is None
+    if own_client:
+        client = FoursquareClient()
+    try:
+        if geocode is None:
+            with Geocoder(Gazetteer.from_df_geo(df_geo)) as geocoder:
+                centres = geocode_boroughs(boroughs, geocoder)
+        else:
+            centres = geocode_boroughs(boroughs, geocode)
+
+        def analyze(row):
+            return analyze_borough(df_geo, row.Borough, (row.Latitude, row.Longitude),
+                                   client, search_query, radius, limit, category)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(analyze, centres.itertuples(index=False)))
+    finally:
+        if own_client:
+            client.close()
+
+    search, venues, restaurants = zip(*results) if results else ((), (), ())
+    return {'centres': centres,
+            'search': _concat(search, ['Borough'] + list(filter_venues([]).columns)),
+            'venues': _concat(venues, collector.COLUMNS),
+            'restaurants': _concat(restaurants, collector.COLUMNS)}
+
+
+def _concat(frames, columns):
+    #with every frame empty, keep the columns (and dtypes) of the first, or ``columns``
+    if all(frame.empty for frame in frames):
+        return frames[0].iloc[:0] if frames else pd.DataFrame(columns=columns)
+    frames = [frame for frame in frames if not frame.empty]
+    categorical = [column for column, dtype in frames[0].dtypes.items()
+                   if isinstance(dtype, pd.CategoricalDtype)]
+    combined = pd.concat(frames, ignore_index=True)
+    #concat falls back to plain strings when the categories differ
+    for column in categorical:
+        combined[column] = combined[column].astype('category')
+    return combined
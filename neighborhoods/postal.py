@@ -0,0 +1,228 @@
+"""Toronto postal codes, boroughs and neighborhoods from Wikipedia.
+
+This is section 3.2 of the notebook.  The notebook appends one row at a time
+with ``df.loc[len(df)] = row``, which copies the frame on every row; here the
+table is parsed with lxml in one pass into column lists and the frame is built
+once.  ``read_national`` does the same for the pages of every forward
+sortation area letter at once, not only M (Toronto).
+"""
+import re
+import time
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+
+import lxml.html
+import numpy as np
+import pandas as pd
+import requests
+
+from .foursquare import make_session
+from .profiling import record_http, timed
+
+PAGE_URL = 'https://en.wikipedia.org/wiki/List_of_postal_codes_of_Canada:_{}'
+POSTAL_CODES_URL = PAGE_URL.format('M')
+PAGE_CACHE_PATH = 'wikipedia_cache.sqlite'
+
+#first letters of the Canadian forward sortation areas, one Wikipedia page each
+FSA_LETTERS = 'ABCEGHJKLMNPRSTVXY'
+COORDINATES_CSV = 'Geospatial_Coordinates.csv'
+
+COLUMNS = ['PostalCode', 'Borough', 'Neighborhood']
+NOT_ASSIGNED = 'Not assigned'
+
+#text of a grid cell after its postal code: 'Borough (Neighborhood / Neighborhood)'
+GRID_CELL = re.compile(r'^(?P<borough>[^(]*?)\s*(?:\((?P<neighborhoods>.*)\))?$', re.S)
+
+
+def fetch_postal_page(url=POSTAL_CODES_URL, session=None, cache=None):
+    """Download the Wikipedia postal code page and return its HTML.
+
+    With a ``ResponseCache`` the page is stored with its ``ETag`` and
+    ``Last-Modified`` headers, and later calls send them back as a
+    conditional request; a 304 answer is served from the cache.
+    """
+    get = session.get if session is not None else requests.get
+    key = 'page:' + url
+    cached = cache.get(key) if cache is not None else None
+    headers = {}
+    if cached is not None:
+        if cached.get('etag'):
+            headers['If-None-Match'] = cached['etag']
+        if cached.get('last_modified'):
+            headers['If-Modified-Since'] = cached['last_modified']
+    start = time.perf_counter()
+    response = get(url, timeout=30, headers=headers)
+    record_http('wikipedia', time.perf_counter() - start, len(response.content),
+                response.status_code)
+    if response.status_code == 304 and cached is not None:
+        return cached['body']
+    response.raise_for_status()
+    if cache is not None:
+        cache.set(key, {'body': response.text,
+                        'etag': response.headers.get('ETag'),
+                        'last_modified': response.headers.get('Last-Modified')})
+    return response.text
+
+
+def fetch_postal_pages(letters=FSA_LETTERS, url=PAGE_URL, session=None, cache=None,
+                       max_workers=8):
+    """Download the page of every letter concurrently; returns ``{letter: html}``.
+
+    ``url`` is a template with one ``{}`` for the letter.  All requests share
+    ``session`` (by default a new pooled one) and ``cache``.
+    """
+    own_session = session is None
+    if own_session:
+        session = make_session(max_workers)
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            pages = executor.map(lambda letter: fetch_postal_page(url.format(letter), session,
+                                                                  cache), letters)
+            return dict(zip(letters, pages))
+    finally:
+        if own_session:
+            session.close()
+
+
+@timed('parse_postal_table')
+def parse_postal_table(source):
+    """Parse the ``wikitable sortable`` table of ``source`` into a raw frame.
+
+    Only rows with exactly three cells are kept, as in the notebook; header
+    rows use ``<th>`` and are skipped that way.  Pages laid out as a grid,
+    one postal code per cell (``<b>L1B</b><br/>Clarington<br/>(Bowmanville)``),
+    have no such rows and are read with ``parse_grid_cells`` instead.
+    """
+    doc = lxml.html.fromstring(source)
+    tables = doc.xpath('//table[contains(concat(" ", normalize-space(@class), " "), " wikitable ")'
+                       ' and contains(concat(" ", normalize-space(@class), " "), " sortable ")]')
+    if not tables:
+        raise ValueError('no "wikitable sortable" table found')
+
+    #every cell of the three-cell rows, in document order
+    cells = [td.text_content().strip() for td in tables[0].xpath('.//tr[count(td)=3]/td')]
+    if not cells:
+        return parse_grid_cells(tables[0])
+    return pd.DataFrame({'PostalCode': cells[0::3],
+                         'Borough': cells[1::3],
+                         'Neighborhood': cells[2::3]}, columns=COLUMNS)
+
+
+def parse_grid_cells(table):
+    """Read a grid layout table, one ``<b>postal code</b>`` per cell, into a raw frame.
+
+    The text after the code is 'Borough' or 'Borough (Neighborhood / ...)';
+    the neighborhoods are joined with ', ' like the merged rows of the list
+    layout, and a cell without any takes the borough's name.
+    """
+    rows = []
+    for td in table.xpath('.//td[.//b]'):
+        parts = [text.strip() for text in td.itertext() if text.strip()]
+        code = ' '.join(td.xpath('.//b[1]')[0].text_content().split())
+        if not parts or parts[0] != code:
+            continue
+        match = GRID_CELL.match(' '.join(parts[1:]))
+        borough = ' '.join(match.group('borough').split()) or NOT_ASSIGNED
+        neighborhoods = match.group('neighborhoods')
+        if neighborhoods:
+            neighborhood = ', '.join(' '.join(name.split()) for name in neighborhoods.split('/'))
+        else:
+            neighborhood = NOT_ASSIGNED
+        rows.append((code, borough, neighborhood))
+    return pd.DataFrame(rows, columns=COLUMNS)
+
+
+@timed('clean_postal_table')
+def clean_postal_table(df):
+    """Drop unassigned boroughs and merge neighborhoods sharing a postal code.
+
+    Neighborhoods with the same PostalCode and Borough are joined with ', ' in
+    order of appearance, and a neighborhood that is 'Not assigned' takes the
+    borough's name.  The result matches the notebook's
+    ``groupby(['PostalCode','Borough'], sort=False).agg(', '.join)`` but the
+    join runs as one ``np.add.reduceat`` over the grouped rows rather than a
+    Python call per group.
+    """
+    df = df[df['Borough'] != NOT_ASSIGNED]
+    if df.empty:
+        return pd.DataFrame({column: pd.Series(dtype=object) for column in COLUMNS})
+    groups = df.groupby(['PostalCode', 'Borough'], sort=False).ngroup().to_numpy()
+
+    #rows of a group next to each other, groups in order of first appearance
+    order = np.argsort(groups, kind='stable')
+    groups = groups[order]
+    starts = np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]])
+
+    names = df['Neighborhood'].to_numpy(dtype=object)[order]
+    follows = np.ones(len(names), dtype=bool)
+    follows[starts] = False
+    names[follows] = ', ' + names[follows]
+    neighborhoods = np.add.reduceat(names, starts)
+
+    first = order[starts]
+    boroughs = df['Borough'].to_numpy(dtype=object)[first]
+    neighborhoods = np.where(neighborhoods == NOT_ASSIGNED, boroughs, neighborhoods)
+    return pd.DataFrame({'PostalCode': df['PostalCode'].to_numpy(dtype=object)[first],
+                         'Borough': boroughs,
+                         'Neighborhood': neighborhoods}, columns=COLUMNS)
+
+
+def read_neighborhoods(source):
+    """Parse and clean the postal code table of ``source`` in one step."""
+    return clean_postal_table(parse_postal_table(source))
+
+
+def read_coordinates(path=COORDINATES_CSV, store=None):
+    """Read the geospatial coordinates CSV with its column renamed to PostalCode.
+
+    With a ``store.Store`` the CSV is only parsed when it is newer than the
+    copy kept in the store.
+    """
+    if store is not None:
+        coordinates = store.cached_csv(path)
+    else:
+        coordinates = pd.read_csv(path)
+    return coordinates.rename(columns={'Postal Code': 'PostalCode'})
+
+
+@timed('merge_coordinates')
+def merge_coordinates(df, coordinates=None):
+    """Attach Latitude and Longitude to the neighborhoods, giving ``df_geo``."""
+    if coordinates is None:
+        coordinates = read_coordinates()
+    return pd.merge(df, coordinates, on='PostalCode')
+
+
+@timed('read_national')
+def read_national(coordinates=None, letters=FSA_LETTERS, url=PAGE_URL, session=None,
+                  cache=None, max_workers=8):
+    """Build the ``df_geo`` of every forward sortation area in ``letters``.
+
+    The pages are fetched concurrently (see ``fetch_postal_pages``), each is
+    parsed and cleaned like the Toronto one, and the combined table is joined
+    with ``coordinates`` (by default ``read_coordinates()``, which must then
+    cover the whole country).  A page without postal code rows is skipped
+    and postal codes without coordinates are left out, both with a warning.
+    """
+    pages = fetch_postal_pages(letters, url, session, cache, max_workers)
+    frames = []
+    for letter, source in pages.items():
+        try:
+            df = parse_postal_table(source)
+        except ValueError as e:
+            df, reason = None, e
+        else:
+            reason = 'no postal code rows found'
+        if df is None or df.empty:
+            warnings.warn('postal code page {} skipped: {}'.format(letter, reason))
+            continue
+        frames.append(clean_postal_table(df))
+    if not frames:
+        raise ValueError('no postal codes found on the pages of {}'.format(''.join(letters)))
+    df = pd.concat(frames, ignore_index=True)
+    df_geo = merge_coordinates(df, coordinates)
+    missing = df.loc[~df['PostalCode'].isin(df_geo['PostalCode']), 'PostalCode']
+    if len(missing):
+        warnings.warn('{} of {} postal codes ({}) have no coordinates and are left out'.format(
+            len(missing), len(df), ', '.join(sorted(missing.str[0].unique()))))
+    return df_geo
@@ -0,0 +1,174 @@
+"""Per-stage timing, HTTP and memory instrumentation.
+
+Stages of the pipeline are wrapped in ``stage('name')`` blocks (or decorated
+with ``timed('name')``) and Foursquare/Wikipedia requests are reported with
+``record_http``.  Nothing is recorded unless the module-level ``profiler`` is
+enabled, either with ``profiler.enable()`` or by setting the
+``NEIGHBORHOODS_PROFILE`` environment variable (and
+``NEIGHBORHOODS_PROFILE_MEMORY`` to trace memory too); the collected numbers
+can be written out as JSON or as a Chrome trace (``chrome://tracing``,
+Perfetto).
+"""
+import bisect
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+#upper bounds of the HTTP latency histogram buckets, in milliseconds
+LATENCY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, float('inf'))
+
+
+class Profiler:
+    """Collects stage timings, HTTP latencies and peak memory.
+
+    With ``trace_memory`` the peak traced Python allocation is recorded as
+    well, at the cost of running ``tracemalloc``.  ``tracemalloc`` keeps one
+    peak for the whole process, so it is only measured for top-level stages,
+    those started while no other stage is open on any thread; the
+    ``peak_memory`` of nested and concurrent stages is None.
+    """
+
+    def __init__(self, enabled=False, trace_memory=False):
+        self.enabled = False
+        self.trace_memory = False
+        self._lock = threading.Lock()
+        self._open = 0 # stages open on all threads
+        self.reset()
+        if enabled:
+            self.enable(trace_memory)
+
+    def reset(self):
+        with self._lock:
+            self.stages = {}
+            self.http = {}
+            self.events = []
+            self._origin = time.perf_counter()
+
+    def enable(self, trace_memory=False):
+        self.enabled = True
+        self.trace_memory = trace_memory
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def disable(self):
+        self.enabled = False
+        if self.trace_memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self.trace_memory = False
+
+    @contextmanager
+    def stage(self, name):
+        """Time the block as one call of stage ``name``."""
+        if not self.enabled:
+            yield
+            return
+        with self._lock:
+            top_level = self._open == 0
+            self._open += 1
+        measure = top_level and self.trace_memory and tracemalloc.is_tracing()
+        if measure:
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            peak = tracemalloc.get_traced_memory()[1] if measure else None
+            with self._lock:
+                self._open -= 1
+            self._record_stage(name, start, end, peak)
+
+    def _record_stage(self, name, start, end, peak):
+        with self._lock:
+            stats = self.stages.setdefault(name, {'calls': 0, 'seconds': 0.0,
+                                                  'max_seconds': 0.0, 'peak_memory': None})
+            stats['calls'] += 1
+            stats['seconds'] += end - start
+            stats['max_seconds'] = max(stats['max_seconds'], end - start)
+            if peak is not None:
+                stats['peak_memory'] = max(stats['peak_memory'] or 0, peak)
+            self.events.append(self._event(name, 'stage', start, end))
+
+    def record_http(self, endpoint, seconds, nbytes=0, status=None):
+        """Record one HTTP request that took ``seconds`` and returned ``nbytes``."""
+        if not self.enabled:
+            return
+        end = time.perf_counter()
+        with self._lock:
+            stats = self.http.setdefault(endpoint, {'requests': 0, 'bytes': 0, 'seconds': 0.0,
+                                                    'errors': 0,
+                                                    'histogram': [0] * len(LATENCY_BUCKETS)})
+            stats['requests'] += 1
+            stats['bytes'] += nbytes
+            stats['seconds'] += seconds
+            if status is not None and status >= 400:
+                stats['errors'] += 1
+            stats['histogram'][bisect.bisect_left(LATENCY_BUCKETS, seconds * 1000)] += 1
+            event = self._event(endpoint, 'http', end - seconds, end)
+            event['args'] = {'bytes': nbytes, 'status': status}
+            self.events.append(event)
+
+    def _event(self, name, category, start, end):
+        return {'name': name, 'cat': category, 'ph': 'X',
+                'ts': (start - self._origin) * 1e6, 'dur': (end - start) * 1e6,
+                'pid': os.getpid(), 'tid': threading.get_ident()}
+
+    def summary(self):
+        """Return the collected numbers as a JSON-serialisable dict."""
+        with self._lock:
+            http = {}
+            for endpoint, stats in self.http.items():
+                http[endpoint] = dict(stats, histogram={
+                    ('<= {} ms'.format(bound) if bound != float('inf') else '> {} ms'.format(
+                        LATENCY_BUCKETS[-2])): count
+                    for bound, count in zip(LATENCY_BUCKETS, stats['histogram'])})
+            summary = {'stages': {name: dict(stats) for name, stats in self.stages.items()},
+                       'http': http}
+        try:
+            import resource
+
+            max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            #bytes on macOS, kilobytes on Linux and the BSDs
+            summary['max_rss'] = max_rss if sys.platform == 'darwin' else max_rss * 1024
+        except ImportError:
+            pass
+        return summary
+
+    def export_json(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.summary(), f, indent=2)
+
+    def export_chrome_trace(self, path):
+        with self._lock:
+            events = list(self.events)
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+
+
+profiler = Profiler(enabled=bool(os.environ.get('NEIGHBORHOODS_PROFILE')),
+                    trace_memory=bool(os.environ.get('NEIGHBORHOODS_PROFILE_MEMORY')))
+
+
+def stage(name):
+    """``with stage('fetch'):`` records the block on the module profiler."""
+    return profiler.stage(name)
+
+
+def timed(name):
+    """Decorator recording every call of the function as stage ``name``."""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with profiler.stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def record_http(endpoint, seconds, nbytes=0, status=None):
+    profiler.record_http(endpoint, seconds, nbytes, status)
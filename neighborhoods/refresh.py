@@ -0,0 +1,126 @@
+"""Incremental refresh of the neighborhood venues.
+
+A refresh keeps a snapshot of the last ``df_geo`` and of the venues fetched
+for it, with the time each postal code was last explored.  The next refresh
+compares the new postal code table with the snapshot and only explores the
+postal codes that were added, moved or have gone stale; renamed neighborhoods
+keep their venues under the new name and removed ones are dropped.
+"""
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from .foursquare import LIMIT, RADIUS, fetch_venues
+from .spatial import haversine
+
+SNAPSHOT_DIR = 'snapshot'
+
+ADDED = 'added'
+REMOVED = 'removed'
+RENAMED = 'renamed'
+MOVED = 'moved'
+STALE = 'stale'
+
+
+def diff_postal_codes(old, new, tolerance=1.0):
+    """Compare two ``df_geo`` frames postal code by postal code.
+
+    Returns a frame with PostalCode and Change columns, one row per postal
+    code that was added, removed, renamed (Borough or Neighborhood changed) or
+    moved (coordinates changed by more than ``tolerance`` meters).  A postal
+    code that was both renamed and moved is reported as moved.
+    """
+    merged = pd.merge(old, new, on='PostalCode', how='outer', suffixes=('_old', '_new'),
+                      indicator=True)
+    both = merged['_merge'] == 'both'
+    coords = [merged[column].to_numpy(dtype=float) for column in
+              ['Latitude_old', 'Longitude_old', 'Latitude_new', 'Longitude_new']]
+    moved = both & (haversine(*coords) > tolerance)
+    renamed = both & ((merged['Borough_old'] != merged['Borough_new'])
+                      | (merged['Neighborhood_old'] != merged['Neighborhood_new']))
+    change = np.select([merged['_merge'] == 'right_only', merged['_merge'] == 'left_only',
+                        moved, renamed],
+                       [ADDED, REMOVED, MOVED, RENAMED], default='')
+    changes = pd.DataFrame({'PostalCode': merged['PostalCode'].to_numpy(), 'Change': change})
+    return changes[changes['Change'] != ''].reset_index(drop=True)
+
+
+class Snapshot:
+    """The ``df_geo``, venues and fetch times stored by the last refresh."""
+
+    def __init__(self, df_geo, venues, fetched):
+        self.df_geo = df_geo
+        self.venues = venues
+        #PostalCode -> unix time of the last explore request
+        self.fetched = fetched
+
+    @classmethod
+    def empty(cls):
+        return cls(pd.DataFrame(columns=['PostalCode', 'Borough', 'Neighborhood',
+                                         'Latitude', 'Longitude']),
+                   pd.DataFrame(), pd.Series(dtype=float, name='fetched'))
+
+    @classmethod
+    def load(cls, path=SNAPSHOT_DIR):
+        """Load the snapshot in ``path``, or an empty one if there is none yet."""
+        if not os.path.exists(os.path.join(path, 'df_geo.pkl')):
+            return cls.empty()
+        return cls(pd.read_pickle(os.path.join(path, 'df_geo.pkl')),
+                   pd.read_pickle(os.path.join(path, 'venues.pkl')),
+                   pd.read_pickle(os.path.join(path, 'fetched.pkl')))
+
+    def save(self, path=SNAPSHOT_DIR):
+        os.makedirs(path, exist_ok=True)
+        for name, frame in [('df_geo', self.df_geo), ('venues', self.venues),
+                            ('fetched', self.fetched)]:
+            #write then rename, so an interrupted refresh leaves the old snapshot intact
+            target = os.path.join(path, name + '.pkl')
+            frame.to_pickle(target + '.tmp')
+            os.replace(target + '.tmp', target)
+
+
+def refresh_venues(df_geo, client, path=SNAPSHOT_DIR, max_age=None, radius=RADIUS,
+                   limit=LIMIT, tolerance=1.0):
+    """Bring the stored venues up to date with ``df_geo``.
+
+    Postal codes that are new, moved by more than ``tolerance`` meters or last
+    explored more than ``max_age`` seconds ago are explored again through
+    ``client``; every other postal code keeps its stored venues, relabelled
+    with its current Borough and Neighborhood.  The snapshot in ``path`` is
+    updated and the result is a dict with the merged ``venues`` and the
+    ``changes`` found (PostalCode and Change columns, including ``'stale'``
+    rows for postal codes refetched only because of their age).
+    """
+    snapshot = Snapshot.load(path)
+    changes = diff_postal_codes(snapshot.df_geo, df_geo, tolerance)
+
+    now = time.time()
+    refetch = set(changes.loc[changes['Change'].isin([ADDED, MOVED]), 'PostalCode'])
+    if max_age is not None:
+        fetched = snapshot.fetched.reindex(df_geo['PostalCode'])
+        stale = set(fetched.index[(now - fetched > max_age).to_numpy()]) - refetch
+        changes = pd.concat([changes, pd.DataFrame({'PostalCode': sorted(stale), 'Change': STALE})],
+                            ignore_index=True)
+        refetch |= stale
+
+    to_fetch = df_geo[df_geo['PostalCode'].isin(refetch)]
+    fresh = fetch_venues(to_fetch, client, radius, limit)
+
+    kept = snapshot.venues
+    if not kept.empty:
+        current = df_geo.set_index('PostalCode')
+        kept = kept[kept['PostalCode'].isin(current.index) & ~kept['PostalCode'].isin(refetch)]
+        kept = kept.assign(Borough=current['Borough'].reindex(kept['PostalCode']).to_numpy(),
+                           Neighborhood=current['Neighborhood'].reindex(kept['PostalCode']).to_numpy())
+    venues = pd.concat([frame for frame in (kept, fresh) if not frame.empty] or [fresh],
+                       ignore_index=True)
+    for column in ['PostalCode', 'Borough', 'Neighborhood', 'Category']:
+        venues[column] = venues[column].astype('category')
+
+    fetched = snapshot.fetched.reindex(df_geo['PostalCode'])
+    fetched[list(refetch)] = now
+    fetched.name = 'fetched'
+    Snapshot(df_geo.reset_index(drop=True), venues, fetched).save(path)
+    return {'venues': venues, 'changes': changes}
@@ -0,0 +1,264 @@
+"""Local HTTP/JSON query service over the analysis outputs.
+
+The venue counts the notebook prints with ``groupby('categories')['name']
+.count()`` are computed once at load time as dense borough x category and
+neighborhood x category count cubes, with every row's categories already
+sorted by count.  Requests only index into those arrays (or, for radius
+queries, the venue KD-tree), answers are kept in an LRU cache, and the
+latency of every request is recorded for the ``/metrics`` endpoint::
+
+    python -m neighborhoods serve venues.csv --df-geo df_geo.csv --port 8000
+    curl 'localhost:8000/top?level=borough&name=Etobicoke&n=5'
+
+Endpoints, all GET with query parameters:
+
+``/names?level=``
+    the boroughs or neighborhoods,
+``/top?level=&name=&n=``
+    the ``n`` most common categories of one borough or neighborhood,
+``/counts?level=&category=[&name=]``
+    the venues of a category per borough or neighborhood (or in one),
+``/within?category=&km=``
+    the venues of a category within ``km`` of every neighborhood centre,
+``/metrics``
+    request counts, p50/p99 latencies and cache hit rate.
+"""
+import json
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+from .features import CategoryMatrix
+from .spatial import SpatialIndex
+
+LEVELS = {'borough': 'Borough', 'neighborhood': 'Neighborhood'}
+CACHE_SIZE = 1024
+LATENCY_WINDOW = 10000 # latest requests per endpoint kept for the percentiles
+
+
+class QueryError(ValueError):
+    """A request the service cannot answer; reported as HTTP 400 or 404."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+class Cube:
+    """Dense row x category venue counts with rows' categories sorted by count."""
+
+    def __init__(self, matrix):
+        self.rows = {name: i for i, name in enumerate(matrix.index)}
+        self.names = [str(name) for name in matrix.index]
+        self.categories = np.asarray([str(name) for name in matrix.columns], dtype=object)
+        self.columns = {name: i for i, name in enumerate(self.categories)}
+        self.counts = matrix.counts.toarray()
+        #descending counts, ties in category order
+        self.order = np.argsort(-self.counts, axis=1, kind='stable')
+
+    @classmethod
+    def from_venues(cls, venues, row, column='Category'):
+        return cls(CategoryMatrix.from_venues(venues, row=row, column=column))
+
+    def row(self, name):
+        try:
+            return self.rows[name]
+        except KeyError:
+            raise QueryError('unknown name {!r}'.format(name), 404) from None
+
+    def column(self, category):
+        try:
+            return self.columns[category]
+        except KeyError:
+            raise QueryError('unknown category {!r}'.format(category), 404) from None
+
+    def top(self, name, n):
+        i = self.row(name)
+        columns = self.order[i, :n]
+        counts = self.counts[i, columns]
+        columns = columns[counts > 0]
+        return [{'category': self.categories[j], 'count': int(self.counts[i, j])}
+                for j in columns]
+
+    def slice(self, category, name=None):
+        j = self.column(category)
+        if name is not None:
+            return {name: int(self.counts[self.row(name), j])}
+        return dict(zip(self.names, self.counts[:, j].tolist()))
+
+
+class LRUCache:
+    """Thread-safe least-recently-used cache with hit and miss counters."""
+
+    def __init__(self, maxsize=CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            try:
+                value = self._entries[key]
+            except KeyError:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+
+class QueryService:
+    """Answers the queries of the module docstring from precomputed data.
+
+    ``venues`` is a ``fetch_venues``-style frame; ``df_geo``, if given,
+    enables ``/within`` with the neighborhood centres it lists.
+    """
+
+    def __init__(self, venues, df_geo=None, column='Category', cache_size=CACHE_SIZE):
+        self.cubes = {level: Cube.from_venues(venues, row, column)
+                      for level, row in LEVELS.items() if row in venues}
+        self.cache = LRUCache(cache_size)
+        self.latencies = {}
+        self._lock = threading.Lock()
+        self.centres = None
+        if df_geo is not None:
+            located = venues.dropna(subset=['Latitude', 'Longitude'])
+            self.centres = df_geo[['Neighborhood', 'Latitude', 'Longitude']].reset_index(drop=True)
+            self.index = SpatialIndex.from_frame(located)
+            categories = located[column].astype('category')
+            self.venue_categories = categories.cat.codes.to_numpy()
+            self.category_codes = {str(name): i
+                                   for i, name in enumerate(categories.cat.categories)}
+
+    def handle(self, path, query):
+        """Return ``(status, encoded JSON body)`` for one request."""
+        start = time.perf_counter()
+        endpoint = path.rstrip('/') or '/'
+        key = (endpoint, tuple(sorted(query.items())))
+        body = self.cache.get(key) if endpoint != '/metrics' else None
+        status = 200
+        if body is None:
+            try:
+                body = json.dumps(self.answer(endpoint, query)).encode('utf-8')
+                if endpoint != '/metrics':
+                    self.cache.set(key, body)
+            except QueryError as e:
+                status, body = e.status, json.dumps({'error': str(e)}).encode('utf-8')
+        self._record(endpoint, time.perf_counter() - start)
+        return status, body
+
+    def _record(self, endpoint, seconds):
+        with self._lock:
+            if endpoint not in self.latencies:
+                self.latencies[endpoint] = deque(maxlen=LATENCY_WINDOW)
+            self.latencies[endpoint].append(seconds)
+
+    def _cube(self, query):
+        level = query.get('level', 'borough')
+        if level not in self.cubes:
+            raise QueryError('level must be one of {}'.format(', '.join(self.cubes)))
+        return self.cubes[level]
+
+    def answer(self, endpoint, query):
+        if endpoint == '/names':
+            return self._cube(query).names
+        if endpoint == '/top':
+            if 'name' not in query:
+                raise QueryError('name is required')
+            return self._cube(query).top(query['name'], _integer(query, 'n', 10, minimum=1))
+        if endpoint == '/counts':
+            if 'category' not in query:
+                raise QueryError('category is required')
+            return self._cube(query).slice(query['category'], query.get('name'))
+        if endpoint == '/within':
+            return self.within(query)
+        if endpoint == '/metrics':
+            return self.metrics()
+        raise QueryError('unknown endpoint {!r}'.format(endpoint), 404)
+
+    def within(self, query):
+        if self.centres is None:
+            raise QueryError('the service was started without df_geo', 404)
+        if 'category' not in query:
+            raise QueryError('category is required')
+        try:
+            km = float(query.get('km', 1))
+        except ValueError:
+            raise QueryError('km must be a number') from None
+        if not math.isfinite(km) or km <= 0:
+            raise QueryError('km must be a positive number')
+        meters = km * 1000
+        code = self.category_codes.get(query['category'])
+        if code is None:
+            raise QueryError('unknown category {!r}'.format(query['category']), 404)
+        near, venue, _ = self.index.radius_pairs(self.centres['Latitude'].to_numpy(),
+                                                 self.centres['Longitude'].to_numpy(), meters)
+        counts = np.bincount(near[self.venue_categories[venue] == code],
+                             minlength=len(self.centres))
+        return [{'neighborhood': name, 'count': int(count)}
+                for name, count in zip(self.centres['Neighborhood'], counts)]
+
+    def metrics(self):
+        with self._lock:
+            latencies = {endpoint: np.asarray(values)
+                         for endpoint, values in self.latencies.items()}
+        lookups = self.cache.hits + self.cache.misses
+        return {'endpoints': {endpoint: {'requests': len(values),
+                                         'p50_ms': float(np.percentile(values, 50)) * 1000,
+                                         'p99_ms': float(np.percentile(values, 99)) * 1000}
+                              for endpoint, values in latencies.items() if len(values)},
+                'cache': {'entries': len(self.cache), 'hits': self.cache.hits,
+                          'misses': self.cache.misses,
+                          'hit_rate': self.cache.hits / lookups if lookups else 0.0}}
+
+
+def _integer(query, name, default, minimum=None):
+    try:
+        value = int(query.get(name, default))
+    except ValueError:
+        raise QueryError('{} must be an integer'.format(name)) from None
+    if minimum is not None and value < minimum:
+        raise QueryError('{} must be at least {}'.format(name, minimum))
+    return value
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        status, body = self.server.service.handle(url.path, query)
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def make_server(service, host='127.0.0.1', port=8000):
+    """Return a threaded HTTP server for ``service``; call ``serve_forever()`` on it."""
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    server.service = service
+    return server
@@ -0,0 +1,140 @@
+"""Local radius and nearest-neighbour queries over coordinates.
+
+Points are placed on the unit sphere and indexed with a ``scipy`` KD-tree, so
+a great-circle (haversine) distance maps exactly onto a straight-line chord
+distance and every query runs over whole arrays of points at once.  With the
+neighborhoods of ``df_geo`` and the venues returned by ``fetch_venues`` in
+an index, restaurants can be re-assigned to neighborhoods or counted at a
+different radius without calling Foursquare again.
+"""
+import numpy as np
+from scipy.spatial import cKDTree
+
+EARTH_RADIUS = 6371008.8 # mean radius, in meters
+
+
+def to_unit_vectors(latitudes, longitudes):
+    """Return the (n, 3) unit-sphere coordinates of latitude/longitude degrees."""
+    lat = np.radians(np.asarray(latitudes, dtype=float))
+    lng = np.radians(np.asarray(longitudes, dtype=float))
+    cos_lat = np.cos(lat)
+    return np.column_stack((cos_lat * np.cos(lng), cos_lat * np.sin(lng), np.sin(lat)))
+
+
+def meters_to_chord(meters):
+    return 2 * np.sin(np.asarray(meters, dtype=float) / (2 * EARTH_RADIUS))
+
+
+def chord_to_meters(chord):
+    return 2 * EARTH_RADIUS * np.arcsin(np.clip(np.asarray(chord) / 2, 0, 1))
+
+
+def haversine(lat1, lng1, lat2, lng2):
+    """Great-circle distance in meters between arrays of coordinates."""
+    lat1, lng1, lat2, lng2 = map(np.radians, (lat1, lng1, lat2, lng2))
+    a = (np.sin((lat2 - lat1) / 2) ** 2
+         + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2)
+    return 2 * EARTH_RADIUS * np.arcsin(np.sqrt(a))
+
+
+class SpatialIndex:
+    """Haversine index over a set of points.
+
+    All query methods take arrays (or scalars) of latitudes and longitudes and
+    answer for every query point in one call.  Distances are in meters and
+    returned indices are positions in the indexed arrays.
+    """
+
+    def __init__(self, latitudes, longitudes):
+        self.latitudes = np.asarray(latitudes, dtype=float)
+        self.longitudes = np.asarray(longitudes, dtype=float)
+        self.tree = cKDTree(to_unit_vectors(self.latitudes, self.longitudes))
+
+    def __len__(self):
+        return len(self.latitudes)
+
+    @classmethod
+    def from_frame(cls, df, lat='Latitude', lng='Longitude'):
+        return cls(df[lat].to_numpy(), df[lng].to_numpy())
+
+    def query_radius(self, latitudes, longitudes, radius):
+        """Return, per query point, the array of indexed points within ``radius``."""
+        points = to_unit_vectors(np.atleast_1d(latitudes), np.atleast_1d(longitudes))
+        hits = self.tree.query_ball_point(points, meters_to_chord(radius))
+        return [np.asarray(hit, dtype=np.intp) for hit in hits]
+
+    def count_radius(self, latitudes, longitudes, radius):
+        """Return the number of indexed points within ``radius`` of each query point."""
+        points = to_unit_vectors(np.atleast_1d(latitudes), np.atleast_1d(longitudes))
+        return self.tree.query_ball_point(points, meters_to_chord(radius), return_length=True)
+
+    def radius_pairs(self, latitudes, longitudes, radius):
+        """Return ``(query, point, distance)`` arrays of every pair within ``radius``."""
+        hits = self.query_radius(latitudes, longitudes, radius)
+        counts = np.fromiter((len(hit) for hit in hits), dtype=np.intp, count=len(hits))
+        query = np.repeat(np.arange(len(hits)), counts)
+        point = np.concatenate(hits) if len(hits) else np.empty(0, dtype=np.intp)
+        distance = haversine(np.atleast_1d(latitudes)[query], np.atleast_1d(longitudes)[query],
+                             self.latitudes[point], self.longitudes[point])
+        return query, point, distance
+
+    def nearest(self, latitudes, longitudes, k=1):
+        """Return the distances and indices of the ``k`` nearest points.
+
+        With ``k=1`` both arrays have one entry per query point, otherwise one
+        row per query point.
+        """
+        points = to_unit_vectors(np.atleast_1d(latitudes), np.atleast_1d(longitudes))
+        chord, index = self.tree.query(points, k=k)
+        return chord_to_meters(chord), index
+
+
+def assign_nearest(venues, neighborhoods):
+    """Tag each venue with its nearest neighborhood.
+
+    ``neighborhoods`` is ``df_geo`` (or a slice of it).  Returns a copy of
+    ``venues`` with PostalCode, Borough and Neighborhood replaced by the
+    nearest neighborhood's and a Distance column in meters.  Venues without
+    coordinates are dropped.
+    """
+    assigned = venues.dropna(subset=['Latitude', 'Longitude']).copy()
+    index = SpatialIndex.from_frame(neighborhoods)
+    distance, nearest = index.nearest(assigned['Latitude'].to_numpy(),
+                                      assigned['Longitude'].to_numpy())
+    for column in ['PostalCode', 'Borough', 'Neighborhood']:
+        if column in neighborhoods:
+            assigned[column] = neighborhoods[column].to_numpy()[nearest]
+    assigned['Distance'] = distance
+    return assigned
+
+
+def venues_within(venues, neighborhoods, radius):
+    """Return every (neighborhood, venue) pair closer than ``radius`` meters.
+
+    Lets the analysis be redone at a smaller radius than the one the venues
+    were fetched with.  Each venue appears once per neighborhood it is near;
+    the frame has the neighborhood's PostalCode, Borough and Neighborhood, the
+    venue's columns and a Distance column.
+    """
+    venues = venues.dropna(subset=['Latitude', 'Longitude']).drop_duplicates('ID')
+    venues = venues.reset_index(drop=True)
+    index = SpatialIndex.from_frame(venues)
+    near, venue, distance = index.radius_pairs(neighborhoods['Latitude'].to_numpy(),
+                                               neighborhoods['Longitude'].to_numpy(), radius)
+    pairs = venues.drop(columns=['PostalCode', 'Borough', 'Neighborhood'], errors='ignore')
+    pairs = pairs.iloc[venue]
+    pairs = pairs.reset_index(drop=True)
+    for column in ['Neighborhood', 'Borough', 'PostalCode']:
+        if column in neighborhoods:
+            pairs.insert(0, column, neighborhoods[column].to_numpy()[near])
+    pairs['Distance'] = distance
+    return pairs
+
+
+def dedupe_venues(venues, neighborhoods):
+    """Keep each venue ID once, under the neighborhood it is nearest to.
+
+    Neighborhoods a few kilometres apart return many of the same venues when
+    explored with a 5 km radius; this drops the repeats.
+    """
+    return assign_nearest(venues.drop_duplicates('ID'), neighborhoods).reset_index(drop=True)
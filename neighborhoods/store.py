@@ -0,0 +1,110 @@
+"""Columnar on-disk store for the analysis data.
+
+Frames are saved as uncompressed Arrow IPC (Feather v2) files, which can be
+memory-mapped on load so that reading them back costs almost nothing, and
+repeated string columns (boroughs, neighborhoods, categories) are dictionary
+encoded.  Category matrices are kept as their raw CSR arrays in ``.npy``
+files, memory-mapped the same way.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+from scipy import sparse
+
+from .features import CategoryMatrix
+
+STORE_DIR = 'store'
+
+#string columns with fewer distinct values than this share of rows are dictionary encoded
+DICTIONARY_RATIO = 0.5
+
+
+def dictionary_encode(frame, ratio=DICTIONARY_RATIO):
+    """Return ``frame`` with its repetitive string columns made categorical."""
+    columns = {}
+    for column, dtype in frame.dtypes.items():
+        if isinstance(dtype, pd.CategoricalDtype) or not (
+                pd.api.types.is_object_dtype(dtype) or pd.api.types.is_string_dtype(dtype)):
+            continue
+        if len(frame) and frame[column].nunique() < ratio * len(frame):
+            columns[column] = 'category'
+    return frame.astype(columns) if columns else frame
+
+
+def save_frame(frame, path):
+    """Write ``frame`` to ``path`` as an uncompressed Arrow IPC file."""
+    table = pa.Table.from_pandas(dictionary_encode(frame), preserve_index=False)
+    tmp = path + '.tmp'
+    feather.write_feather(table, tmp, compression='uncompressed')
+    os.replace(tmp, path)
+
+
+def load_frame(path, memory_map=True):
+    """Read a frame written by ``save_frame``.
+
+    With ``memory_map`` the file is mapped rather than read, and numeric
+    columns are handed to pandas without copying where Arrow allows it.
+    """
+    return feather.read_table(path, memory_map=memory_map).to_pandas()
+
+
+class Store:
+    """A directory of named frames and category matrices."""
+
+    def __init__(self, path=STORE_DIR):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+    def _file(self, name, extension='.arrow'):
+        return os.path.join(self.path, name + extension)
+
+    def __contains__(self, name):
+        return os.path.exists(self._file(name)) or os.path.isdir(self._file(name, '.matrix'))
+
+    def save(self, name, frame):
+        save_frame(frame, self._file(name))
+
+    def load(self, name, memory_map=True):
+        return load_frame(self._file(name), memory_map)
+
+    def save_matrix(self, name, matrix):
+        """Store a ``CategoryMatrix`` as CSR arrays plus its labels."""
+        directory = self._file(name, '.matrix')
+        os.makedirs(directory, exist_ok=True)
+        counts = matrix.counts
+        for part in ('data', 'indices', 'indptr'):
+            np.save(os.path.join(directory, part + '.npy'), getattr(counts, part))
+        save_frame(pd.DataFrame({'index': matrix.index.to_numpy(dtype=object)}),
+                   os.path.join(directory, 'index.arrow'))
+        save_frame(pd.DataFrame({'columns': matrix.columns.to_numpy(dtype=object)}),
+                   os.path.join(directory, 'columns.arrow'))
+        np.save(os.path.join(directory, 'shape.npy'), np.asarray(counts.shape))
+
+    def load_matrix(self, name):
+        """Load a stored ``CategoryMatrix`` with memory-mapped CSR arrays."""
+        directory = self._file(name, '.matrix')
+        arrays = [np.load(os.path.join(directory, part + '.npy'), mmap_mode='r')
+                  for part in ('data', 'indices', 'indptr')]
+        shape = tuple(np.load(os.path.join(directory, 'shape.npy')))
+        index = load_frame(os.path.join(directory, 'index.arrow'))['index']
+        columns = load_frame(os.path.join(directory, 'columns.arrow'))['columns']
+        counts = sparse.csr_matrix(tuple(arrays), shape=shape, copy=False)
+        return CategoryMatrix(counts, index.astype(object), columns.astype(object))
+
+    def cached_csv(self, csv_path, name=None, **read_csv_kwargs):
+        """Return the contents of ``csv_path``, parsing it only when it changed.
+
+        The parsed frame is stored under ``name`` (the CSV's base name by
+        default) and reused for as long as it is newer than the CSV.
+        """
+        if name is None:
+            name = os.path.splitext(os.path.basename(csv_path))[0]
+        stored = self._file(name)
+        if os.path.exists(stored) and os.path.getmtime(stored) >= os.path.getmtime(csv_path):
+            return self.load(name)
+        frame = pd.read_csv(csv_path, **read_csv_kwargs)
+        self.save(name, frame)
+        return frame
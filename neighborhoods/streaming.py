@@ -0,0 +1,132 @@
+"""Bounded-memory mode of the venue pipeline.
+
+Rather than holding ``df_geo``, every venue table and the accumulated
+restaurants in memory, neighborhoods flow through fetch -> parse -> filter ->
+aggregate a chunk at a time.  Venues are appended to a Parquet file as each
+chunk finishes and only the running category counts stay in memory, so peak
+memory depends on the chunk size, not on how many postal codes are processed.
+"""
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from .foursquare import LIMIT, RADIUS, fetch_venues
+from .profiling import stage, timed
+from .taxonomy import exclude
+
+CHUNK_SIZE = 200 # neighborhoods per chunk
+
+
+def iter_neighborhoods(source, chunk_size=CHUNK_SIZE):
+    """Yield ``df_geo`` chunks of at most ``chunk_size`` rows.
+
+    ``source`` is a ``df_geo`` frame or the path of a CSV with the same
+    columns, which is then read ``chunk_size`` rows at a time.
+    """
+    if isinstance(source, pd.DataFrame):
+        for start in range(0, len(source), chunk_size):
+            yield source.iloc[start:start + chunk_size]
+    else:
+        with pd.read_csv(source, chunksize=chunk_size) as reader:
+            yield from reader
+
+
+def iter_venues(chunks, client, radius=RADIUS, limit=LIMIT):
+    """Explore every chunk of neighborhoods and yield its venue frame."""
+    for chunk in chunks:
+        yield fetch_venues(chunk, client, radius, limit)
+
+
+def iter_filtered(frames, excluded=(), categories=None, column='Category'):
+    """Drop ``excluded`` categories (and keep only ``categories``, if given)."""
+    for frame in frames:
+        if excluded:
+            frame = exclude(frame, excluded, column=column)
+        if categories is not None:
+            frame = frame[frame[column].isin(list(categories))]
+        yield frame
+
+
+class ParquetSink:
+    """Append venue frames to one Parquet file as they arrive.
+
+    Categorical columns are written as plain strings so every chunk has the
+    same schema; Parquet dictionary-encodes them on disk anyway.  A column
+    that is all null in the first chunk has no type to infer and is written
+    as strings, the type of every such column of a venue frame.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.rows = 0
+        self._writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def write(self, frame):
+        frame = frame.astype({column: object for column, dtype in frame.dtypes.items()
+                              if isinstance(dtype, pd.CategoricalDtype)})
+        if self._writer is None:
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            schema = pa.schema([field.with_type(pa.string()) if pa.types.is_null(field.type)
+                                else field for field in table.schema],
+                               metadata=table.schema.metadata)
+            table = table.cast(schema)
+            self._writer = pq.ParquetWriter(self.path, schema)
+        else:
+            table = pa.Table.from_pandas(frame, schema=self._writer.schema, preserve_index=False)
+        self._writer.write_table(table)
+        self.rows += len(frame)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+class CountAggregator:
+    """Running venue counts per combination of the ``by`` columns.
+
+    Only one entry per group is kept, so memory grows with the number of
+    distinct groups and not with the number of venues seen.
+    """
+
+    def __init__(self, by=('Borough', 'Category')):
+        self.by = list(by)
+        self.counts = {}
+
+    def update(self, frame):
+        for key, count in frame.groupby(self.by, observed=True).size().items():
+            key = key if isinstance(key, tuple) else (key,)
+            self.counts[key] = self.counts.get(key, 0) + int(count)
+
+    def result(self):
+        """Return the counts as a frame with the ``by`` columns and ``count``."""
+        rows = [key + (count,) for key, count in self.counts.items()]
+        result = pd.DataFrame(rows, columns=self.by + ['count'])
+        return result.sort_values(self.by, ignore_index=True)
+
+
+@timed('run_streaming')
+def run_streaming(source, client, path, chunk_size=CHUNK_SIZE, excluded=(), categories=None,
+                  by=('Borough', 'Category'), radius=RADIUS, limit=LIMIT):
+    """Fetch, filter and aggregate the venues of ``source`` chunk by chunk.
+
+    The filtered venues are written to the Parquet file ``path``; the return
+    value is the frame of venue counts per ``by`` group.
+    """
+    aggregator = CountAggregator(by)
+    chunks = iter_neighborhoods(source, chunk_size)
+    frames = iter_filtered(iter_venues(chunks, client, radius, limit), excluded, categories)
+    with ParquetSink(path) as sink:
+        for frame in frames:
+            if frame.empty:
+                continue
+            with stage('write_parquet'):
+                sink.write(frame)
+            aggregator.update(frame)
+    return aggregator.result()
@@ -0,0 +1,253 @@
+"""The Foursquare category hierarchy as an integer index.
+
+Section 1.1 of the notebook excludes a list of categories and section 4 talks
+about Asian, Caribbean, European and Middle Eastern cuisine, both by comparing
+category names by hand.  A ``Taxonomy`` numbers every category once, keeps
+each one's parent and a bitset of its ancestors, and precomputes per-category
+lookup tables, so that classifying or filtering a column of venues is one
+array lookup per row whatever the number of families or excluded categories.
+
+``Taxonomy.default()`` holds the food part of the hierarchy that the analysis
+needs; ``Taxonomy.from_foursquare(client)`` loads the full one from the
+``venues/categories`` endpoint.
+"""
+import functools
+
+import numpy as np
+import pandas as pd
+
+#(name, subcategories) pairs, shaped like the Foursquare hierarchy under Food
+FOOD_CATEGORIES = ('Food', (
+    ('Afghan Restaurant', ()),
+    ('African Restaurant', (('Ethiopian Restaurant', ()),)),
+    ('American Restaurant', (('New American Restaurant', ()),)),
+    ('Asian Restaurant', (
+        ('Chinese Restaurant', (('Cantonese Restaurant', ()), ('Dim Sum Restaurant', ()),
+                                ('Dumpling Restaurant', ()), ('Hakka Restaurant', ()),
+                                ('Hong Kong Restaurant', ()), ('Szechuan Restaurant', ()),
+                                ('Noodle House', ()))),
+        ('Filipino Restaurant', ()),
+        ('Indonesian Restaurant', ()),
+        ('Japanese Restaurant', (('Ramen Restaurant', ()), ('Sushi Restaurant', ()))),
+        ('Korean Restaurant', ()),
+        ('Malay Restaurant', ()),
+        ('Taiwanese Restaurant', ()),
+        ('Thai Restaurant', ()),
+        ('Vietnamese Restaurant', ()))),
+    ('BBQ Joint', ()),
+    ('Breakfast Spot', ()),
+    ('Burger Joint', ()),
+    ('Cafeteria', ()),
+    ('Caribbean Restaurant', (('Cuban Restaurant', ()),)),
+    ('Deli / Bodega', ()),
+    ('Diner', ()),
+    ('Eastern European Restaurant', (('Polish Restaurant', ()), ('Russian Restaurant', ()),
+                                     ('Ukrainian Restaurant', ()))),
+    ('Fast Food Restaurant', ()),
+    ('Food Court', ()),
+    ('French Restaurant', ()),
+    ('German Restaurant', ()),
+    ('Greek Restaurant', ()),
+    ('Indian Restaurant', (('North Indian Restaurant', ()), ('South Indian Restaurant', ()))),
+    ('Irish Pub', ()),
+    ('Italian Restaurant', ()),
+    ('Latin American Restaurant', (('Brazilian Restaurant', ()), ('Peruvian Restaurant', ()))),
+    ('Mediterranean Restaurant', ()),
+    ('Mexican Restaurant', ()),
+    ('Middle Eastern Restaurant', (('Falafel Restaurant', ()), ('Lebanese Restaurant', ()),
+                                   ('Persian Restaurant', ()), ('Turkish Restaurant', ()))),
+    ('Pakistani Restaurant', ()),
+    ('Pizza Place', ()),
+    ('Portuguese Restaurant', ()),
+    ('Pub', ()),
+    ('Restaurant', ()),
+    ('Sandwich Place', ()),
+    ('Seafood Restaurant', ()),
+    ('Spanish Restaurant', ()),
+    ('Sri Lankan Restaurant', ()),
+    ('Steakhouse', ()),
+    ('Wings Joint', ()),
+))
+
+#section 1.1: places that do not project any cuisine in particular
+EXCLUDED_CATEGORIES = (
+    'Fast Food Restaurant',
+    'Food Court',
+    'Pizza Place',
+    'Sandwich Place',
+    'Pub',
+    'BBQ Joint',
+    'Diner',
+    'Breakfast Spot',
+    'Cafeteria',
+    'Restaurant',
+    'Asian Restaurant',
+)
+
+#cuisine families of section 4, by the categories (and their subcategories) they cover
+CUISINE_FAMILIES = {
+    'Asian': ('Asian Restaurant', 'Indian Restaurant', 'Pakistani Restaurant',
+              'Sri Lankan Restaurant', 'Afghan Restaurant'),
+    'Caribbean': ('Caribbean Restaurant',),
+    'European': ('Eastern European Restaurant', 'French Restaurant', 'German Restaurant',
+                 'Italian Restaurant', 'Portuguese Restaurant', 'Spanish Restaurant',
+                 'Irish Pub'),
+    'Mediterranean': ('Mediterranean Restaurant', 'Greek Restaurant'),
+    'Middle Eastern': ('Middle Eastern Restaurant',),
+    'American': ('American Restaurant', 'Burger Joint', 'Steakhouse', 'Wings Joint'),
+    'Latin American': ('Latin American Restaurant', 'Mexican Restaurant'),
+    'African': ('African Restaurant',),
+}
+
+
+class Taxonomy:
+    """Categories numbered 0..n-1 with parent pointers and ancestor bitsets.
+
+    ``parents[i]`` is the ID of category ``i``'s parent (-1 for a root) and
+    bit ``j`` of ``ancestors[i]`` (an ``(n, ceil(n / 64))`` uint64 array) is
+    set when ``j`` is ``i`` or one of its ancestors.  Parents must come before
+    their children.
+    """
+
+    def __init__(self, names, parents):
+        self.names = np.asarray(names, dtype=object)
+        self.parents = np.asarray(parents, dtype=np.intp)
+        self.ids = {name: i for i, name in enumerate(self.names)}
+        count = len(self.names)
+        self.depth = np.zeros(count, dtype=np.intp)
+        self.ancestors = np.zeros((count, max(1, -(-count // 64))), dtype=np.uint64)
+        for i, parent in enumerate(self.parents):
+            if parent >= i:
+                raise ValueError('parent of {!r} comes after it'.format(self.names[i]))
+            if parent >= 0:
+                self.ancestors[i] = self.ancestors[parent]
+                self.depth[i] = self.depth[parent] + 1
+            self.ancestors[i, i // 64] |= np.uint64(1) << np.uint64(i % 64)
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self.ids
+
+    @classmethod
+    def from_tree(cls, categories):
+        """Build from nested ``{'name': ..., 'categories': [...]}`` dicts or
+        ``(name, subcategories)`` pairs, the format of ``FOOD_CATEGORIES``."""
+        names, parents, seen = [], [], set()
+        stack = [(category, -1) for category in reversed(list(categories))]
+        while stack:
+            category, parent = stack.pop()
+            if isinstance(category, dict):
+                name, children = category['name'], category.get('categories', ())
+            else:
+                name, children = category
+            if name in seen:
+                continue
+            seen.add(name)
+            names.append(name)
+            parents.append(parent)
+            stack.extend((child, len(names) - 1) for child in reversed(list(children)))
+        return cls(names, parents)
+
+    @classmethod
+    def from_foursquare(cls, client):
+        """Load the full hierarchy from the ``venues/categories`` endpoint."""
+        return cls.from_tree(client.get('categories')['response']['categories'])
+
+    @classmethod
+    @functools.lru_cache(maxsize=None)
+    def default(cls):
+        """The built-in food hierarchy, ``FOOD_CATEGORIES``."""
+        return cls.from_tree([FOOD_CATEGORIES])
+
+    def codes(self, values):
+        """Return the category ID of every value; -1 for unknown or missing ones.
+
+        The names are looked up once per distinct value, not once per row.
+        """
+        values = pd.Categorical(values)
+        table = np.fromiter((self.ids.get(name, -1) for name in values.categories),
+                            dtype=np.intp, count=len(values.categories))
+        table = np.append(table, -1) # code -1 (missing) reads the last entry
+        return table[values.codes]
+
+    def _lookup(self, table, values):
+        """Index a per-category ``table`` by ``values``; unknown values read ``table[-1]``."""
+        ids = self.codes(values)
+        return table[np.where(ids >= 0, ids, len(table) - 1)]
+
+    def bitset(self, names):
+        """Return the ``ancestors``-shaped bitset with the bits of ``names`` set."""
+        bits = np.zeros(self.ancestors.shape[1], dtype=np.uint64)
+        for name in names:
+            i = self.ids[name]
+            bits[i // 64] |= np.uint64(1) << np.uint64(i % 64)
+        return bits
+
+    def covered(self, names):
+        """Per category: whether it is one of ``names`` or below one of them."""
+        return (self.ancestors & self.bitset(names)).any(axis=1)
+
+    def descends_from(self, values, names):
+        """Whether each value is one of the categories ``names`` or a subcategory."""
+        return self._lookup(np.append(self.covered(names), False), values)
+
+    def family_table(self, families=CUISINE_FAMILIES):
+        """Per category, the index in ``families`` of the family it belongs to (-1 if none).
+
+        When a category falls under several families the deepest family root
+        wins, so a subcategory can be given a family of its own.
+        """
+        table = np.full(len(self), -1, dtype=np.intp)
+        depth = np.full(len(self), -1, dtype=np.intp)
+        for index, roots in enumerate(families.values()):
+            roots = [root for root in roots if root in self.ids]
+            for root in roots:
+                member = self.covered([root]) & (depth < self.depth[self.ids[root]])
+                table[member] = index
+                depth[member] = self.depth[self.ids[root]]
+        return table
+
+    def classify(self, values, families=CUISINE_FAMILIES):
+        """Return the cuisine family of every value as a categorical (NaN if none)."""
+        table = np.append(self.family_table(families), -1)
+        return pd.Categorical.from_codes(self._lookup(table, values), list(families))
+
+
+def add_families(venues, taxonomy=None, column='Category', families=CUISINE_FAMILIES,
+                 name='Cuisine'):
+    """Return a copy of ``venues`` with the cuisine family of ``column`` in ``name``."""
+    taxonomy = taxonomy if taxonomy is not None else Taxonomy.default()
+    venues = venues.copy()
+    venues[name] = taxonomy.classify(venues[column], families)
+    return venues
+
+
+def is_excluded(values, names, taxonomy=None, subcategories=False):
+    """Whether each of ``values`` is one of the ``names`` categories.
+
+    By default only the named categories themselves match (Asian Restaurant,
+    say, but not Chinese Restaurant); with ``subcategories`` everything below
+    them matches too.  Categories the taxonomy does not know are matched by
+    name.
+    """
+    taxonomy = taxonomy if taxonomy is not None else Taxonomy.default()
+    known = [name for name in names if name in taxonomy]
+    if subcategories:
+        mask = taxonomy.descends_from(values, known)
+    else:
+        table = np.zeros(len(taxonomy) + 1, dtype=bool)
+        table[[taxonomy.ids[name] for name in known]] = True
+        mask = taxonomy._lookup(table, values)
+    unknown = [name for name in names if name not in taxonomy]
+    if unknown:
+        mask |= pd.Index(values).isin(unknown)
+    return mask
+
+
+def exclude(venues, names=EXCLUDED_CATEGORIES, taxonomy=None, column='Category',
+            subcategories=False):
+    """Drop the venues whose ``column`` is one of the ``names`` categories (see
+    ``is_excluded``); by default the categories section 1.1 leaves out."""
+    return venues[~is_excluded(venues[column], names, taxonomy, subcategories)]
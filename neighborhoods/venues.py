@@ -0,0 +1,49 @@
+"""Refining the raw Foursquare search results (section 3.7 of the notebook)."""
+import pandas as pd
+
+from .profiling import timed
+
+
+@timed('filter_venues')
+def filter_venues(venues, location_fields=None):
+    """Keep the name, category, location fields and id of searched venues.
+
+    ``venues`` is the raw ``response.venues`` list of a search request, or any
+    iterable of venue dicts.  Each venue is read once and only the wanted
+    fields are copied into column lists, so the wide ``json_normalize`` frame
+    of the notebook is never built and no per-row ``apply`` is needed.  The
+    columns are named after the last part of their dotted name, so
+    ``location.lat`` becomes ``lat``; ``categories`` holds the name of the
+    first category, or None.  ``location_fields`` restricts the location
+    columns to the given keys (by default every key seen is kept).
+    """
+    names, categories, ids = [], [], []
+    location = {}
+    count = 0
+    for venue in venues:
+        names.append(venue.get('name'))
+        categories_list = venue.get('categories')
+        categories.append(categories_list[0]['name'] if categories_list else None)
+        ids.append(venue.get('id'))
+
+        for key, value in venue.get('location', {}).items():
+            column = location.get(key)
+            if column is None:
+                if location_fields is not None and key not in location_fields:
+                    continue
+                #venues before this one did not have the field
+                column = location[key] = [None] * count
+            column.append(value)
+        count += 1
+        for column in location.values():
+            if len(column) < count:
+                column.append(None)
+
+    columns = {'name': names, 'categories': categories}
+    if location_fields is not None:
+        for key in location_fields:
+            columns[key] = location.get(key, [None] * count)
+    else:
+        columns.update(location)
+    columns['id'] = ids
+    return pd.DataFrame(columns, columns=list(columns))
@@ -0,0 +1,77 @@
+import pytest
+
+from neighborhoods import cache as cache_module
+from neighborhoods.cache import ResponseCache
+
+
+class Clock:
+
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache_module.time, 'time', clock)
+    return clock
+
+
+def test_entries_expire_after_the_ttl(tmp_path, clock):
+    with ResponseCache(str(tmp_path / 'cache.sqlite'), ttl=60) as cache:
+        cache.set('a', {'x': 1})
+        clock.now += 59
+        assert cache.get('a') == {'x': 1}
+        clock.now += 2
+        assert cache.get('a') is None
+        assert len(cache) == 0
+
+
+def test_evicts_the_least_recently_used_entry(tmp_path, clock):
+    with ResponseCache(str(tmp_path / 'cache.sqlite'), max_entries=3) as cache:
+        for key in 'abc':
+            cache.set(key, key)
+            clock.now += 1
+        #'a' is read last, so 'b' is now the least recently used
+        cache.get('a')
+        clock.now += 1
+        cache.set('d', 'd')
+        assert len(cache) == 3
+        assert cache.get('b') is None
+        assert [cache.get(key) for key in 'acd'] == ['a', 'c', 'd']
+
+
+def test_replacing_a_key_does_not_evict(tmp_path, clock):
+    with ResponseCache(str(tmp_path / 'cache.sqlite'), max_entries=2) as cache:
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.set('b', 3)
+        assert len(cache) == 2
+        assert cache.get('a') == 1 and cache.get('b') == 3
+
+
+def test_access_times_survive_reopening(tmp_path, clock):
+    path = str(tmp_path / 'cache.sqlite')
+    with ResponseCache(path) as cache:
+        cache.set('a', 1)
+        cache.set('b', 2)
+        clock.now += 10
+        cache.get('a')
+    with ResponseCache(path, max_entries=2) as cache:
+        assert len(cache) == 2
+        clock.now += 1
+        cache.set('c', 3)
+        assert cache.get('b') is None
+        assert cache.get('a') == 1
+
+
+def test_counts_hits_and_misses(tmp_path, clock):
+    with ResponseCache(str(tmp_path / 'cache.sqlite')) as cache:
+        cache.set('a', 1)
+        cache.get('a')
+        cache.get('a')
+        cache.get('b')
+        assert cache.stats() == {'hits': 2, 'misses': 1, 'hit_rate': 2 / 3, 'entries': 1}
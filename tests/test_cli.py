@@ -0,0 +1,10 @@
+import pytest
+
+from neighborhoods.cli import main
+
+
+def test_trace_memory_needs_an_output(capsys):
+    with pytest.raises(SystemExit) as excinfo:
+        main(['--trace-memory', 'geo'])
+    assert excinfo.value.code == 2
+    assert '--trace-memory needs --profile or --trace' in capsys.readouterr().err
@@ -0,0 +1,48 @@
+import numpy as np
+
+from neighborhoods.clustering import (cluster_labels, cluster_neighborhoods, load_centroids,
+                                      save_centroids)
+from neighborhoods.features import CategoryMatrix
+
+
+def matrix(columns=('Bar', 'Cafe', 'Pub'), seed=0, rows=60):
+    rng = np.random.default_rng(seed)
+    #three groups of neighborhoods, each dominated by one category
+    counts = rng.integers(0, 2, size=(rows, len(columns)))
+    counts[np.arange(rows), np.arange(rows) % len(columns)] += 20
+    return CategoryMatrix(counts, ['N%d' % i for i in range(rows)], list(columns))
+
+
+def test_load_centroids_realigns_to_the_current_categories(tmp_path):
+    path = str(tmp_path / 'centroids.npz')
+    old = matrix(['Bar', 'Cafe', 'Pub'])
+    model = cluster_neighborhoods(old, k=3)
+    save_centroids(model, old, path)
+
+    new = matrix(['Cafe', 'Diner', 'Bar'])
+    centroids = load_centroids(new, path)
+    assert centroids.shape == (3, 3)
+    np.testing.assert_array_equal(centroids[:, 0], model.cluster_centers_[:, 1])
+    np.testing.assert_array_equal(centroids[:, 1], 0.0)
+    np.testing.assert_array_equal(centroids[:, 2], model.cluster_centers_[:, 0])
+
+
+def test_load_centroids_without_a_file(tmp_path):
+    assert load_centroids(matrix(), str(tmp_path / 'missing.npz')) is None
+
+
+def test_labels_are_stable_on_a_seeded_input():
+    first = cluster_labels(matrix(), cluster_neighborhoods(matrix(), k=3, random_state=0))
+    second = cluster_labels(matrix(), cluster_neighborhoods(matrix(), k=3, random_state=0))
+    assert first.equals(second)
+    #the three planted groups are recovered
+    groups = np.arange(60) % 3
+    assert len(set(zip(groups, first['Cluster Labels']))) == 3
+
+
+def test_seeded_from_stored_centroids_keeps_the_labels(tmp_path):
+    path = str(tmp_path / 'centroids.npz')
+    model = cluster_neighborhoods(matrix(), k=3)
+    save_centroids(model, matrix(), path)
+    refit = cluster_neighborhoods(matrix(), init=load_centroids(matrix(), path))
+    np.testing.assert_array_equal(refit.labels_, model.labels_)
@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+
+from benchmarks.stubs import FoursquareStub
+from benchmarks.synthetic import VenueField
+from neighborhoods.coverage import explore_coverage
+from neighborhoods.foursquare import FoursquareClient
+from neighborhoods.spatial import SpatialIndex
+
+
+def neighborhoods(lats, lngs):
+    return pd.DataFrame({'PostalCode': ['M%dA' % i for i in range(len(lats))],
+                         'Borough': 'Borough',
+                         'Neighborhood': ['Neighborhood %d' % i for i in range(len(lats))],
+                         'Latitude': lats,
+                         'Longitude': lngs})
+
+
+def explore(field, df_geo, **kwargs):
+    with FoursquareStub(field) as stub, \
+            FoursquareClient('id', 'secret', base_url=stub.url, max_workers=4) as client:
+        return explore_coverage(df_geo, client, **kwargs), stub.requests
+
+
+def test_splits_saturated_cells_and_keeps_each_venue_once():
+    rng = np.random.default_rng(0)
+    df_geo = neighborhoods([43.70, 43.71], [-79.40, -79.39])
+    lat = 43.705 + rng.normal(0, 0.004, 600)
+    lng = -79.395 + rng.normal(0, 0.004, 600)
+    field = VenueField(lat, lng, np.zeros(600, dtype=int))
+    result, requests = explore(field, df_geo, radius=2000, limit=50, margin=500,
+                               min_radius=100)
+    queries, venues = result['queries'], result['venues']
+    assert len(queries) == requests
+    assert queries['Saturated'].iloc[:2].all()
+    assert queries['Depth'].max() >= 2
+    assert venues['ID'].is_unique
+    assert queries['Items'].sum() > len(venues)
+    near = SpatialIndex.from_frame(df_geo).nearest(lat, lng)[0] <= 500
+    assert {'v%d' % i for i in np.flatnonzero(near)} <= set(venues['ID'])
+
+
+def test_sparse_area_needs_no_more_requests_than_the_centroids():
+    df_geo = neighborhoods([43.65, 43.72, 43.80], [-79.50, -79.35, -79.20])
+    result, requests = explore(VenueField.random(300), df_geo, radius=2000, limit=100)
+    assert not result['queries']['Saturated'].any()
+    assert requests <= len(df_geo)
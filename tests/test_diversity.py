@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from neighborhoods.diversity import bootstrap_diversity, compare_diversity
+from neighborhoods.features import CategoryMatrix
+
+
+def test_basic_interval_covers_the_true_index():
+    rng = np.random.default_rng(5)
+    p = rng.dirichlet(np.full(30, 2.0))
+    shannon = -(p * np.log(p)).sum()
+    counts = rng.multinomial(150, p, size=200)
+    matrix = CategoryMatrix(sparse.csr_matrix(counts), pd.RangeIndex(200), pd.RangeIndex(30))
+    result = bootstrap_diversity(matrix, replicates=500)
+    covered = (result['shannon_low'] <= shannon) & (shannon <= result['shannon_high'])
+    assert covered.mean() > 0.88
+    #the plug-in estimate is biased low; the correction moves it up
+    assert (result['shannon_corrected'] > result['shannon']).all()
+    assert result['shannon'].mean() < shannon
+
+
+def test_interval_is_centred_on_the_corrected_estimate():
+    rng = np.random.default_rng(1)
+    counts = rng.multinomial(20000, np.full(40, 1 / 40), size=3)
+    matrix = CategoryMatrix(sparse.csr_matrix(counts), pd.RangeIndex(3), pd.RangeIndex(40))
+    result = bootstrap_diversity(matrix, replicates=500)
+    for name in ('shannon', 'simpson'):
+        assert (result[name + '_low'] <= result[name + '_corrected']).all()
+        assert (result[name + '_corrected'] <= result[name + '_high']).all()
+    assert (result['shannon_low'] <= np.log(40)).all()
+    assert (result['richness_low'] >= result['richness']).all()
+
+
+def test_groups_with_only_excluded_categories_are_kept():
+    venues = pd.DataFrame({'Borough': ['A', 'A', 'A', 'B', 'B'],
+                           'Category': ['Thai Restaurant', 'Pizza Place', 'Sushi Restaurant',
+                                        'Pizza Place', 'Pub']})
+    result = compare_diversity(venues, replicates=50)
+    assert list(result.index) == ['A', 'B']
+    assert result.loc['B', ['venues', 'richness', 'shannon', 'simpson']].tolist() == [0, 0, 0, 0]
+    assert result.loc['B', ['shannon_low', 'shannon_high']].tolist() == [0, 0]
+    assert result.loc['A', 'richness'] == 2
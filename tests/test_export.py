@@ -0,0 +1,37 @@
+import pandas as pd
+import pytest
+
+from neighborhoods.export import Artifact, export
+
+
+def artifacts(pizza=3):
+    points = pd.DataFrame({'Latitude': [43.70, 43.71], 'Longitude': [-79.40, -79.41],
+                           'Name': ['A', 'B']})
+    return [Artifact('chart', 'Popular cuisines in York',
+                     pd.Series([1, pizza], index=['Cafe', 'Pizza Place']), template='cuisines'),
+            Artifact('chart', 'Popular cuisines in Etobicoke',
+                     pd.Series([2, 5], index=['Bar', 'Pub']), template='cuisines'),
+            Artifact('map', 'York map', points)]
+
+
+def statuses(result):
+    return dict(zip(result['name'], result['status']))
+
+
+def test_second_export_only_renders_changed_artifacts(tmp_path):
+    directory = str(tmp_path)
+    first = export(artifacts(), directory, max_workers=1)
+    assert set(first['status']) == {'rendered'}
+    assert set(export(artifacts(), directory, max_workers=1)['status']) == {'unchanged'}
+    assert statuses(export(artifacts(pizza=4), directory, max_workers=1)) == {
+        'Popular cuisines in York': 'rendered',
+        'Popular cuisines in Etobicoke': 'unchanged',
+        'York map': 'unchanged'}
+
+
+def test_colliding_file_names_are_rejected(tmp_path):
+    series = pd.Series([1], index=['Cafe'])
+    clashing = [Artifact('chart', 'St. James Town', series),
+                Artifact('chart', 'St James Town', series)]
+    with pytest.raises(ValueError, match='st_james_town.png'):
+        export(clashing, str(tmp_path), max_workers=1)
@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from neighborhoods.features import CategoryMatrix, most_common_venues, top_categories
+
+
+def reference(matrix, n):
+    """Rank every row with a stable sort: descending count, then column order."""
+    dense = matrix.counts.toarray()
+    names = matrix.columns.to_numpy(dtype=object)
+    labels = np.full((len(dense), n), None, dtype=object)
+    for i, row in enumerate(dense):
+        order = np.argsort(-row, kind='stable')[:n]
+        order = order[row[order] > 0]
+        labels[i, :len(order)] = names[order]
+    return labels
+
+
+def test_ties_are_broken_by_column_order():
+    rng = np.random.default_rng(0)
+    #small counts over many columns, so most rows have ties at the n-th place
+    dense = rng.integers(0, 4, size=(500, 60)) * (rng.random((500, 60)) < 0.3)
+    matrix = CategoryMatrix(sparse.csr_matrix(dense), pd.Index(['n%d' % i for i in range(500)]),
+                            pd.Index(['c%d' % j for j in range(60)]))
+    for n in (1, 5, 10, 40):
+        labels, values = top_categories(matrix, n)
+        assert (labels == reference(matrix, n)).all()
+        assert (np.diff(values, axis=1) <= 0).all()
+
+
+def test_unsorted_indices_and_short_rows():
+    counts = sparse.csr_matrix((np.array([2, 2, 1, 3]), np.array([2, 0, 1, 1]),
+                                np.array([0, 3, 4, 4])), shape=(3, 3))
+    assert not counts.has_sorted_indices
+    matrix = CategoryMatrix(counts, pd.Index(['a', 'b', 'c']), pd.Index(['x', 'y', 'z']))
+    labels, values = top_categories(matrix, 2)
+    assert labels.tolist() == [['x', 'z'], ['y', None], [None, None]]
+    assert values.tolist() == [[2, 2], [3, 0], [0, 0]]
+
+
+def test_most_common_venues_columns():
+    venues = pd.DataFrame({'Neighborhood': ['A', 'A', 'A', 'B'],
+                           'Category': ['Pub', 'Cafe', 'Pub', 'Park']})
+    frame = most_common_venues(CategoryMatrix.from_venues(venues), n=2)
+    assert list(frame.columns) == ['Neighborhood', '1st Most Common Venue',
+                                   '2nd Most Common Venue']
+    assert frame.iloc[0].tolist() == ['A', 'Pub', 'Cafe']
+    assert frame.iloc[1, :2].tolist() == ['B', 'Park'] and pd.isna(frame.iloc[1, 2])
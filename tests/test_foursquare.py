@@ -0,0 +1,92 @@
+import time
+
+import pandas as pd
+import pytest
+import requests
+
+from benchmarks.stubs import FoursquareStub, StubServer
+from benchmarks.synthetic import VenueField
+from neighborhoods.foursquare import FoursquareClient, fetch_venues, venue_rows
+
+
+class FlakyStub(StubServer):
+    """Answers ``statuses`` in turn, then an empty explore response."""
+
+    def __init__(self, statuses, headers=None, latency=0.0):
+        self.statuses = list(statuses)
+        self.headers = headers or {}
+        super().__init__(latency)
+
+    def handle(self, path, query, headers):
+        with self.lock:
+            status = self.statuses.pop(0) if self.statuses else 200
+        if status != 200:
+            return status, 'application/json', b'{}', self.headers
+        return self.json({'meta': {'code': 200},
+                          'response': {'groups': [{'items': []}]}})
+
+
+def client_for(stub, **kwargs):
+    kwargs.setdefault('backoff', 0.01)
+    return FoursquareClient('id', 'secret', base_url=stub.url, **kwargs)
+
+
+def test_retries_rate_limited_and_server_errors():
+    with FlakyStub([429, 503]) as stub, client_for(stub) as client:
+        assert client.explore(43.7, -79.4) == []
+        assert stub.requests == 3
+
+
+def test_honours_retry_after():
+    with FlakyStub([429], {'Retry-After': '0.2'}) as stub, client_for(stub) as client:
+        start = time.perf_counter()
+        client.explore(43.7, -79.4)
+        assert time.perf_counter() - start >= 0.2
+
+
+def test_gives_up_after_max_retries():
+    with FlakyStub([500] * 5) as stub, client_for(stub, max_retries=2) as client:
+        with pytest.raises(requests.HTTPError):
+            client.explore(43.7, -79.4)
+        assert stub.requests == 3
+
+
+def test_client_errors_are_not_retried():
+    with FlakyStub([400]) as stub, client_for(stub) as client:
+        with pytest.raises(requests.HTTPError):
+            client.explore(43.7, -79.4)
+        assert stub.requests == 1
+
+
+def test_timeouts_are_retried_then_raised():
+    with FlakyStub([], latency=0.3) as stub, \
+            client_for(stub, timeout=0.05, max_retries=1) as client:
+        with pytest.raises(requests.Timeout):
+            client.explore(43.7, -79.4)
+        assert stub.requests == 2
+
+
+def test_fetch_venues_tags_every_neighborhood():
+    field = VenueField.random(2000)
+    neighborhoods = pd.DataFrame({'PostalCode': ['M1A', 'M1B', 'M1C'],
+                                  'Borough': ['Scarborough'] * 3,
+                                  'Neighborhood': ['A', 'B', 'C'],
+                                  'Latitude': [43.70, 43.75, 43.80],
+                                  'Longitude': [-79.40, -79.30, -79.20]})
+    with FoursquareStub(field) as stub, client_for(stub, max_workers=2) as client:
+        venues = fetch_venues(neighborhoods, client, radius=2000, limit=20)
+        expected = [venue_rows(field.explore(lat, lng, 2000, 20))
+                    for lat, lng in zip(neighborhoods['Latitude'], neighborhoods['Longitude'])]
+    assert len(venues) == sum(len(rows) for rows in expected)
+    counts = venues.groupby('Neighborhood', observed=True).size()
+    assert counts.to_dict() == {name: len(rows) for name, rows in zip('ABC', expected) if rows}
+    assert list(venues['PostalCode'].unique()) == [code for code, rows
+                                                   in zip(neighborhoods['PostalCode'], expected)
+                                                   if rows]
+
+
+def test_venue_rows_skips_venues_without_category():
+    items = [{'venue': {'id': '1', 'name': 'A', 'categories': [{'name': 'Pub'}],
+                        'location': {'lat': 1.0, 'lng': 2.0}}},
+             {'venue': {'id': '2', 'name': 'B', 'categories': []}}]
+    assert venue_rows(items) == [['1', 'A', 'Pub', 1.0, 2.0]]
@@ -0,0 +1,49 @@
+import os
+
+import pandas as pd
+import pytest
+
+from neighborhoods.cache import ResponseCache
+from neighborhoods.geocode import GEOCODE_CACHE_PATH, Gazetteer, Geocoder
+
+
+@pytest.fixture
+def gazetteer():
+    df_geo = pd.DataFrame({'Borough': ['York', 'York', 'Scarborough'],
+                           'Latitude': [43.68, 43.70, 43.77],
+                           'Longitude': [-79.49, -79.47, -79.23]})
+    return Gazetteer.from_df_geo(df_geo)
+
+
+def test_matches_with_and_without_region_suffixes(gazetteer):
+    york = gazetteer.get('York')
+    assert york == pytest.approx((43.69, -79.48))
+    assert gazetteer.get('york, ON') == york
+    assert gazetteer.get('York,  Toronto, Ontario') == york
+    assert gazetteer.get('Toronto, ON') == pytest.approx((43.7166667, -79.3966667))
+
+
+def test_other_places_with_the_same_name_are_not_matched(gazetteer):
+    assert gazetteer.get('York, UK') is None
+    assert gazetteer.get('York, PA, USA') is None
+    assert gazetteer.get('Scarborough, North Yorkshire, England') is None
+
+
+def test_default_cache_is_opened_lazily(gazetteer, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    with Geocoder(gazetteer, online=False) as geocode:
+        geocode('Scarborough, ON')
+        assert not os.path.exists(GEOCODE_CACHE_PATH)
+        with pytest.raises(LookupError):
+            geocode('York, UK')
+        assert os.path.exists(GEOCODE_CACHE_PATH)
+    assert geocode._cache is None
+
+
+def test_given_cache_is_left_open(gazetteer, tmp_path):
+    cache = ResponseCache(str(tmp_path / 'geocode.sqlite'), ttl=None)
+    with Geocoder(gazetteer, cache=cache, online=False) as geocode:
+        with pytest.raises(LookupError):
+            geocode('Kingston, ON')
+    assert len(cache) == 0
+    cache.close()
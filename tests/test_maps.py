@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from neighborhoods.maps import ZoomSwitch, grid_bins, venue_map
+
+
+@pytest.fixture
+def points():
+    rng = np.random.default_rng(0)
+    return 43.7 + rng.random(40) * 0.1, -79.4 + rng.random(40) * 0.1
+
+
+def render(*args, **kwargs):
+    return venue_map(*args, **kwargs).get_root().render()
+
+
+@pytest.mark.parametrize('mode', ['cluster', 'geojson'])
+def test_grid_and_points_swap_on_zoom(points, mode):
+    map_ = venue_map(*points, mode=mode, cell_size=0.01, detail_zoom=13)
+    switch, = [child for child in map_._children.values() if isinstance(child, ZoomSwitch)]
+    page = map_.get_root().render()
+    assert 'map.getZoom() >= 13' in page
+    assert 'var overview = {};'.format(switch.overview.get_name()) in page
+    assert 'var detail = {};'.format(switch.detail.get_name()) in page
+    assert 'L.control.layers' not in page
+
+
+def test_points_only_without_cell_size(points):
+    page = render(*points, mode='geojson')
+    assert 'getZoom' not in page
+
+
+def test_unlabelled_geojson_points_get_no_popup(points):
+    assert 'bindPopup' not in render(*points, mode='geojson')
+
+
+def test_popups_only_for_labelled_points(points):
+    labels = ['<b>Pub</b>'] * 20 + [None] * 20
+    page = render(*points, labels, mode='geojson')
+    assert 'if (feature.properties.label)' in page
+    assert '\\u0026lt;b\\u0026gt;Pub' in page
+
+
+def test_grid_bins_counts_every_point(points):
+    south, west, counts = grid_bins(*points, cell_size=0.05)
+    assert counts.sum() == 40
+    assert len(south) == len(west) == len(counts) <= 9
+
+
+def test_grid_bins_skip_missing_coordinates():
+    south, west, counts = grid_bins([43.705, np.nan, 43.705, np.inf], [-79.405, -79.4, np.nan,
+                                                                      -79.4], cell_size=0.01)
+    assert counts.tolist() == [1]
+    assert south.tolist() == pytest.approx([43.70])
+
+
+@pytest.mark.parametrize('mode', ['cluster', 'geojson'])
+def test_points_without_coordinates_are_dropped(points, mode):
+    latitudes, longitudes = points[0].copy(), points[1].copy()
+    latitudes[3] = np.nan
+    longitudes[7] = np.nan
+    labels = ['venue %d' % i for i in range(40)]
+    page = render(latitudes, longitudes, labels, mode=mode, cell_size=0.01)
+    assert 'NaN' not in page
+    assert '"venue 3"' not in page and '"venue 7"' not in page
+    assert '"venue 4"' in page and '"venue 8"' in page
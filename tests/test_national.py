@@ -0,0 +1,62 @@
+import os
+
+import pandas as pd
+import pytest
+
+from benchmarks.stubs import WikipediaStub
+from benchmarks.synthetic import coordinates_frame, postal_table
+from neighborhoods.postal import read_national
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+
+def read_fixture(name):
+    with open(os.path.join(FIXTURES, name), encoding='utf-8') as f:
+        return f.read()
+
+
+def coordinates(letters):
+    return coordinates_frame(50, letters=letters).rename(columns={'Postal Code': 'PostalCode'})
+
+
+def test_reads_every_letter():
+    pages = {letter: postal_table(50, seed=i, letter=letter) for i, letter in enumerate('KLM')}
+    with WikipediaStub(pages) as stub:
+        df_geo = read_national(coordinates('KLM'), 'KLM', url=stub.url_template)
+    assert set(df_geo['PostalCode'].str[0]) == set('KLM')
+    assert not df_geo['PostalCode'].duplicated().any()
+
+
+def grid_coordinates():
+    codes = ['L1B', 'L1C', 'L1E', 'L1G', 'L1H', 'L1J', 'L1L', 'L1M']
+    return pd.DataFrame({'PostalCode': codes,
+                         'Latitude': [43.9 + 0.01 * i for i in range(len(codes))],
+                         'Longitude': [-78.8 + 0.01 * i for i in range(len(codes))]})
+
+
+def test_reads_grid_layout_page():
+    pages = {'M': postal_table(50), 'L': read_fixture('postal_codes_grid.html')}
+    with WikipediaStub(pages) as stub:
+        df_geo = read_national(pd.concat([coordinates('M'), grid_coordinates()]), 'ML',
+                               url=stub.url_template)
+    grid = df_geo[df_geo['PostalCode'].str[0] == 'L'].set_index('PostalCode')
+    assert list(grid.index) == ['L1B', 'L1C', 'L1E', 'L1G', 'L1H', 'L1J', 'L1L', 'L1M']
+    assert grid.loc['L1B', ['Borough', 'Neighborhood']].tolist() == ['Clarington', 'Bowmanville']
+    assert grid.loc['L1M', ['Borough', 'Neighborhood']].tolist() == ['Whitby', 'Brooklin']
+    assert set(df_geo['PostalCode'].str[0]) == set('LM')
+
+
+def test_page_without_table_is_skipped_with_a_warning():
+    pages = {'M': postal_table(50), 'K': '<html><body><p>moved</p></body></html>'}
+    with WikipediaStub(pages) as stub:
+        with pytest.warns(UserWarning, match='postal code page K'):
+            df_geo = read_national(coordinates('KM'), 'MK', url=stub.url_template)
+    assert set(df_geo['PostalCode'].str[0]) == {'M'}
+
+
+def test_warns_about_postal_codes_without_coordinates():
+    pages = {letter: postal_table(50, seed=i, letter=letter) for i, letter in enumerate('LM')}
+    with WikipediaStub(pages) as stub:
+        with pytest.warns(UserWarning, match=r'postal codes \(L\) have no coordinates'):
+            df_geo = read_national(coordinates('M'), 'LM', url=stub.url_template)
+    assert set(df_geo['PostalCode'].str[0]) == {'M'}
@@ -0,0 +1,72 @@
+import logging
+import threading
+import time
+
+import pandas as pd
+
+from benchmarks.stubs import FoursquareStub
+from benchmarks.synthetic import VenueField
+from neighborhoods.collector import COLUMNS
+from neighborhoods.foursquare import FoursquareClient
+from neighborhoods.pipeline import analyze_boroughs
+
+
+class CountingStub(FoursquareStub):
+    """Records the largest number of requests it was answering at once."""
+
+    def __init__(self, field, hold=0.02):
+        self.hold = hold
+        self.active = 0
+        self.peak = 0
+        self._active_lock = threading.Lock()
+        super().__init__(field)
+
+    def handle(self, path, query, headers):
+        with self._active_lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            time.sleep(self.hold)
+            return super().handle(path, query, headers)
+        finally:
+            with self._active_lock:
+                self.active -= 1
+
+
+def df_geo(boroughs, per_borough):
+    rows = [('M%d%s' % (b, chr(65 + n)), 'Borough %d' % b, 'Neighborhood %d-%d' % (b, n),
+             43.6 + 0.05 * b, -79.5 + 0.02 * n)
+            for b in range(boroughs) for n in range(per_borough)]
+    return pd.DataFrame(rows, columns=['PostalCode', 'Borough', 'Neighborhood', 'Latitude',
+                                       'Longitude'])
+
+
+def test_requests_in_flight_stay_within_the_client_limit(caplog):
+    with CountingStub(VenueField.random(5000)) as stub, \
+            FoursquareClient('id', 'secret', base_url=stub.url, max_workers=3) as client:
+        with caplog.at_level(logging.WARNING, logger='urllib3'):
+            results = analyze_boroughs(df_geo(4, 6), client=client, max_workers=4,
+                                       radius=1000, limit=10)
+    assert stub.requests == 4 + 4 * 6
+    assert stub.peak <= 3
+    assert not [record for record in caplog.records if 'pool is full' in record.getMessage()]
+    assert set(results['venues']['Borough']) <= {'Borough %d' % b for b in range(4)}
+    assert list(results['centres']['Borough']) == ['Borough %d' % b for b in range(4)]
+
+
+def test_boroughs_without_venues_keep_the_columns():
+    with FoursquareStub(VenueField([], [], [])) as stub, \
+            FoursquareClient('id', 'secret', base_url=stub.url) as client:
+        results = analyze_boroughs(df_geo(2, 2), client=client, radius=1000, limit=10)
+    for name in ['search', 'venues', 'restaurants']:
+        assert results[name].empty
+        assert 'Borough' in results[name]
+    assert results['search'][results['search']['Borough'] == 'Borough 0'].empty
+    assert list(results['venues'].columns) == COLUMNS
+
+
+def test_no_boroughs():
+    with FoursquareClient('id', 'secret') as client:
+        results = analyze_boroughs(df_geo(1, 1), boroughs=[], client=client)
+    assert list(results['venues'].columns) == COLUMNS
+    assert 'Borough' in results['search']
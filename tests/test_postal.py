@@ -0,0 +1,42 @@
+import pandas as pd
+
+from neighborhoods.postal import COLUMNS, NOT_ASSIGNED, clean_postal_table, read_neighborhoods
+
+
+def raw(*rows):
+    return pd.DataFrame(list(rows), columns=COLUMNS)
+
+
+def table(*rows):
+    cells = ''.join('<tr>{}</tr>'.format(''.join('<td>{}</td>'.format(cell) for cell in row))
+                    for row in rows)
+    return ('<table class="wikitable sortable"><tr><th>Postal Code</th><th>Borough</th>'
+            '<th>Neighborhood</th></tr>{}</table>'.format(cells))
+
+
+def test_merges_neighborhoods_of_a_postal_code():
+    df = clean_postal_table(raw(['M1B', 'Scarborough', 'Rouge'],
+                                ['M3A', NOT_ASSIGNED, NOT_ASSIGNED],
+                                ['M5A', 'Downtown Toronto', NOT_ASSIGNED],
+                                ['M1B', 'Scarborough', 'Malvern']))
+    assert df.values.tolist() == [['M1B', 'Scarborough', 'Rouge, Malvern'],
+                                  ['M5A', 'Downtown Toronto', 'Downtown Toronto']]
+
+
+def test_empty_table():
+    df = clean_postal_table(raw())
+    assert list(df.columns) == COLUMNS
+    assert df.empty
+
+
+def test_every_borough_not_assigned():
+    df = clean_postal_table(raw(['M1A', NOT_ASSIGNED, NOT_ASSIGNED],
+                                ['M2A', NOT_ASSIGNED, NOT_ASSIGNED]))
+    assert list(df.columns) == COLUMNS
+    assert df.empty
+
+
+def test_table_without_three_cell_rows():
+    df = read_neighborhoods(table(['M1A', 'Not assigned'], ['M1B', 'Scarborough']))
+    assert list(df.columns) == COLUMNS
+    assert df.empty
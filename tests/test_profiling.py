@@ -0,0 +1,74 @@
+import json
+import threading
+
+import numpy as np
+import pandas as pd
+
+from neighborhoods import cli
+from neighborhoods.profiling import Profiler, profiler
+
+BLOCK = 2000000 # float64s, 16 MB
+
+
+def test_peak_memory_only_for_top_level_stages():
+    prof = Profiler(enabled=True, trace_memory=True)
+    try:
+        with prof.stage('outer'):
+            with prof.stage('inner'):
+                block = np.ones(BLOCK)
+            del block
+        with prof.stage('small'):
+            small = np.ones(1000)
+        del small
+    finally:
+        prof.disable()
+    stages = prof.summary()['stages']
+    assert stages['outer']['peak_memory'] >= BLOCK * 8
+    assert stages['inner']['peak_memory'] is None
+    assert 0 < stages['small']['peak_memory'] < BLOCK * 8
+
+
+def test_concurrent_stages_do_not_reset_each_others_peak():
+    prof = Profiler(enabled=True, trace_memory=True)
+    started, release = threading.Event(), threading.Event()
+
+    def worker():
+        with prof.stage('worker'):
+            started.set()
+            release.wait()
+
+    try:
+        with prof.stage('main'):
+            block = np.ones(BLOCK)
+            thread = threading.Thread(target=worker)
+            thread.start()
+            started.wait()
+            del block
+            release.set()
+            thread.join()
+    finally:
+        prof.disable()
+    stages = prof.summary()['stages']
+    assert stages['main']['peak_memory'] >= BLOCK * 8
+    assert stages['worker']['peak_memory'] is None
+
+
+def test_max_rss_is_in_bytes():
+    #a Python process with numpy and pandas loaded takes more than 10 MB
+    assert 10 * 2 ** 20 < Profiler(enabled=True).summary()['max_rss'] < 2 ** 40
+
+
+def test_cli_trace_memory(tmp_path):
+    venues = tmp_path / 'venues.csv'
+    pd.DataFrame({'Borough': ['A', 'A', 'B'],
+                  'Category': ['Pub', 'Thai Restaurant', 'Park']}).to_csv(venues, index=False)
+    path = tmp_path / 'profile.json'
+    try:
+        cli.main(['--profile', str(path), '--trace-memory', 'stats', str(venues),
+                  '--diversity', '--replicates', '10'])
+    finally:
+        profiler.disable()
+        profiler.reset()
+    with open(path) as f:
+        stages = json.load(f)['stages']
+    assert stages['category_matrix']['peak_memory'] > 0
@@ -0,0 +1,88 @@
+import pandas as pd
+import pytest
+
+from neighborhoods import refresh
+from neighborhoods.refresh import (ADDED, MOVED, REMOVED, RENAMED, STALE, Snapshot,
+                                   diff_postal_codes, refresh_venues)
+
+
+class RecordingClient:
+    """Answers every explore request with one venue at the query point."""
+
+    max_workers = 2
+
+    def __init__(self):
+        self.requests = []
+
+    def explore(self, lat, lng, radius, limit):
+        self.requests.append((lat, lng))
+        venue = {'id': '%.4f,%.4f' % (lat, lng), 'name': 'Venue',
+                 'categories': [{'name': 'Cafe'}], 'location': {'lat': lat, 'lng': lng}}
+        return [{'venue': venue}]
+
+
+def df_geo(*rows):
+    return pd.DataFrame(list(rows), columns=['PostalCode', 'Borough', 'Neighborhood',
+                                             'Latitude', 'Longitude'])
+
+
+OLD = df_geo(['M1A', 'Scarborough', 'Rouge', 43.80, -79.20],
+             ['M1B', 'Scarborough', 'Malvern', 43.81, -79.21],
+             ['M1C', 'Scarborough', 'Highland Creek', 43.78, -79.16],
+             ['M1D', 'Scarborough', 'Guildwood', 43.76, -79.19])
+
+#M1A unchanged, M1B renamed, M1C moved 1 km north, M1D removed, M1E added
+NEW = df_geo(['M1A', 'Scarborough', 'Rouge', 43.80, -79.20],
+             ['M1B', 'Scarborough', 'Malvern East', 43.81, -79.21],
+             ['M1C', 'Scarborough', 'Highland Creek', 43.789, -79.16],
+             ['M1E', 'Scarborough', 'Morningside', 43.77, -79.22])
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(refresh.time, 'time', lambda: now[0])
+    return now
+
+
+def test_diff_postal_codes():
+    changes = diff_postal_codes(OLD, NEW)
+    assert dict(zip(changes['PostalCode'], changes['Change'])) == {
+        'M1B': RENAMED, 'M1C': MOVED, 'M1D': REMOVED, 'M1E': ADDED}
+
+
+def test_diff_within_tolerance_is_no_change():
+    nudged = OLD.assign(Latitude=OLD['Latitude'] + 1e-6)
+    assert diff_postal_codes(OLD, nudged, tolerance=1.0).empty
+
+
+def test_refresh_fetches_only_added_and_moved_postal_codes(tmp_path, clock):
+    client = RecordingClient()
+    refresh_venues(OLD, client, str(tmp_path))
+    assert len(client.requests) == len(OLD)
+
+    client.requests.clear()
+    result = refresh_venues(NEW, client, str(tmp_path))
+    assert sorted(client.requests) == [(43.77, -79.22), (43.789, -79.16)]
+    venues = result['venues'].set_index('PostalCode')
+    assert set(venues.index) == {'M1A', 'M1B', 'M1C', 'M1E'}
+    assert venues.loc['M1B', 'Neighborhood'] == 'Malvern East'
+    assert venues.loc['M1C', 'Latitude'] == 43.789
+    assert set(result['changes']['Change']) == {ADDED, REMOVED, RENAMED, MOVED}
+
+
+def test_refresh_refetches_stale_postal_codes(tmp_path, clock):
+    client = RecordingClient()
+    refresh_venues(OLD.iloc[:2], client, str(tmp_path))
+    clock[0] += 50
+    refresh_venues(OLD.iloc[:3], client, str(tmp_path))
+
+    client.requests.clear()
+    clock[0] += 60
+    result = refresh_venues(OLD.iloc[:3], client, str(tmp_path), max_age=100)
+    #M1A and M1B were fetched 110 s ago, M1C only 60 s ago
+    assert sorted(client.requests) == [(43.80, -79.20), (43.81, -79.21)]
+    assert dict(zip(result['changes']['PostalCode'], result['changes']['Change'])) == {
+        'M1A': STALE, 'M1B': STALE}
+    assert Snapshot.load(str(tmp_path)).fetched.to_dict() == {'M1A': 1110.0, 'M1B': 1110.0,
+                                                              'M1C': 1050.0}
@@ -0,0 +1,63 @@
+import json
+import threading
+from urllib.error import HTTPError
+from urllib.request import urlopen
+
+import pandas as pd
+import pytest
+
+from neighborhoods.service import QueryService, make_server
+
+
+@pytest.fixture(scope='module')
+def service():
+    venues = pd.DataFrame({'Borough': ['A', 'A', 'A', 'B'],
+                           'Neighborhood': ['a1', 'a1', 'a2', 'b1'],
+                           'Category': ['Pub', 'Pub', 'Park', 'Pub'],
+                           'Latitude': [43.70, 43.701, 43.75, 43.80],
+                           'Longitude': [-79.40, -79.401, -79.35, -79.30]})
+    df_geo = pd.DataFrame({'Neighborhood': ['a1', 'b1'], 'Latitude': [43.70, 43.80],
+                           'Longitude': [-79.40, -79.30]})
+    return QueryService(venues, df_geo)
+
+
+def get(service, path, **query):
+    status, body = service.handle(path, {key: str(value) for key, value in query.items()})
+    return status, json.loads(body)
+
+
+def test_top_and_within(service):
+    assert get(service, '/top', name='A', n=1) == (200, [{'category': 'Pub', 'count': 2}])
+    status, body = get(service, '/within', category='Pub', km=0.5)
+    assert status == 200
+    assert body == [{'neighborhood': 'a1', 'count': 2}, {'neighborhood': 'b1', 'count': 1}]
+
+
+@pytest.mark.parametrize('n', [0, -1, -5, 'x', '1.5'])
+def test_top_rejects_bad_n(service, n):
+    status, body = get(service, '/top', name='A', n=n)
+    assert status == 400
+    assert 'n must be' in body['error']
+
+
+@pytest.mark.parametrize('km', [0, -1, 'nan', 'inf', '-inf', 'x'])
+def test_within_rejects_bad_km(service, km):
+    status, body = get(service, '/within', category='Pub', km=km)
+    assert status == 400
+    assert 'km must be' in body['error']
+
+
+def test_http_status(service):
+    server = make_server(service, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        url = 'http://127.0.0.1:%d' % server.server_address[1]
+        with pytest.raises(HTTPError) as error:
+            urlopen(url + '/top?name=A&n=0')
+        assert error.value.code == 400
+        with urlopen(url + '/top?name=A&n=2') as response:
+            assert len(json.load(response)) == 2
+    finally:
+        server.shutdown()
+        server.server_close()
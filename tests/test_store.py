@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+
+from neighborhoods.features import CategoryMatrix
+from neighborhoods.store import Store, load_frame, save_frame
+
+
+def frame(rows=200):
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        'Borough': pd.Categorical(rng.choice(['Etobicoke', 'Scarborough', 'York'], rows),
+                                  categories=['York', 'Scarborough', 'Etobicoke']),
+        'ID': ['v%d' % i for i in range(rows)],
+        'Count': rng.integers(0, 100, rows).astype(np.int32),
+        'Latitude': 43.6 + rng.random(rows) * 0.3,
+        'Open': rng.random(rows) < 0.5})
+
+
+def mapped(array):
+    while array is not None and not isinstance(array, np.memmap):
+        array = array.base
+    return array is not None
+
+
+def test_round_trip_keeps_dtypes_and_categories(tmp_path):
+    df = frame()
+    path = str(tmp_path / 'venues.arrow')
+    save_frame(df, path)
+    loaded = load_frame(path, memory_map=False)
+    assert loaded.dtypes.to_dict() == df.dtypes.to_dict()
+    assert list(loaded['Borough'].cat.categories) == ['York', 'Scarborough', 'Etobicoke']
+    pd.testing.assert_frame_equal(loaded, df)
+
+
+def test_memory_mapped_load_equals_the_original(tmp_path):
+    df = frame()
+    path = str(tmp_path / 'venues.arrow')
+    save_frame(df, path)
+    pd.testing.assert_frame_equal(load_frame(path, memory_map=True), df)
+
+
+def test_repeated_strings_come_back_categorical(tmp_path):
+    df = pd.DataFrame({'Category': ['Cafe', 'Bar'] * 50, 'ID': [str(i) for i in range(100)]})
+    path = str(tmp_path / 'venues.arrow')
+    save_frame(df, path)
+    loaded = load_frame(path)
+    assert isinstance(loaded['Category'].dtype, pd.CategoricalDtype)
+    assert loaded['Category'].astype(object).tolist() == df['Category'].tolist()
+    assert loaded['ID'].tolist() == df['ID'].tolist()
+
+
+def test_matrix_round_trip(tmp_path):
+    store = Store(str(tmp_path))
+    matrix = CategoryMatrix(np.array([[1, 0, 2], [0, 3, 0]]), ['A', 'B'], ['Bar', 'Cafe', 'Pub'])
+    store.save_matrix('onehot', matrix)
+    loaded = store.load_matrix('onehot')
+    assert 'onehot' in store
+    assert all(mapped(array) for array in (loaded.counts.data, loaded.counts.indices,
+                                           loaded.counts.indptr))
+    assert (loaded.counts != matrix.counts).nnz == 0
+    assert list(loaded.index) == ['A', 'B']
+    assert list(loaded.columns) == ['Bar', 'Cafe', 'Pub']
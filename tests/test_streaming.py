@@ -0,0 +1,57 @@
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from benchmarks.stubs import FoursquareStub
+from benchmarks.synthetic import VenueField, coordinates_frame, postal_table
+from neighborhoods.foursquare import FoursquareClient, fetch_venues
+from neighborhoods.postal import merge_coordinates, read_neighborhoods
+from neighborhoods.streaming import ParquetSink, run_streaming
+
+
+def venues(ids, names, category):
+    return pd.DataFrame({'Borough': pd.Categorical(['Scarborough'] * len(ids)),
+                         'ID': ids,
+                         'Name': names,
+                         'Category': pd.Categorical([category] * len(ids)),
+                         'Latitude': [43.7] * len(ids),
+                         'Longitude': [-79.4] * len(ids)})
+
+
+def test_sink_writes_one_schema_across_chunks(tmp_path):
+    path = str(tmp_path / 'venues.parquet')
+    chunks = [venues(['1', '2'], [None, None], 'Cafe'),
+              venues(['3'], ['Pizza Place'], 'Pizza'),
+              venues(['4', '5'], ['A', 'B'], 'Bar')]
+    with ParquetSink(path) as sink:
+        for chunk in chunks:
+            sink.write(chunk)
+    assert sink.rows == 5
+    parquet = pq.ParquetFile(path)
+    assert parquet.metadata.num_row_groups == 3
+    assert parquet.schema_arrow.field('Name').type == pa.string()
+    assert parquet.schema_arrow.field('Category').type == pa.string()
+    df = pd.read_parquet(path)
+    assert df['ID'].tolist() == ['1', '2', '3', '4', '5']
+    assert df['Name'].isna().tolist() == [True, True, False, False, False]
+    assert df['Category'].tolist() == ['Cafe', 'Cafe', 'Pizza', 'Bar', 'Bar']
+
+
+def test_streaming_writes_the_in_memory_venues(tmp_path):
+    coordinates = coordinates_frame(60).rename(columns={'Postal Code': 'PostalCode'})
+    df_geo = merge_coordinates(read_neighborhoods(postal_table(60)), coordinates)
+    path = str(tmp_path / 'venues.parquet')
+    with FoursquareStub(VenueField.random(3000)) as stub, \
+            FoursquareClient('id', 'secret', base_url=stub.url) as client:
+        counts = run_streaming(df_geo, client, path, chunk_size=7, radius=1000, limit=10)
+        expected = fetch_venues(df_geo, client, radius=1000, limit=10)
+    streamed = pd.read_parquet(path)
+    assert pq.ParquetFile(path).metadata.num_row_groups > 1
+    assert list(streamed.columns) == list(expected.columns)
+    key = ['PostalCode', 'ID']
+    streamed = streamed.sort_values(key, ignore_index=True)
+    expected = expected.astype({column: object for column in ['PostalCode', 'Borough',
+                                                              'Neighborhood', 'Category']})
+    expected = expected.sort_values(key, ignore_index=True)
+    assert streamed.astype(object).equals(expected.astype(object))
+    assert counts['count'].sum() == len(expected)
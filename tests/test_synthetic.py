@@ -0,0 +1,30 @@
+from benchmarks.stubs import FoursquareStub
+from benchmarks.synthetic import VenueField, coordinates_frame, postal_table
+from neighborhoods.foursquare import FoursquareClient
+from neighborhoods.postal import merge_coordinates, read_neighborhoods
+from neighborhoods.refresh import refresh_venues
+
+
+def synthetic_df_geo(rows):
+    coordinates = coordinates_frame(rows).rename(columns={'Postal Code': 'PostalCode'})
+    return merge_coordinates(read_neighborhoods(postal_table(rows)), coordinates)
+
+
+def test_one_row_per_postal_code():
+    df_geo = synthetic_df_geo(600)
+    assert len(df_geo) > 100
+    assert not df_geo['PostalCode'].duplicated().any()
+
+
+def test_synthetic_df_geo_is_valid_refresh_input(tmp_path):
+    df_geo = synthetic_df_geo(90)
+    with FoursquareStub(VenueField.random(5000)) as stub, \
+            FoursquareClient('id', 'secret', base_url=stub.url) as client:
+        first = refresh_venues(df_geo, client, str(tmp_path), radius=1000, limit=10)
+        requests = stub.requests
+        second = refresh_venues(df_geo, client, str(tmp_path), radius=1000, limit=10)
+    assert requests == len(df_geo)
+    assert stub.requests == requests
+    assert set(first['changes']['Change']) == {'added'}
+    assert second['changes'].empty
+    assert len(second['venues']) == len(first['venues'])
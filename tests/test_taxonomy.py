@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+
+from neighborhoods.diversity import compare_diversity, exclude_categories
+from neighborhoods.streaming import iter_filtered
+from neighborhoods.taxonomy import EXCLUDED_CATEGORIES, Taxonomy, exclude, is_excluded
+
+CATEGORIES = ['Pizza Place', 'Asian Restaurant', 'Chinese Restaurant', 'Dim Sum Restaurant',
+              'Thai Restaurant', 'Pub', 'Park', 'Coffee Shop', None]
+
+
+def venues(count=500, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({'Borough': rng.choice(['A', 'B'], size=count),
+                         'Category': pd.Categorical(rng.choice(CATEGORIES, size=count))})
+
+
+def test_is_excluded_matches_the_named_categories():
+    frame = venues()
+    expected = frame['Category'].isin(EXCLUDED_CATEGORIES).to_numpy()
+    assert (is_excluded(frame['Category'], EXCLUDED_CATEGORIES) == expected).all()
+
+
+def test_subcategories_and_unknown_names():
+    values = pd.Series(['Asian Restaurant', 'Chinese Restaurant', 'Dim Sum Restaurant',
+                        'Thai Restaurant', 'Italian Restaurant', 'Park', None])
+    assert is_excluded(values, ['Chinese Restaurant', 'Park'], subcategories=True).tolist() == [
+        False, True, True, False, False, True, False]
+    assert is_excluded(values, ['Asian Restaurant']).tolist() == [
+        True, False, False, False, False, False, False]
+
+
+def test_every_exclusion_goes_through_the_taxonomy():
+    frame = venues()
+    expected = exclude(frame)
+    pd.testing.assert_frame_equal(exclude_categories(frame), expected)
+    streamed = pd.concat(iter_filtered([frame.iloc[:250], frame.iloc[250:]],
+                                       EXCLUDED_CATEGORIES))
+    pd.testing.assert_frame_equal(streamed, expected)
+    counts = compare_diversity(frame, replicates=10)['venues'].sort_index()
+    #venues without a category are not counted
+    located = expected.dropna(subset=['Category'])
+    assert counts.tolist() == located.groupby('Borough').size().sort_index().tolist()
+
+
+def test_families():
+    taxonomy = Taxonomy.default()
+    families = taxonomy.classify(['Dim Sum Restaurant', 'Cuban Restaurant', 'Park'])
+    assert families[:2].tolist() == ['Asian', 'Caribbean'] and pd.isna(families[2])